@@ -0,0 +1,7 @@
+from .base import AbstractBlobStore
+from .filesystem import FileSystemBlobStore
+
+__all__ = [
+    "AbstractBlobStore",
+    "FileSystemBlobStore",
+]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+
+
+class AbstractBlobStore(ABC):
+    """Base class for all blob stores.
+
+    Blob stores keep the parts of events, that are too large for the
+    repository, e.g. the result and payload of large events in CloudWatch.
+    """
+
+    @classmethod
+    @abstractmethod
+    def get_name(cls) -> str:
+        """Return the name of the blob store."""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        """Store the blob, replacing the existing one.
+
+        Args:
+            key (str): blob key, e.g. the event ID.
+            data (bytes): blob content.
+        """
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """Get the blob.
+
+        Args:
+            key (str): blob key.
+
+        Returns:
+            bytes | None: blob content or None if not found.
+        """
+
+    @abstractmethod
+    def remove_all(self) -> None:
+        """Remove all blobs."""
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+from ckanext.event_audit import config
+from ckanext.event_audit.blob_stores.base import AbstractBlobStore
+
+
+class FileSystemBlobStore(AbstractBlobStore):
+    """Store blobs as files in the local directory.
+
+    It's meant for development and testing, as the directory is not shared
+    between servers.
+    """
+
+    def __init__(self, path: str | None = None):
+        """Filesystem blob store.
+
+        Args:
+            path (str | None, optional): directory of the blobs. If not
+                specified, the configured directory will be used.
+        """
+        self.path = path or config.get_blob_store_path()
+
+    @classmethod
+    def get_name(cls) -> str:
+        return "filesystem"
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # write to a temporary file first, to never expose a partial blob
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            return self._get_path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def remove_all(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _get_path(self, key: str) -> Path:
+        if not key or Path(key).name != key or key in (".", ".."):
+            raise ValueError(f"Invalid blob key: {key}")
+
+        # spread blobs across subdirectories, to keep directories small
+        return Path(self.path, key[:2], key)
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 import json
 from datetime import datetime as dt
+from datetime import timedelta as td
 
 import click
 from pytz import UTC
 
-from ckanext.event_audit import repositories, types, utils
+from ckanext.event_audit import config, repositories, types, utils
 
 __all__ = [
     "event_audit",
@@ -75,7 +76,13 @@ def export_data(
     if start and end and start > end:
         return click.secho("Start date must be before the end date.", fg="red")
 
-    click.echo(exporter.from_filters(types.Filters(time_from=start, time_to=end)))
+    # events are exported chunk by chunk, to keep the memory usage flat
+    for chunk in exporter.stream_from_filters(
+        types.Filters(time_from=start, time_to=end)
+    ):
+        click.echo(chunk, nl=False)
+
+    click.echo()
 
 
 @event_audit.command()
@@ -133,3 +140,98 @@ def remove_events(repository: str | None, start: dt | None, end: dt | None):
         return repo.remove_all_events()
 
     return repo.remove_events(types.Filters(time_from=start, time_to=end))
+
+
+@event_audit.command()
+@click.option(
+    "--ahead",
+    required=False,
+    type=int,
+    help="Number of future partitions to create",
+)
+@click.option(
+    "--retention",
+    required=False,
+    type=int,
+    help="Expire partitions with events older than this number of days",
+)
+@click.option(
+    "--detach",
+    is_flag=True,
+    help="Detach expired partitions instead of dropping them",
+)
+def manage_partitions(ahead: int | None, retention: int | None, detach: bool):
+    """Create future partitions and expire old ones for the postgres repository.
+
+    Args:
+        ahead (int | None): The number of future partitions to create. If not
+            provided, the configured value is used.
+        retention (int | None): Partitions that contain only events older than
+            this number of days are expired. If not provided, the configured
+            value is used. Zero disables expiration.
+        detach (bool): Keep expired partitions as standalone tables.
+
+    Example:
+        $ ckan event-audit manage-partitions --ahead=3 --retention=365
+
+        $ ckan event-audit manage-partitions --retention=30 --detach
+    """
+    try:
+        repo = utils.get_repo(repositories.PostgresRepository.get_name())
+    except ValueError as e:
+        return click.secho(e, fg="red")
+
+    if not isinstance(repo, repositories.PostgresRepository):
+        return click.secho("Postgres repository is overridden by a plugin.", fg="red")
+
+    if not repo.is_partitioned():
+        return click.secho(
+            "The events table isn't partitioned. Apply the migrations first.",
+            fg="red",
+        )
+
+    for partition in repo.create_partitions(ahead):
+        click.secho(f"Created partition {partition.name}", fg="green")
+
+    if retention is None:
+        retention = config.get_postgres_retention_days()
+
+    if not retention:
+        return None
+
+    before = dt.now(UTC) - td(days=retention)
+
+    for partition in repo.expire_partitions(before, detach_only=detach):
+        action = "Detached" if detach else "Dropped"
+        click.secho(f"{action} partition {partition.name}", fg="yellow")
+
+
+@event_audit.command()
+@click.option(
+    "--keep",
+    is_flag=True,
+    help="Keep the legacy hash after the migration",
+)
+def migrate_redis(keep: bool):
+    """Move events of the redis repository into the indexed storage layout.
+
+    Events, stored by the previous versions of the extension inside the single
+    `event-audit` hash, are re-written into per-event keys and index sets.
+
+    Args:
+        keep (bool): Keep the legacy hash after the migration.
+
+    Example:
+        $ ckan event-audit migrate-redis
+    """
+    try:
+        repo = utils.get_repo(repositories.RedisRepository.get_name())
+    except ValueError as e:
+        return click.secho(e, fg="red")
+
+    if not isinstance(repo, repositories.RedisRepository):
+        return click.secho("Redis repository is overridden by a plugin.", fg="red")
+
+    migrated = repo.migrate_legacy_events(keep=keep)
+
+    click.secho(f"{migrated} event(s) migrated", fg="green")
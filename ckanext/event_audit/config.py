@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import logging
+import tempfile
+from pathlib import Path
+
 import ckan.plugins.toolkit as tk
 
 from ckanext.event_audit import types
 
+log = logging.getLogger(__name__)
+
 CONF_ACTIVE_REPO = "ckanext.event_audit.active_repo"
 DEF_ACTIVE_REPO = "redis"
 CONF_RESTRICT_AVAILABLE_REPOS = "ckanext.event_audit.restrict_available_repos"
@@ -17,6 +23,42 @@ DEF_CLODWATCH_GROUP = "/ckan/event-audit"
 CONF_CLOUDWATCH_STREAM = "ckanext.event_audit.cloudwatch.log_stream"
 DEF_CLOUDWATCH_STREAM = "event-audit-stream"
 
+CONF_CLOUDWATCH_STREAM_TEMPLATE = "ckanext.event_audit.cloudwatch.log_stream_template"
+DEF_CLOUDWATCH_STREAM_TEMPLATE = ""
+
+CONF_CLOUDWATCH_QUERY_ENGINE = "ckanext.event_audit.cloudwatch.query_engine"
+DEF_CLOUDWATCH_QUERY_ENGINE = "filter"
+
+CONF_CLOUDWATCH_QUERY_SLICE_HOURS = "ckanext.event_audit.cloudwatch.query_slice_hours"
+DEF_CLOUDWATCH_QUERY_SLICE_HOURS = 24
+
+CONF_CLOUDWATCH_QUERY_CONCURRENCY = "ckanext.event_audit.cloudwatch.query_concurrency"
+DEF_CLOUDWATCH_QUERY_CONCURRENCY = 4
+
+CONF_CLOUDWATCH_PARALLEL_SCAN = "ckanext.event_audit.cloudwatch.parallel_scan"
+DEF_CLOUDWATCH_PARALLEL_SCAN = False
+
+CONF_CLOUDWATCH_MAX_REQUESTS_PER_SECOND = (
+    "ckanext.event_audit.cloudwatch.max_requests_per_second"
+)
+DEF_CLOUDWATCH_MAX_REQUESTS_PER_SECOND = 50
+
+CONF_CLOUDWATCH_BREAKER_THRESHOLD = "ckanext.event_audit.cloudwatch.breaker_threshold"
+DEF_CLOUDWATCH_BREAKER_THRESHOLD = 5
+
+CONF_CLOUDWATCH_BREAKER_RESET_TIMEOUT = (
+    "ckanext.event_audit.cloudwatch.breaker_reset_timeout"
+)
+DEF_CLOUDWATCH_BREAKER_RESET_TIMEOUT = 30
+
+CONF_CLOUDWATCH_OVERSIZE_STRATEGY = "ckanext.event_audit.cloudwatch.oversize_strategy"
+DEF_CLOUDWATCH_OVERSIZE_STRATEGY = "drop"
+
+CONF_BLOB_STORE = "ckanext.event_audit.blob_store"
+DEF_BLOB_STORE = "filesystem"
+
+CONF_BLOB_STORE_PATH = "ckanext.event_audit.blob_store.filesystem.path"
+
 CONF_IGNORED_CATEGORIES = "ckanext.event_audit.ignore.categories"
 DEF_IGNORED_CATEGORIES = []
 
@@ -54,12 +96,95 @@ DEF_BATCH_SIZE = 50
 CONF_BATCH_TIMEOUT = "ckanext.event_audit.batch.timeout"
 DEF_BATCH_TIMEOUT = 3600
 
+CONF_BATCH_MAX_RETRIES = "ckanext.event_audit.batch.max_retries"
+DEF_BATCH_MAX_RETRIES = 5
+
+CONF_BATCH_RETRY_DELAY = "ckanext.event_audit.batch.retry_delay"
+DEF_BATCH_RETRY_DELAY = 1
+
 CONF_THREADED = "ckanext.event_audit.threaded_mode"
 DEF_THREADED = True
 
+CONF_WRITER_WORKERS = "ckanext.event_audit.writer.workers"
+DEF_WRITER_WORKERS = 1
+
+CONF_SHUTDOWN_TIMEOUT = "ckanext.event_audit.shutdown.timeout"
+DEF_SHUTDOWN_TIMEOUT = 5
+
+CONF_SHUTDOWN_HANDLE_SIGTERM = "ckanext.event_audit.shutdown.handle_sigterm"
+DEF_SHUTDOWN_HANDLE_SIGTERM = False
+
+CONF_QUEUE_MAX_SIZE = "ckanext.event_audit.queue.max_size"
+DEF_QUEUE_MAX_SIZE = 10_000
+
+CONF_QUEUE_POLICY = "ckanext.event_audit.queue.policy"
+DEF_QUEUE_POLICY = "block"
+
+CONF_QUEUE_BLOCK_TIMEOUT = "ckanext.event_audit.queue.block_timeout"
+DEF_QUEUE_BLOCK_TIMEOUT = 1
+
+CONF_SPOOL_PATH = "ckanext.event_audit.spool.path"
+
+CONF_SPOOL_ENABLED = "ckanext.event_audit.spool.enabled"
+DEF_SPOOL_ENABLED = False
+
+CONF_SPOOL_SEGMENT_SIZE = "ckanext.event_audit.spool.segment_size"
+DEF_SPOOL_SEGMENT_SIZE = 16_777_216  # 16MB
+
+CONF_SPOOL_FSYNC_INTERVAL = "ckanext.event_audit.spool.fsync_interval"
+DEF_SPOOL_FSYNC_INTERVAL = 1
+
+CONF_SPOOL_REPLAY_INTERVAL = "ckanext.event_audit.spool.replay_interval"
+DEF_SPOOL_REPLAY_INTERVAL = 60
+
 CONF_ADMIN_PANEL = "ckanext.event_audit.enable_admin_panel"
 DEF_ADMIN_PANEL = True
 
+CONF_METRICS = "ckanext.event_audit.metrics"
+DEF_METRICS = "memory"
+
+CONF_METRICS_ENDPOINT = "ckanext.event_audit.metrics.enable_endpoint"
+DEF_METRICS_ENDPOINT = False
+
+CONF_METRICS_PUBLIC = "ckanext.event_audit.metrics.public"
+DEF_METRICS_PUBLIC = False
+
+CONF_READ_CHUNK_SIZE = "ckanext.event_audit.read_chunk_size"
+DEF_READ_CHUNK_SIZE = 1000
+
+CONF_POSTGRES_INSERT_CHUNK_SIZE = "ckanext.event_audit.postgres.insert_chunk_size"
+DEF_POSTGRES_INSERT_CHUNK_SIZE = 1000
+
+CONF_POSTGRES_DELETE_CHUNK_SIZE = "ckanext.event_audit.postgres.delete_chunk_size"
+DEF_POSTGRES_DELETE_CHUNK_SIZE = 0
+
+CONF_POSTGRES_PARTITION_INTERVAL = "ckanext.event_audit.postgres.partition_interval"
+DEF_POSTGRES_PARTITION_INTERVAL = "month"
+
+CONF_POSTGRES_PARTITIONS_AHEAD = "ckanext.event_audit.postgres.partitions_ahead"
+DEF_POSTGRES_PARTITIONS_AHEAD = 3
+
+CONF_POSTGRES_RETENTION_DAYS = "ckanext.event_audit.postgres.retention_days"
+DEF_POSTGRES_RETENTION_DAYS = 0
+
+CONF_POSTGRES_COPY_FORMAT = "ckanext.event_audit.postgres.copy_format"
+DEF_POSTGRES_COPY_FORMAT = ""
+
+CONF_REDIS_WRITE_CHUNK_SIZE = "ckanext.event_audit.redis.write_chunk_size"
+DEF_REDIS_WRITE_CHUNK_SIZE = 500
+
+CONF_REDIS_BUCKET_INTERVAL = "ckanext.event_audit.redis.bucket_interval"
+DEF_REDIS_BUCKET_INTERVAL = "day"
+
+CONF_REDIS_RETENTION_DAYS = "ckanext.event_audit.redis.retention_days"
+DEF_REDIS_RETENTION_DAYS = 0
+
+CONF_REDIS_STREAM_MAX_LENGTH = "ckanext.event_audit.redis_stream.max_length"
+DEF_REDIS_STREAM_MAX_LENGTH = 1_000_000
+
+CONF_REDIS_STREAM_MAX_INGEST_LAG = "ckanext.event_audit.redis_stream.max_ingest_lag"
+DEF_REDIS_STREAM_MAX_INGEST_LAG = 86400
+
 
 def active_repo() -> str:
     """The active repository to store the audit logs."""
@@ -86,6 +211,91 @@ def get_cloudwatch_log_stream() -> str:
     return tk.config.get(CONF_CLOUDWATCH_STREAM, DEF_CLOUDWATCH_STREAM)
 
 
+def get_cloudwatch_log_stream_template() -> str:
+    """The template of the sharded log stream names.
+
+    Empty string means that all events are written to the configured stream.
+    """
+    return tk.config.get(
+        CONF_CLOUDWATCH_STREAM_TEMPLATE, DEF_CLOUDWATCH_STREAM_TEMPLATE
+    )
+
+
+def get_cloudwatch_query_engine() -> str:
+    """The engine used to read events from CloudWatch, `filter` or `insights`."""
+    return tk.config.get(CONF_CLOUDWATCH_QUERY_ENGINE, DEF_CLOUDWATCH_QUERY_ENGINE)
+
+
+def get_cloudwatch_query_slice_hours() -> int:
+    """The size of the time slices, queried in parallel, in hours."""
+    return tk.config.get(
+        CONF_CLOUDWATCH_QUERY_SLICE_HOURS, DEF_CLOUDWATCH_QUERY_SLICE_HOURS
+    )
+
+
+def get_cloudwatch_query_concurrency() -> int:
+    """The maximum number of time slices queried at the same time."""
+    return tk.config.get(
+        CONF_CLOUDWATCH_QUERY_CONCURRENCY, DEF_CLOUDWATCH_QUERY_CONCURRENCY
+    )
+
+
+def is_cloudwatch_parallel_scan_enabled() -> bool:
+    """Scan time slices with `filter_log_events` in parallel."""
+    return tk.config.get(CONF_CLOUDWATCH_PARALLEL_SCAN, DEF_CLOUDWATCH_PARALLEL_SCAN)
+
+
+def get_cloudwatch_max_requests_per_second() -> int:
+    """The rate limit of `put_log_events` calls per process. 0 - no limit."""
+    return tk.config.get(
+        CONF_CLOUDWATCH_MAX_REQUESTS_PER_SECOND,
+        DEF_CLOUDWATCH_MAX_REQUESTS_PER_SECOND,
+    )
+
+
+def get_cloudwatch_breaker_threshold() -> int:
+    """The number of consecutive failed writes, that opens the circuit breaker."""
+    return tk.config.get(
+        CONF_CLOUDWATCH_BREAKER_THRESHOLD, DEF_CLOUDWATCH_BREAKER_THRESHOLD
+    )
+
+
+def get_cloudwatch_breaker_reset_timeout() -> int:
+    """The time in seconds, before writes are tried again."""
+    return tk.config.get(
+        CONF_CLOUDWATCH_BREAKER_RESET_TIMEOUT, DEF_CLOUDWATCH_BREAKER_RESET_TIMEOUT
+    )
+
+
+def get_cloudwatch_oversize_strategy() -> str:
+    """What to do with events, that are too large for CloudWatch.
+
+    One of `drop`, `compress`, `split` or `offload`.
+    """
+    return tk.config.get(
+        CONF_CLOUDWATCH_OVERSIZE_STRATEGY, DEF_CLOUDWATCH_OVERSIZE_STRATEGY
+    )
+
+
+def get_blob_store() -> str:
+    """The name of the blob store for offloaded event data."""
+    return tk.config.get(CONF_BLOB_STORE, DEF_BLOB_STORE)
+
+
+def get_blob_store_path() -> str:
+    """The directory of the filesystem blob store.
+
+    Defaults to the `event_audit` directory inside the CKAN storage path, or
+    inside the system temporary directory, if the storage path isn't set.
+    """
+    if path := tk.config.get(CONF_BLOB_STORE_PATH):
+        return path
+
+    root = tk.config.get("ckan.storage_path") or tempfile.gettempdir()
+
+    return str(Path(root, "event_audit", "blobs"))
+
+
 def get_ignored_categories() -> list[str]:
     """A list of categories to ignore when logging events."""
     return tk.config.get(CONF_IGNORED_CATEGORIES, DEF_IGNORED_CATEGORIES)
@@ -142,9 +352,192 @@ def get_batch_timeout() -> int:
     return tk.config.get(CONF_BATCH_TIMEOUT, DEF_BATCH_TIMEOUT)
 
 
+def get_batch_max_retries() -> int:
+    """The number of retries of a failed batch, before it's dropped."""
+    return tk.config.get(CONF_BATCH_MAX_RETRIES, DEF_BATCH_MAX_RETRIES)
+
+
+def get_batch_retry_delay() -> float:
+    """The base delay in seconds before the retry of a failed batch."""
+    return float(tk.config.get(CONF_BATCH_RETRY_DELAY, DEF_BATCH_RETRY_DELAY))
+
+
 def is_threaded_mode_enabled() -> bool:
     return tk.config.get(CONF_THREADED, DEF_THREADED)
 
 
+def get_writer_workers() -> int:
+    """The number of writer threads, if the repository supports it."""
+    return tk.config.get(CONF_WRITER_WORKERS, DEF_WRITER_WORKERS)
+
+
+def get_shutdown_timeout() -> int:
+    """The time to write the queued events, when the process exits."""
+    return tk.config.get(CONF_SHUTDOWN_TIMEOUT, DEF_SHUTDOWN_TIMEOUT)
+
+
+def is_sigterm_handler_enabled() -> bool:
+    """Exit normally on SIGTERM, if nothing else handles it."""
+    return tk.config.get(CONF_SHUTDOWN_HANDLE_SIGTERM, DEF_SHUTDOWN_HANDLE_SIGTERM)
+
+
+def get_queue_max_size() -> int:
+    """The maximum number of events in the queue of the threaded mode."""
+    return tk.config.get(CONF_QUEUE_MAX_SIZE, DEF_QUEUE_MAX_SIZE)
+
+
+def get_queue_policy() -> str:
+    """What to do, when the queue is full.
+
+    One of `block`, `drop_newest`, `drop_oldest` or `spill`.
+    """
+    return tk.config.get(CONF_QUEUE_POLICY, DEF_QUEUE_POLICY)
+
+
+def get_queue_block_timeout() -> int:
+    """The time in seconds to wait for the space in the full queue."""
+    return tk.config.get(CONF_QUEUE_BLOCK_TIMEOUT, DEF_QUEUE_BLOCK_TIMEOUT)
+
+
+def get_spool_path() -> str:
+    """The directory for the events, stored on disk by the threaded mode.
+
+    Defaults to the `event_audit/spool` directory inside the CKAN storage
+    path, or inside the system temporary directory, that might be cleaned
+    on reboot.
+    """
+    if path := tk.config.get(CONF_SPOOL_PATH):
+        return path
+
+    if not (root := tk.config.get("ckan.storage_path")):
+        root = tempfile.gettempdir()
+        log.warning(
+            "Neither %s, nor ckan.storage_path is set, events are stored on disk "
+            "in the temporary directory %s",
+            CONF_SPOOL_PATH,
+            root,
+        )
+
+    return str(Path(root, "event_audit", "spool"))
+
+
+def is_spool_enabled() -> bool:
+    """Store queued events in the write-ahead log on disk."""
+    return tk.config.get(CONF_SPOOL_ENABLED, DEF_SPOOL_ENABLED)
+
+
+def get_spool_segment_size() -> int:
+    """The size of a segment of the write-ahead log in bytes."""
+    return tk.config.get(CONF_SPOOL_SEGMENT_SIZE, DEF_SPOOL_SEGMENT_SIZE)
+
+
+def get_spool_fsync_interval() -> int:
+    """The time in seconds between `fsync` calls of the write-ahead log."""
+    return tk.config.get(CONF_SPOOL_FSYNC_INTERVAL, DEF_SPOOL_FSYNC_INTERVAL)
+
+
+def get_spool_replay_interval() -> int:
+    """The time in seconds between replays of the released events."""
+    return tk.config.get(CONF_SPOOL_REPLAY_INTERVAL, DEF_SPOOL_REPLAY_INTERVAL)
+
+
 def is_admin_panel_enabled() -> bool:
     return tk.config.get(CONF_ADMIN_PANEL, DEF_ADMIN_PANEL)
+
+
+def get_metrics() -> str:
+    """The metrics backend."""
+    return tk.config.get(CONF_METRICS, DEF_METRICS)
+
+
+def is_metrics_endpoint_enabled() -> bool:
+    """Serve the metrics in the Prometheus text format."""
+    return tk.config.get(CONF_METRICS_ENDPOINT, DEF_METRICS_ENDPOINT)
+
+
+def is_metrics_public() -> bool:
+    """Serve the metrics to everyone, not only to sysadmins."""
+    return tk.config.get(CONF_METRICS_PUBLIC, DEF_METRICS_PUBLIC)
+
+
+def get_read_chunk_size() -> int:
+    """The number of events fetched at once when iterating over events."""
+    return tk.config.get(CONF_READ_CHUNK_SIZE, DEF_READ_CHUNK_SIZE)
+
+
+def get_postgres_insert_chunk_size() -> int:
+    """The maximum number of rows sent in a single INSERT statement."""
+    return tk.config.get(
+        CONF_POSTGRES_INSERT_CHUNK_SIZE, DEF_POSTGRES_INSERT_CHUNK_SIZE
+    )
+
+
+def get_postgres_copy_format() -> str:
+    """The COPY format used to write batches of events to Postgres.
+
+    Empty string means that COPY is disabled and INSERT is used instead.
+    """
+    return tk.config.get(CONF_POSTGRES_COPY_FORMAT, DEF_POSTGRES_COPY_FORMAT)
+
+
+def get_postgres_delete_chunk_size() -> int:
+    """The maximum number of rows removed by a single DELETE statement.
+
+    Zero means that all the matching rows are removed with one statement.
+    """
+    return tk.config.get(
+        CONF_POSTGRES_DELETE_CHUNK_SIZE, DEF_POSTGRES_DELETE_CHUNK_SIZE
+    )
+
+
+def get_postgres_partition_interval() -> str:
+    """The time range covered by a single partition, `month` or `day`."""
+    return tk.config.get(
+        CONF_POSTGRES_PARTITION_INTERVAL, DEF_POSTGRES_PARTITION_INTERVAL
+    )
+
+
+def get_postgres_partitions_ahead() -> int:
+    """The number of future partitions to pre-create."""
+    return tk.config.get(CONF_POSTGRES_PARTITIONS_AHEAD, DEF_POSTGRES_PARTITIONS_AHEAD)
+
+
+def get_postgres_retention_days() -> int:
+    """Partitions older than this number of days are expired.
+
+    Zero means that partitions are kept forever.
+    """
+    return tk.config.get(CONF_POSTGRES_RETENTION_DAYS, DEF_POSTGRES_RETENTION_DAYS)
+
+
+def get_redis_write_chunk_size() -> int:
+    """The maximum number of events sent to Redis in a single pipeline."""
+    return tk.config.get(CONF_REDIS_WRITE_CHUNK_SIZE, DEF_REDIS_WRITE_CHUNK_SIZE)
+
+
+def get_redis_bucket_interval() -> str:
+    """The time range covered by a single bucket of Redis keys, `hour` or `day`."""
+    return tk.config.get(CONF_REDIS_BUCKET_INTERVAL, DEF_REDIS_BUCKET_INTERVAL)
+
+
+def get_redis_retention_days() -> int:
+    """Redis keys of events older than this number of days expire.
+
+    Zero means that events are kept forever.
+    """
+    return tk.config.get(CONF_REDIS_RETENTION_DAYS, DEF_REDIS_RETENTION_DAYS)
+
+
+def get_redis_stream_max_length() -> int:
+    """The approximate maximum number of events kept in the stream.
+
+    Zero disables trimming.
+    """
+    return tk.config.get(CONF_REDIS_STREAM_MAX_LENGTH, DEF_REDIS_STREAM_MAX_LENGTH)
+
+
+def get_redis_stream_max_ingest_lag() -> int:
+    """The maximum delay in seconds between the creation and the write of an event."""
+    return tk.config.get(
+        CONF_REDIS_STREAM_MAX_INGEST_LAG, DEF_REDIS_STREAM_MAX_INGEST_LAG
+    )
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Any, Iterable
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
 from ckanext.event_audit import types, utils
 
+if TYPE_CHECKING:
+    from ckanext.event_audit.repositories import AbstractRepository
+
 
 class AbstractExporter(ABC):
     """Base class for all exporters.
@@ -26,6 +29,24 @@ class AbstractExporter(ABC):
             Any: exported data.
         """
 
+    def stream(self, events: Iterable[types.Event]) -> Iterator[Any]:
+        """Export events chunk by chunk.
+
+        Text exporters override it to produce the output lazily, so that the
+        chunks joined together are equal to the `export` result. By default,
+        the `export` result is yielded as a single chunk, unless it's None.
+
+        Args:
+            events (Iterable[types.Event]): events to export
+
+        Returns:
+            Iterator[Any]: chunks of exported data.
+        """
+        result = self.export(events)
+
+        if result is not None:
+            yield result
+
     def from_filters(self, filters: types.Filters, repo_name: str | None = None) -> Any:
         """Export events from a repo using the given filters.
 
@@ -38,8 +59,24 @@ class AbstractExporter(ABC):
         Returns:
             Any: exported data.
         """
-        repo = utils.get_active_repo() if not repo_name else utils.get_repo(repo_name)
+        return self.export(self._get_repo(repo_name).iter_events(filters))
+
+    def stream_from_filters(
+        self, filters: types.Filters, repo_name: str | None = None
+    ) -> Iterator[Any]:
+        """Export events from a repo chunk by chunk, using the given filters.
+
+        Events are iterated lazily, so the memory usage doesn't depend on the
+        number of exported events for the exporters that support streaming.
 
-        events = repo.filter_events(filters)
+        Args:
+            filters (types.Filters): search filters.
+            repo_name (str | None, optional): name of the repo to use. Defaults to None.
+
+        Returns:
+            Iterator[Any]: chunks of exported data.
+        """
+        return self.stream(self._get_repo(repo_name).iter_events(filters))
 
-        return self.export(events)
+    def _get_repo(self, repo_name: str | None) -> AbstractRepository:
+        return utils.get_active_repo() if not repo_name else utils.get_repo(repo_name)
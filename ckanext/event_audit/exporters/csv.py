@@ -3,7 +3,7 @@ from __future__ import annotations
 import csv
 from csv import QUOTE_ALL
 from io import StringIO
-from typing import Iterable
+from typing import Iterable, Iterator
 
 from ckanext.event_audit import types
 from ckanext.event_audit.exporters.base import AbstractExporter
@@ -40,32 +40,38 @@ class CSVExporter(AbstractExporter):
         Returns:
             str | None: CSV data.
         """
-        if not events:
-            return None
+        return "".join(self.stream(events)) or None
 
-        headers = []
-        dict_data = []
+    def stream(self, events: Iterable[types.Event]) -> Iterator[str]:
+        """Export events to CSV format line by line.
 
-        for event in events:
-            if not headers:
-                headers = [
-                    field
-                    for field in event.model_fields
-                    if field not in self.ignore_fields
-                ]
-
-            dict_data.append(event.model_dump(exclude=self.ignore_fields))  # type: ignore
+        Args:
+            events (Iterable[types.Event]): events to export.
 
+        Returns:
+            Iterator[str]: CSV lines, starting with the header.
+        """
         output = StringIO()
-        writer = csv.DictWriter(
-            output,
-            fieldnames=headers,
-            delimiter=self.delimiter,
-            quotechar=self.quotechar,
-            quoting=self.quoting,
-        )
+        writer: csv.DictWriter[str] | None = None
+
+        for event in events:
+            if writer is None:
+                writer = csv.DictWriter(
+                    output,
+                    fieldnames=[
+                        field
+                        for field in event.model_fields
+                        if field not in self.ignore_fields
+                    ],
+                    delimiter=self.delimiter,
+                    quotechar=self.quotechar,
+                    quoting=self.quoting,
+                )
+                writer.writeheader()
+
+            writer.writerow(event.model_dump(exclude=self.ignore_fields))  # type: ignore
 
-        writer.writeheader()
-        writer.writerows(dict_data)
+            yield output.getvalue()
 
-        return output.getvalue()
+            output.seek(0)
+            output.truncate()
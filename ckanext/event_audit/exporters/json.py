@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 
 from ckanext.event_audit import types
 from ckanext.event_audit.exporters.base import AbstractExporter
@@ -28,12 +28,27 @@ class JSONExporter(AbstractExporter):
         Returns:
             str | None: JSON data.
         """
-        if not events:
-            return None
+        if not self.stringify:
+            return [event.model_dump() for event in events] or None
 
-        dict_data = [event.model_dump() for event in events]
+        return "".join(self.stream(events)) or None
 
-        if not self.stringify:
-            return dict_data
+    def stream(self, events: Iterable[types.Event]) -> Iterator[str]:
+        """Export events to a JSON array string, event by event.
+
+        The output is always a string, regardless of the `stringify` option.
+
+        Args:
+            events (Iterable[types.Event]): events to export.
+
+        Returns:
+            Iterator[str]: parts of the JSON array.
+        """
+        separator = "["
+
+        for event in events:
+            yield separator + json.dumps(event.model_dump())
+            separator = ", "
 
-        return json.dumps(dict_data)
+        if separator != "[":
+            yield "]"
@@ -38,6 +38,9 @@ class XLSXExporter(AbstractExporter):
     def export(self, events: Iterable[types.Event]) -> str | BytesIO | None:
         """Export events to a XLSX file.
 
+        The workbook is created in the write-only mode, so the rows are
+        flushed to a temporary file as they are added.
+
         Args:
             events (Iterable[types.Event]): events to export.
 
@@ -45,19 +48,17 @@ class XLSXExporter(AbstractExporter):
             str | BytesIO | None: path to the file or BytesIO object if the
             export was successful, None otherwise.
         """
-        if not events:
-            return None
-
         headers = None
 
         # Create a workbook and add a worksheet
-        workbook = Workbook()
-        worksheet = workbook.active
-        worksheet.title = f"Event Audit Data {dt.now(tz.utc).strftime('%Y-%m-%d')}"  # type: ignore
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(
+            f"Event Audit Data {dt.now(tz.utc).strftime('%Y-%m-%d')}"
+        )
 
         for event in events:
             if not headers:
-                worksheet.append(  # type: ignore
+                worksheet.append(
                     [
                         field
                         for field in event.model_fields
@@ -66,10 +67,14 @@ class XLSXExporter(AbstractExporter):
                 )
                 headers = True
 
-            worksheet.append(  # type: ignore
+            worksheet.append(
                 list(event.model_dump(exclude=self.ignore_fields).values())
             )
 
+        if not headers:
+            workbook.close()
+            return None
+
         workbook.save(self.file_path)
 
         return self.file_path
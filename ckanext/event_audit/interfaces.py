@@ -5,7 +5,7 @@ from typing import TYPE_CHECKING
 from ckan.plugins.interfaces import Interface
 
 if TYPE_CHECKING:
-    from ckanext.event_audit import exporters
+    from ckanext.event_audit import blob_stores, exporters, metrics
     from ckanext.event_audit import repositories as repos
     from ckanext.event_audit import types
 
@@ -79,6 +79,43 @@ class IEventAudit(Interface):
         """
         return {}
 
+    def register_blob_store(self) -> dict[str, type[blob_stores.AbstractBlobStore]]:
+        """Return the blob stores provided by this plugin.
+
+        Blob stores keep the offloaded data of large events.
+
+        Example:
+            ```
+            def register_blob_store(self):
+                return {
+                    "s3": S3BlobStore,
+                }
+            ```
+
+        Returns:
+            mapping of blob store names to blob store classes
+        """
+        return {}
+
+    def register_metrics(self) -> dict[str, type[metrics.AbstractMetrics]]:
+        """Return the metrics backends provided by this plugin.
+
+        Metrics backends receive the measurements of the threaded writer,
+        e.g. sizes of batches and failed writes.
+
+        Example:
+            ```
+            def register_metrics(self):
+                return {
+                    "statsd": StatsdMetrics,
+                }
+            ```
+
+        Returns:
+            mapping of metrics backend names to metrics backend classes
+        """
+        return {}
+
     def skip_event(self, event: types.Event) -> bool:
         """Skip an event.
 
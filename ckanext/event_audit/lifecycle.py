@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import signal
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+from ckan import model
+from ckan import plugins as p
+
+from ckanext.event_audit import config, plugin, queues, utils, writer
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class _State:
+    """The state of the writers in the current process."""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # PID of the process, that started the writers
+    writer_pid: int | None = None
+    hooks_registered: bool = False
+
+
+_state = _State()
+
+
+def setup():
+    """Prepare the current process for writing events.
+
+    In the threaded mode, the writers are not started here, but on the first
+    queued event, so pre-forking servers start them in every worker process,
+    instead of the master one. The queued events are flushed, when the
+    process exits. Child processes get their own repository connections.
+    """
+    _register_hooks()
+
+    if not config.is_threaded_mode_enabled():
+        return
+
+    with _state.lock:
+        plugin.EventAuditPlugin.event_queue = queues.BoundedEventQueue.from_config()
+        plugin.EventAuditPlugin.writer = None
+        _state.writer_pid = None
+
+
+def ensure_writer() -> writer.WriterPool:
+    """Start the writers in the current process, unless they are running.
+
+    Returns:
+        WriterPool: the writers of the current process.
+    """
+    pool = plugin.EventAuditPlugin.writer
+
+    if pool is not None and _state.writer_pid == os.getpid():
+        return pool
+
+    with _state.lock:
+        pool = plugin.EventAuditPlugin.writer
+
+        if pool is None or _state.writer_pid != os.getpid():
+            pool = writer.WriterPool(
+                plugin.EventAuditPlugin.event_queue,
+                writer.WriterPool.get_size(utils.get_active_repo()),
+            )
+            pool.start()
+
+            plugin.EventAuditPlugin.writer = pool
+            _state.writer_pid = os.getpid()
+
+    return pool
+
+
+def shutdown(timeout: float | None = None) -> bool:
+    """Write the queued events, before the process exits.
+
+    Events, that are not written in time, stay in the write-ahead log, if
+    it's enabled, and are replayed by the next process.
+
+    Args:
+        timeout (float | None, optional): maximum time to wait, in seconds.
+            If not specified, the configured shutdown timeout will be used.
+
+    Returns:
+        bool: whether the queued events were written in time.
+    """
+    pool = plugin.EventAuditPlugin.writer
+
+    if pool is None or _state.writer_pid != os.getpid() or not pool.is_alive():
+        return True
+
+    if timeout is None:
+        timeout = config.get_shutdown_timeout()
+
+    event_queue = plugin.EventAuditPlugin.event_queue
+    flushed = pool.flush(timeout)
+
+    if not flushed:
+        log.warning(
+            "Event writers didn't finish in %s second(s), %s event(s) left",
+            timeout,
+            event_queue.qsize(),
+        )
+
+    if event_queue.spool is not None:
+        event_queue.spool.close()
+
+    return flushed
+
+
+def _register_hooks():
+    if _state.hooks_registered:
+        return
+
+    atexit.register(shutdown)
+
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_reset_after_fork)
+
+    # signal handlers can be set only in the main thread. Servers, that
+    # handle the signal themselves, exit normally, so `atexit` flushes events
+    if (
+        config.is_sigterm_handler_enabled()
+        and threading.current_thread() is threading.main_thread()
+        and signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+    ):
+        signal.signal(signal.SIGTERM, _exit_on_signal)
+
+    _state.hooks_registered = True
+
+
+def _exit_on_signal(signum: int, frame: Any):
+    """Exit normally, so the `atexit` handlers flush the queued events."""
+    sys.exit(128 + signum)
+
+
+def _reset_after_fork():
+    """Drop the state, inherited from the parent process.
+
+    Threads don't survive the fork, and connections must not be shared
+    with the parent, so the child process gets its own queue, writers and
+    repository instances. The queued events of the parent are written by
+    the parent.
+    """
+    # the lock might be held by a thread of the parent during the fork
+    _state.lock = threading.Lock()
+    _state.writer_pid = None
+
+    plugin.EventAuditPlugin.writer = None
+
+    if config.is_threaded_mode_enabled():
+        plugin.EventAuditPlugin.event_queue = queues.BoundedEventQueue.from_config()
+
+    for repo_class in utils.get_available_repos().values():
+        if "_instance" in vars(repo_class):
+            del repo_class._instance
+
+    # pooled connections of the parent are left for the parent, without
+    # closing them, and the child opens its own ones
+    if model.meta.engine is not None:
+        model.meta.engine.dispose(close=False)
+
+    # metrics of the parent are reported by the parent
+    utils.reset_metrics()
+
+    # the repository is created again on the first use
+    vars(p.get_plugin("event_audit")).pop("repo", None)
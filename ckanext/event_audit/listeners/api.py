@@ -2,12 +2,10 @@ from __future__ import annotations
 
 from typing import Any
 
-import ckan.plugins as p
 import ckan.plugins.toolkit as tk
 import ckan.types as ckan_types
 
 from ckanext.event_audit import config, const, types, utils
-from ckanext.event_audit.interfaces import IEventAudit
 
 
 def action_succeeded_subscriber(
@@ -42,13 +40,9 @@ def action_succeeded_subscriber(
         )
     )
 
-    if utils.skip_event(event):
+    if utils.is_event_skipped(event):
         return
 
-    for plugin in p.PluginImplementations(IEventAudit):
-        if plugin.skip_event(event):
-            return
-
     if thread_mode_enabled:
         repo.enqueue_event(event)
     else:
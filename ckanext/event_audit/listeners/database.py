@@ -11,7 +11,6 @@ import ckan.plugins as p
 from ckan.model.base import Session
 
 from ckanext.event_audit import config, const, types, utils
-from ckanext.event_audit.interfaces import IEventAudit
 from ckanext.event_audit.model import EventModel
 
 CACHE_ATTR = "_audit_cache"
@@ -136,13 +135,9 @@ def _process_cached_instances(
                 )
             )
 
-            if utils.skip_event(event):
+            if utils.is_event_skipped(event):
                 return
 
-            for plugin in reversed(list(p.PluginImplementations(IEventAudit))):
-                if plugin.skip_event(event):
-                    return
-
             if thread_mode_enabled:
                 repo.enqueue_event(event)
             else:
@@ -0,0 +1,9 @@
+from .base import AbstractMetrics, Metric
+from .memory import InMemoryMetrics, NullMetrics
+
+__all__ = [
+    "AbstractMetrics",
+    "InMemoryMetrics",
+    "Metric",
+    "NullMetrics",
+]
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+
+@dataclass(frozen=True)
+class Metric:
+    """Definition of a metric.
+
+    Args:
+        name (str): metric name, in the Prometheus format.
+        kind (str): `counter`, `gauge` or `histogram`.
+        help (str): description of the metric.
+        buckets (tuple[float, ...]): upper bounds of the histogram buckets.
+    """
+
+    name: str
+    kind: str
+    help: str
+    buckets: tuple[float, ...] = ()
+
+
+QUEUE_SIZE = Metric(
+    "event_audit_queue_size", GAUGE, "The number of events in the queue"
+)
+QUEUE_MAX_SIZE = Metric(
+    "event_audit_queue_max_size", GAUGE, "The maximum number of events in the queue"
+)
+EVENTS_DROPPED = Metric(
+    "event_audit_events_dropped_total",
+    COUNTER,
+    "The number of events, dropped because the queue was full",
+)
+EVENTS_SPILLED = Metric(
+    "event_audit_events_spilled_total",
+    COUNTER,
+    "The number of events, spilled to disk because the queue was full",
+)
+SPILL_SIZE = Metric(
+    "event_audit_spill_size", GAUGE, "The number of events, waiting on disk"
+)
+EVENTS_SKIPPED = Metric(
+    "event_audit_events_skipped_total",
+    COUNTER,
+    "The number of events, skipped by `skip_event`",
+)
+EVENTS_WRITTEN = Metric(
+    "event_audit_events_written_total",
+    COUNTER,
+    "The number of events, written to the repository",
+)
+WRITE_FAILURES = Metric(
+    "event_audit_write_failures_total",
+    COUNTER,
+    "The number of failed writes of a batch to the repository",
+)
+BATCH_SIZE = Metric(
+    "event_audit_batch_size",
+    HISTOGRAM,
+    "The number of events in a written batch",
+    (1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+WRITE_DURATION = Metric(
+    "event_audit_write_duration_seconds",
+    HISTOGRAM,
+    "The time of writing a batch to the repository",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+LAST_WRITE = Metric(
+    "event_audit_last_write_timestamp_seconds",
+    GAUGE,
+    "The time of the last successful write to the repository",
+)
+OLDEST_EVENT_AGE = Metric(
+    "event_audit_oldest_event_age_seconds",
+    GAUGE,
+    "The age of the oldest event, that is not written yet",
+)
+WRITERS_ALIVE = Metric(
+    "event_audit_writers_alive", GAUGE, "The number of running writer threads"
+)
+
+
+class AbstractMetrics(ABC):
+    """Base class for all metrics backends.
+
+    The backend receives the measurements of the extension, e.g. sizes of
+    written batches or the number of failed writes. Labels are passed as a
+    mapping of label names to values.
+    """
+
+    @classmethod
+    @abstractmethod
+    def get_name(cls) -> str:
+        """Return the name of the metrics backend."""
+
+    @abstractmethod
+    def inc(
+        self, metric: Metric, value: float = 1, labels: dict[str, str] | None = None
+    ) -> None:
+        """Increase the counter.
+
+        Args:
+            metric (Metric): the counter.
+            value (float, optional): the increment.
+            labels (dict[str, str] | None, optional): labels of the sample.
+        """
+
+    @abstractmethod
+    def set(
+        self, metric: Metric, value: float, labels: dict[str, str] | None = None
+    ) -> None:
+        """Set the value of the gauge or the counter, tracked elsewhere.
+
+        Args:
+            metric (Metric): the gauge or the counter.
+            value (float): the value.
+            labels (dict[str, str] | None, optional): labels of the sample.
+        """
+
+    @abstractmethod
+    def observe(
+        self, metric: Metric, value: float, labels: dict[str, str] | None = None
+    ) -> None:
+        """Add the observation to the histogram.
+
+        Args:
+            metric (Metric): the histogram.
+            value (float): the observed value.
+            labels (dict[str, str] | None, optional): labels of the sample.
+        """
+
+    def render(self) -> str:
+        """Render the collected metrics in the Prometheus text format.
+
+        Backends, that send metrics elsewhere, don't have to implement it.
+
+        Returns:
+            str: the metrics in the Prometheus text format.
+        """
+        raise NotImplementedError
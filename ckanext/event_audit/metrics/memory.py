@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Tuple
+
+from ckanext.event_audit.metrics.base import HISTOGRAM, AbstractMetrics, Metric
+
+LabelsKey = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class Histogram:
+    """Cumulative counts of the observations, that fit the buckets."""
+
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    sum: float = 0
+    count: int = 0
+
+    def __post_init__(self):
+        self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+
+        if index < len(self.counts):
+            self.counts[index] += 1
+
+        self.sum += value
+        self.count += 1
+
+
+class InMemoryMetrics(AbstractMetrics):
+    """Keep metrics in the memory of the process.
+
+    Every process has its own registry, so the pre-forking servers report
+    the metrics of the worker, that serves the request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Metric] = {}
+        self._values: dict[str, dict[LabelsKey, float]] = {}
+        self._histograms: dict[str, dict[LabelsKey, Histogram]] = {}
+
+    @classmethod
+    def get_name(cls) -> str:
+        return "memory"
+
+    def inc(
+        self, metric: Metric, value: float = 1, labels: dict[str, str] | None = None
+    ) -> None:
+        key = _get_key(labels)
+
+        with self._lock:
+            values = self._get_values(metric)
+            values[key] = values.get(key, 0) + value
+
+    def set(
+        self, metric: Metric, value: float, labels: dict[str, str] | None = None
+    ) -> None:
+        key = _get_key(labels)
+
+        with self._lock:
+            self._get_values(metric)[key] = value
+
+    def observe(
+        self, metric: Metric, value: float, labels: dict[str, str] | None = None
+    ) -> None:
+        key = _get_key(labels)
+
+        with self._lock:
+            self._metrics.setdefault(metric.name, metric)
+            histograms = self._histograms.setdefault(metric.name, {})
+
+            if key not in histograms:
+                histograms[key] = Histogram(metric.buckets)
+
+            histograms[key].observe(value)
+
+    def get_value(
+        self, metric: Metric, labels: dict[str, str] | None = None
+    ) -> float | None:
+        """Get the value of the counter or the gauge, if it's set."""
+        with self._lock:
+            return self._values.get(metric.name, {}).get(_get_key(labels))
+
+    def get_histogram(
+        self, metric: Metric, labels: dict[str, str] | None = None
+    ) -> Histogram | None:
+        """Get the histogram, if it has observations."""
+        with self._lock:
+            return self._histograms.get(metric.name, {}).get(_get_key(labels))
+
+    def render(self) -> str:
+        lines: list[str] = []
+
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                lines.append(f"# HELP {name} {_escape_help(metric.help)}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+
+                if metric.kind == HISTOGRAM:
+                    for key, histogram in sorted(self._histograms[name].items()):
+                        lines.extend(_render_histogram(name, key, histogram))
+                    continue
+
+                for key, value in sorted(self._values[name].items()):
+                    lines.append(f"{name}{_render_labels(key)} {_format(value)}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _get_values(self, metric: Metric) -> dict[LabelsKey, float]:
+        self._metrics.setdefault(metric.name, metric)
+
+        return self._values.setdefault(metric.name, {})
+
+
+class NullMetrics(AbstractMetrics):
+    """Ignore all the metrics."""
+
+    @classmethod
+    def get_name(cls) -> str:
+        return "null"
+
+    def inc(
+        self, metric: Metric, value: float = 1, labels: dict[str, str] | None = None
+    ) -> None:
+        pass
+
+    def set(
+        self, metric: Metric, value: float, labels: dict[str, str] | None = None
+    ) -> None:
+        pass
+
+    def observe(
+        self, metric: Metric, value: float, labels: dict[str, str] | None = None
+    ) -> None:
+        pass
+
+
+def _get_key(labels: dict[str, str] | None) -> LabelsKey:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _render_histogram(name: str, key: LabelsKey, histogram: Histogram) -> list[str]:
+    lines: list[str] = []
+    total = 0
+
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        total += count
+        labels = _render_labels((*key, ("le", _format(bound))))
+        lines.append(f"{name}_bucket{labels} {total}")
+
+    labels = _render_labels((*key, ("le", "+Inf")))
+    lines.append(f"{name}_bucket{labels} {histogram.count}")
+    lines.append(f"{name}_sum{_render_labels(key)} {_format(histogram.sum)}")
+    lines.append(f"{name}_count{_render_labels(key)} {histogram.count}")
+
+    return lines
+
+
+def _render_labels(key: LabelsKey) -> str:
+    if not key:
+        return ""
+
+    labels = ",".join(f'{name}="{_escape_label(value)}"' for name, value in key)
+
+    return f"{{{labels}}}"
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
@@ -0,0 +1,157 @@
+"""Partition Event table by timestamp.
+
+Revision ID: 5c4f8e2a7b1d
+Revises: 9256fa265b84
+Create Date: 2026-10-17 10:12:41.503128
+
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c4f8e2a7b1d"
+down_revision = "9256fa265b84"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, category, action, actor, action_object, action_object_id, "
+    'target_type, target_id, "timestamp", result, payload'
+)
+
+INDEXES = {
+    "ix_event_category": ["category"],
+    "ix_event_action": ["action"],
+    "ix_event_actor": ["actor"],
+    "ix_event_action_object": ["action_object"],
+    "ix_event_timestamp": ["timestamp"],
+    "ix_event_actor_action": ["actor", "action"],
+}
+
+
+def upgrade():
+    """Re-create the table as a range-partitioned one.
+
+    Monthly partitions, that cover the existing rows, are created before the
+    rows are copied, so every row is written once, right into its partition,
+    and indexes are built after the copy. Run the
+    `ckan event-audit manage-partitions` command afterwards to create the
+    partitions for the future.
+    """
+    _detach_legacy_table("event_audit_event")
+
+    op.execute(
+        """
+        CREATE TABLE event_audit_event (
+            id VARCHAR NOT NULL,
+            category VARCHAR NOT NULL,
+            action VARCHAR NOT NULL,
+            actor VARCHAR,
+            action_object VARCHAR,
+            action_object_id VARCHAR,
+            target_type VARCHAR,
+            target_id VARCHAR,
+            "timestamp" TIMESTAMP WITH TIME ZONE NOT NULL,
+            result JSONB DEFAULT '{}',
+            payload JSONB DEFAULT '{}',
+            CONSTRAINT event_audit_event_pkey PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+        """
+    )
+    op.execute(
+        "CREATE TABLE event_audit_event_default "
+        "PARTITION OF event_audit_event DEFAULT"
+    )
+
+    _create_legacy_partitions()
+    _copy_legacy_rows("jsonb")
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, "event_audit_event", columns)
+
+    op.drop_table("event_audit_event_legacy")
+
+
+def downgrade():
+    _detach_legacy_table("event_audit_event")
+
+    op.create_table(
+        "event_audit_event",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("actor", sa.String()),
+        sa.Column("action_object", sa.String()),
+        sa.Column("action_object_id", sa.String()),
+        sa.Column("target_type", sa.String()),
+        sa.Column("target_id", sa.String()),
+        sa.Column("timestamp", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("result", sa.JSON(), server_default="{}"),
+        sa.Column("payload", sa.JSON(), server_default="{}"),
+    )
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, "event_audit_event", columns)
+
+    _copy_legacy_rows("json")
+
+    # dropping the partitioned table drops all its partitions
+    op.drop_table("event_audit_event_legacy")
+
+
+def _create_legacy_partitions():
+    """Create monthly partitions for the time range of the legacy rows.
+
+    Partitions are named the same way, as the ones created by the
+    `manage-partitions` command, so the command recognizes them.
+    """
+    oldest, newest = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                'SELECT min("timestamp"), max("timestamp") '
+                "FROM event_audit_event_legacy"
+            )
+        )
+        .one()
+    )
+
+    if oldest is None:
+        return
+
+    oldest = oldest.astimezone(timezone.utc)
+    start = datetime(oldest.year, oldest.month, 1, tzinfo=timezone.utc)
+
+    while start <= newest:
+        end = (start + timedelta(days=32)).replace(day=1)
+
+        op.execute(
+            f"CREATE TABLE event_audit_event_{start:%Y%m%d}_{end:%Y%m%d} "
+            "PARTITION OF event_audit_event "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+        start = end
+
+
+def _copy_legacy_rows(json_type: str):
+    source_columns = COLUMNS.replace(
+        "result, payload", f"result::{json_type}, payload::{json_type}"
+    )
+
+    op.execute(
+        f"INSERT INTO event_audit_event ({COLUMNS}) "
+        f"SELECT {source_columns} FROM event_audit_event_legacy"
+    )
+
+
+def _detach_legacy_table(table: str):
+    """Rename the table and free the names of its indexes and constraints."""
+    for name in INDEXES:
+        op.drop_index(name, table_name=table)
+
+    op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {table}_pkey")
+    op.rename_table(table, f"{table}_legacy")
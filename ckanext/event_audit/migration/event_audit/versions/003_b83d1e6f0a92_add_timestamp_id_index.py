@@ -0,0 +1,28 @@
+"""Add (timestamp, id) index for keyset pagination.
+
+Revision ID: b83d1e6f0a92
+Revises: 5c4f8e2a7b1d
+Create Date: 2026-10-17 14:37:05.119842
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b83d1e6f0a92"
+down_revision = "5c4f8e2a7b1d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the composite index covers the timestamp-only lookups as well
+    op.create_index(
+        "ix_event_timestamp_id", "event_audit_event", ["timestamp", "id"]
+    )
+    op.drop_index("ix_event_timestamp", table_name="event_audit_event")
+
+
+def downgrade():
+    op.create_index("ix_event_timestamp", "event_audit_event", ["timestamp"])
+    op.drop_index("ix_event_timestamp_id", table_name="event_audit_event")
@@ -27,10 +27,18 @@ class EventModel(tk.BaseModel):
         Column("action_object_id", String, index=True),
         Column("target_type", String, index=True),
         Column("target_id", String, index=True),
-        Column("timestamp", TIMESTAMP(timezone=True), nullable=False, index=True),
+        Column(
+            "timestamp",
+            TIMESTAMP(timezone=True),
+            primary_key=True,
+            nullable=False,
+        ),
         Column("result", MutableDict.as_mutable(JSONB), default="{}"),
         Column("payload", MutableDict.as_mutable(JSONB), default="{}"),
         Index("ix_event_actor_action", "actor", "action"),
+        Index("ix_event_timestamp_id", "timestamp", "id"),
+        # the table is partitioned by time, see the 5c4f8e2a7b1d migration
+        postgresql_partition_by='RANGE ("timestamp")',
     )
 
     id: Mapped[str]
@@ -75,7 +83,6 @@ class EventModel(tk.BaseModel):
         session = session or model.meta.create_local_session()
 
         session.execute(sa.delete(EventModel).where(EventModel.id == self.id))
-        session.commit()
 
         if not defer_commit:
             session.commit()
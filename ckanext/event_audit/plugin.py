@@ -1,11 +1,6 @@
 from __future__ import annotations
 
-import queue
-import threading
-from datetime import datetime, timedelta
-from datetime import timezone as tz
 from pathlib import Path
-from typing import Any
 
 import yaml
 
@@ -16,48 +11,12 @@ from ckan.config.declaration import Declaration, Key
 from ckan.logic import clear_validators_cache
 from ckan.types import SignalMapping
 
-from ckanext.event_audit import config, listeners, types, utils
+from ckanext.event_audit import config, lifecycle, listeners, utils
+from ckanext.event_audit.queues import BoundedEventQueue
+from ckanext.event_audit.writer import EventWriteThread, WriterPool
 
-
-class EventWriteThread(threading.Thread):
-    def __init__(self, queue: queue.Queue[types.Event]):
-        threading.Thread.__init__(self)
-        self.queue = queue
-        self.data = types.ThreadData(last_push=datetime.now(tz.utc), events=[])
-
-    def run(self):
-        while True:
-            event: types.Event | Any = self.queue.get()
-
-            if not isinstance(event, types.Event):
-                continue
-
-            self.data["events"].append(event)
-
-            # TODO: should batch size be runtime configurable?
-            if len(
-                self.data["events"]
-            ) >= config.get_batch_size() or self._is_time_to_push(
-                self.data["last_push"]
-            ):
-                repo = utils.get_active_repo()
-
-                repo.write_events(self.data["events"])
-
-                self.data["events"] = []
-                self.data["last_push"] = datetime.now(tz.utc)
-
-            self.queue.task_done()
-
-    def _is_time_to_push(self, last_push: datetime) -> bool:
-        """Decide if it's time to push the events to the repository.
-
-        Check if the timedelta between the last push and now is greater than
-        the batch timeout.
-        """
-        return datetime.now(tz.utc) - last_push > timedelta(
-            seconds=config.get_batch_timeout()
-        )
+# the writer thread was defined here before, keep the old import path
+__all__ = ["EventAuditPlugin", "EventWriteThread"]
 
 
 @tk.blanket.validators
@@ -70,7 +29,8 @@ class EventAuditPlugin(p.SingletonPlugin):
     p.implements(p.ISignal)
     p.implements(p.IConfigDeclaration)
 
-    event_queue = queue.Queue()
+    event_queue = BoundedEventQueue()
+    writer: WriterPool | None = None
 
     # IConfigurer
     def update_config(self, config_: CKANConfig):
@@ -87,11 +47,8 @@ class EventAuditPlugin(p.SingletonPlugin):
             else:
                 utils.test_active_connection()
 
-        if config.is_threaded_mode_enabled():
-            # spawn a thread, and pass it queue instance
-            t = EventWriteThread(self.event_queue)
-            t.setDaemon(True)
-            t.start()
+        # writer threads are started lazily by the first queued event
+        lifecycle.setup()
 
     # ISignal
 
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Iterator
+
+from ckanext.event_audit import config, metrics, types, utils
+from ckanext.event_audit.spool import EventSpool, is_running
+
+log = logging.getLogger(__name__)
+
+POLICY_BLOCK = "block"
+POLICY_DROP_NEWEST = "drop_newest"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_SPILL = "spill"
+
+SPILL_PREFIX = "spill-"
+SPILL_SUFFIX = ".jsonl"
+
+
+class EventSpill:
+    """Keep events, that don't fit the queue, in a file.
+
+    Every process has its own file, events are stored as JSON lines. The
+    file is moved aside, before it's drained, so events are spilled to the
+    new file, while the old one is read line by line.
+
+    Files, left by the processes, that are not running anymore, are read
+    with `replay` on startup.
+    """
+
+    def __init__(self, path: str | None = None):
+        """Event spill.
+
+        Args:
+            path (str | None, optional): directory of the spill file. If not
+                specified, the configured spool directory will be used.
+        """
+        self.root = Path(path or config.get_spool_path())
+        self.path = self.root / f"{SPILL_PREFIX}{os.getpid()}{SPILL_SUFFIX}"
+        self._lock = threading.Lock()
+        self._size = 0
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, event: types.Event):
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(event.model_dump_json() + "\n")
+
+            self._size += 1
+
+    def drain(self) -> Iterator[types.Event]:
+        """Take all the spilled events, emptying the file."""
+        with self._lock:
+            if not self._size:
+                return
+
+            path = self._claim(self.path)
+            self._size = 0
+
+        if path is not None:
+            yield from self._read(path)
+
+    def replay(self) -> Iterator[types.Event]:
+        """Claim the files of stopped processes and read their events."""
+        for path in sorted(self.root.glob(f"{SPILL_PREFIX}*{SPILL_SUFFIX}")):
+            pid = path.name[len(SPILL_PREFIX) : -len(SPILL_SUFFIX)].split("-")[0]
+
+            if not pid.isdigit() or int(pid) == os.getpid() or is_running(int(pid)):
+                continue
+
+            claimed = self._claim(path)
+
+            if claimed is not None:
+                log.info("Replaying spilled events from %s", path.name)
+                yield from self._read(claimed)
+
+    def _claim(self, path: Path) -> Path | None:
+        """Rename the file to the unique name of the current process.
+
+        Returns:
+            Path | None: the new path, or None, if the file is claimed by
+                another process.
+        """
+        self._sequence += 1
+        claimed = self.root / (
+            f"{SPILL_PREFIX}{os.getpid()}-{self._sequence}{SPILL_SUFFIX}"
+        )
+
+        try:
+            path.rename(claimed)
+        except FileNotFoundError:
+            return None
+
+        return claimed
+
+    def _read(self, path: Path) -> Iterator[types.Event]:
+        """Read events from the file and remove it."""
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                # the last line might be incomplete, if the process crashed
+                if not line.endswith("\n"):
+                    break
+
+                try:
+                    yield types.Event.model_validate_json(line)
+                except ValueError:
+                    log.exception("Skipping invalid record of %s", path.name)
+
+        path.unlink(missing_ok=True)
+
+
+class BoundedEventQueue(queue.Queue):  # type: ignore
+    """The queue of the threaded mode with the limited size.
+
+    When the queue is full, events are handled according to the policy:
+
+    - `block`: wait for the space up to `block_timeout` seconds, then drop
+      the event
+    - `drop_newest`: drop the event
+    - `drop_oldest`: drop the oldest queued event, to make room for the event
+    - `spill`: store the event on disk, the writer reads it back, when the
+      queue is empty
+
+    Dropped and spilled events are counted, and recorded by the metrics.
+
+    If the spool is set, every event is stored in the write-ahead log,
+    before it's queued. Dropped events are acknowledged right away.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        policy: str = POLICY_BLOCK,
+        block_timeout: float = 0,
+        spill: EventSpill | None = None,
+        spool: EventSpool | None = None,
+    ):
+        super().__init__(maxsize)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.spill = spill
+        self.spool = spool
+
+        if policy == POLICY_SPILL and spill is None:
+            self.spill = EventSpill()
+
+        self.dropped = 0
+        self.spilled = 0
+
+    @classmethod
+    def from_config(cls) -> BoundedEventQueue:
+        return cls(
+            config.get_queue_max_size(),
+            config.get_queue_policy(),
+            config.get_queue_block_timeout(),
+            spool=EventSpool() if config.is_spool_enabled() else None,
+        )
+
+    def offer(self, event: types.Event) -> bool:
+        """Add the event to the queue, applying the policy, if it's full.
+
+        Args:
+            event (types.Event): event to add.
+
+        Returns:
+            bool: whether the event was queued or spilled.
+        """
+        if self.spool is not None:
+            self.spool.append(event)
+
+        if self.policy == POLICY_DROP_OLDEST:
+            self._put_replacing_oldest(event)
+            return True
+
+        try:
+            if self.policy == POLICY_BLOCK:
+                self.put(event, timeout=self.block_timeout)
+            else:
+                self.put_nowait(event)
+        except queue.Full:
+            pass
+        else:
+            return True
+
+        if self.policy == POLICY_SPILL and self.spill is not None:
+            self.spill.append(event)
+
+            with self.mutex:
+                self.spilled += 1
+
+            utils.get_metrics().inc(metrics.base.EVENTS_SPILLED)
+
+            return True
+
+        self._drop(event)
+
+        return False
+
+    def stats(self) -> dict[str, int]:
+        """Get the size of the queue and the counters of the policy."""
+        return {
+            "size": self.qsize(),
+            "max_size": self.maxsize,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "spill_size": len(self.spill) if self.spill is not None else 0,
+        }
+
+    def get_oldest_event(self) -> types.Event | None:
+        """Get the oldest queued event."""
+        with self.mutex:
+            for item in self.queue:  # type: ignore
+                if isinstance(item, types.Event):
+                    return item
+
+        return None
+
+    def _put_replacing_oldest(self, event: types.Event):
+        dropped: types.Event | None = None
+
+        with self.mutex:
+            if 0 < self.maxsize <= self._qsize():
+                # flush requests are never dropped
+                for i, item in enumerate(self.queue):  # type: ignore
+                    if isinstance(item, types.Event):
+                        dropped = item
+                        del self.queue[i]  # type: ignore
+                        break
+
+            self._put(event)
+
+            # the dropped event is replaced, so the number of tasks is the same
+            if dropped is None:
+                self.unfinished_tasks += 1
+
+            self.not_empty.notify()
+
+        if dropped is not None:
+            self._drop(dropped)
+
+    def _drop(self, event: types.Event):
+        with self.mutex:
+            self.dropped += 1
+
+        utils.get_metrics().inc(metrics.base.EVENTS_DROPPED)
+
+        if self.spool is not None:
+            self.spool.ack([event])
+
+        log.warning("Event queue is full, dropping the event %s", event.id)
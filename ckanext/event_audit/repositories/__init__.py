@@ -2,9 +2,11 @@ from .base import AbstractRepository, RemoveAll, RemoveFiltered, RemoveSingle
 from .cloudwatch import CloudWatchRepository
 from .postgres import PostgresRepository
 from .redis import RedisRepository
+from .redis_stream import RedisStreamRepository
 
 __all__ = [
     "RedisRepository",
+    "RedisStreamRepository",
     "PostgresRepository",
     "CloudWatchRepository",
     "AbstractRepository",
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import heapq
 from abc import ABC, abstractmethod
-from typing import Any, Iterable
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from itertools import count, islice
+from typing import Any, Iterable, Iterator, TypeVar
 
-from ckanext.event_audit import plugin, types
+from ckanext.event_audit import config, lifecycle, plugin, types
+
+T = TypeVar("T")
 
 
 class AbstractRepository(ABC):
     _connection = None
 
+    # whether `write_events` is safe to call from multiple threads at once
+    concurrent_writes = False
+
     def __new__(cls, *args: Any, **kwargs: Any):
         """Singleton pattern implementation."""
         if not hasattr(cls, "_instance"):
@@ -76,9 +85,146 @@ class AbstractRepository(ABC):
     def filter_events(self, filters: types.Filters) -> list[types.Event]:
         """Filters events based on provided filter criteria.
 
+        Events are ordered by `(timestamp, id)` in the `filters.order`
+        direction. If `filters.limit` is set, at most `limit` events after
+        the `filters.cursor` position are returned.
+
+        Args:
+            filters (types.Filters): filters to apply.
+        """
+
+    def iter_events(self, filters: types.Filters) -> Iterator[types.Event]:
+        """Iterate over the filtered events without loading all of them at once.
+
+        The default implementation walks through the pages of
+        `ckanext.event_audit.read_chunk_size` events. Repositories should
+        override it if they can stream the events natively.
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            Iterator[types.Event]: filtered events.
+        """
+        page_size = config.get_read_chunk_size()
+        remaining = filters.limit
+
+        while True:
+            limit = min(page_size, remaining) if remaining else page_size
+            page = self.paginate_events(filters.model_copy(update={"limit": limit}))
+
+            yield from page.events
+
+            if remaining:
+                remaining -= len(page.events)
+
+                if remaining <= 0:
+                    return
+
+            if not page.next_cursor:
+                return
+
+            filters = filters.model_copy(update={"cursor": page.next_cursor})
+
+    def paginate_events(self, filters: types.Filters) -> types.EventsPage:
+        """Return a page of filtered events and the cursor of the next page.
+
+        Pass the `next_cursor` as `filters.cursor` to fetch the next page.
+
+        Example:
+            ```python
+            filters = types.Filters(limit=1000)
+
+            while True:
+                page = repo.paginate_events(filters)
+                process(page.events)
+
+                if not page.next_cursor:
+                    break
+
+                filters = filters.model_copy(update={"cursor": page.next_cursor})
+            ```
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            types.EventsPage: page of events.
+        """
+        if not filters.limit:
+            return types.EventsPage(events=self.filter_events(filters))
+
+        # fetch one extra event to know if there's a next page
+        events = self.filter_events(
+            filters.model_copy(update={"limit": filters.limit + 1})
+        )
+
+        if len(events) <= filters.limit:
+            return types.EventsPage(events=events)
+
+        events = events[: filters.limit]
+
+        return types.EventsPage(
+            events=events,
+            next_cursor=types.Cursor.from_event(events[-1]).encode(),
+        )
+
+    def count_events(self, filters: types.Filters) -> int:
+        """Count the events that match the filters.
+
+        The pagination options of the filters are ignored. The default
+        implementation counts the events while iterating over them, override
+        it if the repository can count the events natively.
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            int: number of events.
+        """
+        return sum(1 for _ in self.iter_events(_without_pagination(filters)))
+
+    def aggregate(
+        self,
+        filters: types.Filters,
+        group_by: list[str] | None = None,
+        bucket: str | None = None,
+    ) -> list[types.EventsAggregate]:
+        """Count the events that match the filters by groups and time buckets.
+
+        Example:
+            ```python
+            # events per action per day
+            repo.aggregate(types.Filters(category="api"), ["action"], "day")
+            ```
+
+        The pagination options of the filters are ignored. The default
+        implementation reduces the events while iterating over them, override
+        it if the repository can aggregate the events natively.
+
         Args:
             filters (types.Filters): filters to apply.
+            group_by (list[str] | None, optional): event fields to group by.
+            bucket (str | None, optional): `hour` or `day` to additionally
+                group events by the truncated timestamp.
+
+        Returns:
+            list[types.EventsAggregate]: counts, ordered by the bucket and the
+            group values.
         """
+        group_by = validate_aggregation(group_by, bucket)
+        counter: Counter[tuple[datetime | None, tuple[Any, ...]]] = Counter()
+
+        for event in self.iter_events(_without_pagination(filters)):
+            timestamp = types.Cursor.from_event(event).timestamp
+            counter[
+                (
+                    truncate_timestamp(timestamp, bucket) if bucket else None,
+                    tuple(getattr(event, field) for field in group_by),
+                )
+            ] += 1
+
+        return build_aggregates(counter, group_by)
 
     def remove_event(self, event_id: Any) -> types.Result:
         """Removes a single event from the repository.
@@ -113,13 +259,20 @@ class AbstractRepository(ABC):
     def enqueue_event(self, event: types.Event) -> types.Result:
         """Enqueue an event to be written to the repository.
 
+        Writers of the current process are started, unless they are running.
+        If the queue is full, the event is handled according to the queue
+        policy, see `BoundedEventQueue`.
+
         Args:
             event (types.Event): event to write.
 
         Returns:
             types.Result: result of the operation.
         """
-        plugin.EventAuditPlugin.event_queue.put(event)  # type: ignore
+        lifecycle.ensure_writer()
+
+        if not plugin.EventAuditPlugin.event_queue.offer(event):
+            return types.Result(status=False, message="Event queue is full")
 
         return types.Result(status=True, message="Event has been added to the queue")
 
@@ -154,3 +307,232 @@ class RemoveFiltered:
     If the repository supports remove a filtered set of events, it should inherit from
     this class.
     """
+
+
+def iter_chunks(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Split an iterable into lists of at most `size` items.
+
+    Args:
+        items (Iterable[T]): items to split.
+        size (int): maximum number of items in a chunk.
+
+    Returns:
+        Iterator[list[T]]: chunks of items.
+    """
+    iterator = iter(items)
+
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def match_event(event: types.Event, filters: types.Filters) -> bool:
+    """Check if the event matches the filters, except the pagination options.
+
+    Used by repositories that can't filter events natively.
+
+    Args:
+        event (types.Event): event to check.
+        filters (types.Filters): filters to apply.
+
+    Returns:
+        bool: whether the event matches the filters.
+    """
+    for field, value in filters.model_dump(
+        exclude={"time_from", "time_to", *types.PAGINATION_FIELDS}
+    ).items():
+        if value and getattr(event, field) != value:
+            return False
+
+    event_time = types.Cursor.from_event(event).timestamp
+
+    if filters.time_from and event_time < filters.time_from:
+        return False
+
+    return not (filters.time_to and event_time > filters.time_to)
+
+
+def get_time_range(
+    filters: types.Filters,
+) -> tuple[datetime | None, datetime | None]:
+    """Narrow the time range of the filters down to the unread events.
+
+    Args:
+        filters (types.Filters): filters with pagination options.
+
+    Returns:
+        tuple[datetime | None, datetime | None]: start and end of the range.
+    """
+    time_from = filters.time_from
+    time_to = filters.time_to
+    cursor = filters.get_cursor()
+
+    if not cursor:
+        return time_from, time_to
+
+    if filters.order == "desc":
+        if not time_to or _as_utc(time_to) > cursor.timestamp:
+            time_to = cursor.timestamp
+    elif not time_from or _as_utc(time_from) < cursor.timestamp:
+        time_from = cursor.timestamp
+
+    return time_from, time_to
+
+
+def iter_ordered(
+    entries: Iterable[tuple[datetime, types.Event]],
+    filters: types.Filters,
+    lag: timedelta = timedelta(0),
+) -> Iterator[types.Event]:
+    """Sort almost ordered events by `(timestamp, id)` lazily.
+
+    Used by repositories that read events in the order of their position in
+    the storage, e.g. the time of the write, instead of their timestamp.
+    Every entry is a pair of the position and the event. Events are buffered
+    until no later entry can precede them: in the ascending order, every
+    later entry must have the timestamp after its position minus `lag`, in
+    the descending order - before its position plus `lag`.
+
+    The cursor and the limit of the filters are applied, so the reading
+    stops as soon as the page is complete. Only the events, that may get into
+    the page, are kept in the buffer, so it doesn't grow with the lag.
+
+    Args:
+        entries (Iterable[tuple[datetime, types.Event]]): positions and
+            filtered events, ordered by the position in the requested order.
+        filters (types.Filters): filters with pagination options.
+        lag (timedelta, optional): maximum distance between the position
+            of the entry and the timestamp of its event.
+
+    Returns:
+        Iterator[types.Event]: a page of events.
+    """
+    descending = filters.order == "desc"
+    cursor = filters.get_cursor()
+    after = cursor.sort_key() if cursor else None
+    heap: list[tuple[Any, int, tuple[datetime, str], types.Event]] = []
+    counter = count()
+    emitted = 0
+
+    def is_ready(position: datetime) -> bool:
+        timestamp = heap[0][2][0]
+
+        if descending:
+            return timestamp > position + lag
+
+        return timestamp < position - lag
+
+    for position, event in entries:
+        key = types.Cursor.from_event(event).sort_key()
+
+        if after and (key >= after if descending else key <= after):
+            continue
+
+        heapq.heappush(
+            heap, (_Descending(key) if descending else key, next(counter), key, event)
+        )
+
+        # events after the rest of the page can't get into it
+        if filters.limit and len(heap) >= 2 * (filters.limit - emitted):
+            heap = heapq.nsmallest(filters.limit - emitted, heap)
+
+        while heap and is_ready(_as_utc(position)):
+            yield heapq.heappop(heap)[3]
+            emitted += 1
+
+            if emitted == filters.limit:
+                return
+
+    while heap:
+        yield heapq.heappop(heap)[3]
+        emitted += 1
+
+        if emitted == filters.limit:
+            return
+
+
+class _Descending:
+    """Sort key wrapper, that reverses the order."""
+
+    def __init__(self, key: Any):
+        self.key = key
+
+    def __lt__(self, other: _Descending) -> bool:
+        return self.key > other.key
+
+
+def _as_utc(moment: datetime) -> datetime:
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def validate_aggregation(group_by: list[str] | None, bucket: str | None) -> list[str]:
+    """Check the aggregation options.
+
+    Args:
+        group_by (list[str] | None): event fields to group by.
+        bucket (str | None): time bucket.
+
+    Returns:
+        list[str]: fields to group by.
+
+    Raises:
+        ValueError: if the field or the bucket is not supported.
+    """
+    group_by = group_by or []
+
+    for field in group_by:
+        if field not in types.AGGREGATE_FIELDS:
+            raise ValueError(f"Unsupported group by field: {field}")
+
+    if bucket and bucket not in types.AGGREGATE_BUCKETS:
+        raise ValueError(f"Unsupported bucket: {bucket}")
+
+    return group_by
+
+
+def build_aggregates(
+    counter: Counter[tuple[datetime | None, tuple[Any, ...]]], group_by: list[str]
+) -> list[types.EventsAggregate]:
+    """Build the aggregates from the counts by the bucket and the group values.
+
+    Args:
+        counter (Counter): counts by the bucket start and the group values.
+        group_by (list[str]): fields of the group values.
+
+    Returns:
+        list[types.EventsAggregate]: non-empty counts, ordered by the bucket
+        and the group values.
+    """
+    return [
+        types.EventsAggregate(
+            group=dict(zip(group_by, values)), count=count, bucket=bucket_start
+        )
+        for (bucket_start, values), count in sorted(
+            counter.items(), key=lambda item: _aggregate_sort_key(item[0])
+        )
+        if count > 0
+    ]
+
+
+def truncate_timestamp(moment: datetime, bucket: str) -> datetime:
+    """Truncate the timestamp to the start of the `hour` or `day` bucket."""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+
+    if bucket == "day":
+        moment = moment.replace(hour=0)
+
+    return moment
+
+
+def _aggregate_sort_key(
+    key: tuple[datetime | None, tuple[Any, ...]],
+) -> tuple[Any, ...]:
+    bucket_start, values = key
+
+    return (
+        bucket_start.timestamp() if bucket_start else 0,
+        tuple(value or "" for value in values),
+    )
+
+
+def _without_pagination(filters: types.Filters) -> types.Filters:
+    return filters.model_copy(update={"limit": None, "cursor": None})
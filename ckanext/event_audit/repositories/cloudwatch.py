@@ -1,13 +1,38 @@
 from __future__ import annotations
 
+import base64
 import json
 import logging
+import math
+import os
+import socket
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import suppress
-from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Any, Optional, TypedDict
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    TypedDict,
+    TypeVar,
+)
 
 import boto3
-from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
+from botocore.exceptions import (
+    ClientError,
+    HTTPClientError,
+    NoCredentialsError,
+    PartialCredentialsError,
+)
 
 if TYPE_CHECKING:
     from mypy_boto3_logs.client import CloudWatchLogsClient
@@ -16,13 +41,70 @@ else:
     CloudWatchLogsClient = object
 
 
-from ckanext.event_audit import config, types
-from ckanext.event_audit.repositories.base import AbstractRepository, RemoveAll
+from ckanext.event_audit import config, resilience, types, utils
+from ckanext.event_audit.blob_stores import AbstractBlobStore
+from ckanext.event_audit.repositories.base import (
+    AbstractRepository,
+    RemoveAll,
+    get_time_range,
+    iter_ordered,
+    match_event,
+)
 
 log = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 LOG_EVENT_SIZE_LIMIT = 262_144  # 256KB
 
+OVERSIZE_COMPRESS = "compress"
+OVERSIZE_SPLIT = "split"
+OVERSIZE_OFFLOAD = "offload"
+
+# the space reserved for the fields of a continuation record
+PART_ENVELOPE_SIZE = 1024  # bytes
+
+# limits of a single put_log_events request
+LOG_EVENT_OVERHEAD = 26  # bytes, added to the size of every message
+BATCH_SIZE_LIMIT = 1_048_576  # 1MB
+BATCH_COUNT_LIMIT = 10_000
+BATCH_SPAN_LIMIT = int(timedelta(hours=24).total_seconds() * 1000)  # milliseconds
+
+# errors, that are worth to retry
+TRANSIENT_ERROR_CODES = frozenset(
+    {
+        "ThrottlingException",
+        "ServiceUnavailableException",
+        "InternalFailure",
+        "RequestLimitExceeded",
+        "LimitExceededException",
+    }
+)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# log event timestamps are truncated to milliseconds
+LOG_EVENT_TIMESTAMP_PRECISION = timedelta(milliseconds=1)
+
+QUERY_ENGINE_INSIGHTS = "insights"
+
+INSIGHTS_RESULTS_LIMIT = 10_000
+# the query range is rounded to seconds, so shorter ranges aren't split
+INSIGHTS_MIN_SPLIT_RANGE = 1000  # milliseconds
+INSIGHTS_POLL_DELAY = 0.25  # seconds
+INSIGHTS_MAX_POLL_DELAY = 5  # seconds
+INSIGHTS_PENDING_STATUSES = ("Scheduled", "Running")
+INSIGHTS_FIELDS = (
+    "id",
+    "category",
+    "action",
+    "actor",
+    "action_object",
+    "action_object_id",
+    "target_type",
+    "target_id",
+)
+
 
 class CloudWatchEvent(TypedDict):
     timestamp: int
@@ -30,6 +112,8 @@ class CloudWatchEvent(TypedDict):
 
 
 class CloudWatchRepository(AbstractRepository, RemoveAll):
+    concurrent_writes = True
+
     def __init__(
         self,
         credentials: types.AWSCredentials | None = None,
@@ -63,6 +147,19 @@ class CloudWatchRepository(AbstractRepository, RemoveAll):
 
         self.log_group = log_group or config.get_cloudwatch_log_group()
         self.log_stream = log_stream or config.get_cloudwatch_log_stream()
+        self.log_stream_template = config.get_cloudwatch_log_stream_template()
+
+        # log streams that are known to exist
+        self._log_streams: set[str] = set()
+        self._blob_store: AbstractBlobStore | None = None
+
+        self._rate_limiter = resilience.TokenBucket(
+            config.get_cloudwatch_max_requests_per_second()
+        )
+        self._breaker = resilience.CircuitBreaker(
+            config.get_cloudwatch_breaker_threshold(),
+            config.get_cloudwatch_breaker_reset_timeout(),
+        )
 
         try:
             self._create_log_group_if_not_exists()
@@ -90,19 +187,117 @@ class CloudWatchRepository(AbstractRepository, RemoveAll):
         Returns:
             types.Result: result of the operation.
         """
-        try:
-            self.client.put_log_events(
-                logGroupName=self.log_group,
-                logStreamName=self._create_log_stream_if_not_exists(self.log_stream),
-                logEvents=[
-                    {
-                        "timestamp": int(datetime.now(timezone.utc).timestamp() * 1000),
-                        "message": self._get_event_dump(event),
-                    }
-                ],
-            )
+        return self.write_events([event])
+
+    def write_events(self, events: Iterable[types.Event]) -> types.Result:
+        """Write multiple events with as few `put_log_events` calls as possible.
+
+        Log events are sorted by the timestamp and packed into batches within
+        the service limits: 10,000 events, 1MB including the 26 bytes of
+        overhead per event, and the 24 hours span.
+
+        CloudWatch calls are not retried here, failed writes are retried by
+        the caller. While the circuit breaker is open, CloudWatch isn't called
+        and the result has the `retry_after` time, when the breaker becomes
+        half-open.
+
+        If a batch fails and may be retried, the rest of batches are not sent,
+        and the result has the `unwritten` events, so the accepted batches are
+        not sent again.
+
+        Args:
+            events (Iterable[types.Event]): events to write.
+
+        Returns:
+            types.Result: result of the operation.
+        """
+        log_events = [
+            (log_event, size, event)
+            for event in events
+            for log_event, size in self._build_log_events(event)
+        ]
 
+        if not log_events:
             return types.Result(status=True)
+
+        if not self._breaker.allow_request():
+            return types.Result(
+                status=False,
+                message=(
+                    f"CloudWatch is unavailable, {len(log_events)} event(s) "
+                    "are not written"
+                ),
+                retry_after=self._breaker.get_wait_time(),
+            )
+
+        log_events.sort(key=lambda item: item[0]["timestamp"])
+
+        try:
+            log_stream = self._create_log_stream_if_not_exists(self._get_log_stream())
+        except (ClientError, HTTPClientError) as e:
+            log.exception("Failed to create the CloudWatch log stream")
+
+            if _is_transient_error(e):
+                self._breaker.record_failure()
+
+            return types.Result(status=False, message=str(e))
+
+        errors: list[str] = []
+        # the number of sent log events, written or rejected
+        sent = 0
+
+        for batch in _iter_batches((item[0], item[1]) for item in log_events):
+            # the breaker is opened by the failure of the previous batch
+            if self._breaker.state == resilience.CircuitBreaker.OPEN:
+                result = types.Result(
+                    status=False,
+                    message=(
+                        f"CloudWatch is unavailable, {len(log_events) - sent} "
+                        "event(s) are not written"
+                    ),
+                    retry_after=self._breaker.get_wait_time(),
+                )
+            else:
+                result = self._put_log_events(log_stream, batch)
+
+            if not result.status and result.retry:
+                errors.append(result.message or "")
+                result.message = "; ".join(errors)
+                result.unwritten = _get_unwritten(log_events[sent:])
+                return result
+
+            if not result.status:
+                errors.append(result.message or "")
+
+            sent += len(batch)
+
+        if errors:
+            return types.Result(status=False, message="; ".join(errors), retry=False)
+
+        return types.Result(
+            status=True, message=f"{sent} event(s) written successfully"
+        )
+
+    def _put_log_events(
+        self, log_stream: str, log_events: list[CloudWatchEvent]
+    ) -> types.Result:
+        """Send a single batch of log events.
+
+        If the log stream doesn't exist anymore, it's re-created and the
+        batch is sent once again.
+
+        If the batch is not sent because of the transient error, it's
+        counted by the circuit breaker.
+
+        Args:
+            log_stream (str): log stream name.
+            log_events (list[CloudWatchEvent]): sorted log events.
+
+        Returns:
+            types.Result: result of the operation.
+        """
+        try:
+            response = self._send_to_log_stream(log_stream, log_events)
         except (
             self.client.exceptions.InvalidParameterException,
             self.client.exceptions.InvalidSequenceTokenException,
@@ -112,54 +307,231 @@ class CloudWatchRepository(AbstractRepository, RemoveAll):
             self.client.exceptions.UnrecognizedClientException,
             self.client.exceptions.ClientError,
             ClientError,
+            HTTPClientError,
         ) as e:
-            log.exception("Failed to write event to CloudWatch")
-            return types.Result(status=False, message=str(e))
+            log.exception("Failed to write events to CloudWatch")
 
-    def _get_event_dump(self, event: types.Event) -> str:
-        """Get the event dump.
+            retry = _is_transient_error(e)
 
-        The event dump is the event serialized to a JSON string.
-        If the event is too large to be written to CloudWatch,
-        the result and payload are removed from the event, as it's the only
-        part of the event, that might be too large to be written to CloudWatch.
+            if retry:
+                self._breaker.record_failure()
+
+            return types.Result(status=False, message=str(e), retry=retry)
+
+        self._breaker.record_success()
+
+        if info := response.get("rejectedLogEventsInfo"):
+            rejected = _count_rejected(info, len(log_events))
+            log.error("CloudWatch rejected %s log event(s): %s", rejected, info)
+
+            # the rest of the batch is accepted, so it must not be re-sent
+            return types.Result(
+                status=False,
+                message=f"{rejected} log event(s) rejected by CloudWatch: {info}",
+                retry=False,
+            )
+
+        return types.Result(status=True)
+
+    def _send_to_log_stream(
+        self, log_stream: str, log_events: list[CloudWatchEvent]
+    ) -> dict[str, Any]:
+        """Send log events, re-creating the missing log stream."""
+        try:
+            return self._send_log_events(log_stream, log_events)
+        except self.client.exceptions.ResourceNotFoundException:
+            self._log_streams.discard(log_stream)
+            self._create_log_stream_if_not_exists(log_stream)
+            return self._send_log_events(log_stream, log_events)
+
+    def _send_log_events(
+        self, log_stream: str, log_events: list[CloudWatchEvent]
+    ) -> dict[str, Any]:
+        self._rate_limiter.acquire()
+
+        return self.client.put_log_events(  # type: ignore
+            logGroupName=self.log_group,
+            logStreamName=log_stream,
+            logEvents=log_events,  # type: ignore
+        )
+
+    def _build_log_events(
+        self, event: types.Event
+    ) -> list[tuple[CloudWatchEvent, int]]:
+        """Build the log events of the event and their sizes.
+
+        Every event is a single log event, unless it's split into the main
+        record and continuation records. All of them share the timestamp.
+        """
+        timestamp = _to_milliseconds(types.Cursor.from_event(event).timestamp)
+
+        return [
+            ({"timestamp": timestamp, "message": message}, size)
+            for message, size in self._dump_messages(event)
+        ]
+
+    def _dump_messages(self, event: types.Event) -> list[tuple[str, int]]:
+        """Serialize the event into messages and get their sizes.
+
+        Large events are handled according to the oversize strategy:
+
+        - `compress`: the result and payload are compressed with zlib and
+          stored in the `_compressed` field, encoded with base64
+        - `split`: the compressed data is split into continuation records,
+          that have the event ID, the number of the `_part` and the `_data`.
+          The main record keeps the number of `_parts`
+        - `offload`: the result and payload are stored in the blob store,
+          and the main record keeps the `_blob` key
+
+        If the event is still too large, or the strategy is `drop`, the
+        result and payload are removed from the event.
+        """
+        dump = event.model_dump_json()
+        size = _get_message_size(dump)
+
+        if size <= LOG_EVENT_SIZE_LIMIT:
+            return [(dump, size)]
+
+        strategy = config.get_cloudwatch_oversize_strategy()
+        record = event.model_dump(mode="json", exclude={"result", "payload"})
+        data = event.model_dump_json(include={"result", "payload"}).encode()
+        messages: list[str] = []
+
+        if strategy == OVERSIZE_COMPRESS:
+            messages = [json.dumps({**record, "_compressed": _compress(data)})]
+        elif strategy == OVERSIZE_SPLIT:
+            messages = _split_record(record, _compress(data))
+        elif strategy == OVERSIZE_OFFLOAD:
+            self.blob_store.put(str(event.id), data)
+            messages = [json.dumps({**record, "_blob": str(event.id)})]
+
+        result = [(message, _get_message_size(message)) for message in messages]
+
+        if result and all(size <= LOG_EVENT_SIZE_LIMIT for _, size in result):
+            return result
+
+        log.error(
+            (
+                "Event %s, %s, %s is too large for CloudWatch: "
+                "%s bytes. Removing the result and payload from the event"
+            ),
+            event.id,
+            event.category,
+            event.action,
+            size,
+        )
+        dump = event.model_dump_json(exclude={"result", "payload"})
+
+        return [(dump, _get_message_size(dump))]
+
+    @property
+    def blob_store(self) -> AbstractBlobStore:
+        """The blob store for the offloaded data of large events."""
+        if self._blob_store is None:
+            self._blob_store = utils.get_blob_store()
+
+        return self._blob_store
+
+    def _parse_message(self, message: str, timestamp: int) -> types.Event | None:
+        """Parse the log event message, restoring the data of large events.
 
         Args:
-            event (types.Event): event to get the dump.
+            message (str): log event message.
+            timestamp (int): log event timestamp, in milliseconds.
 
         Returns:
-            str: event dump.
+            types.Event | None: event, or None for continuation records.
         """
-        result_size = (
-            len(json.dumps(event.result).encode("utf-8")) if event.result else 0
-        )
-        payload_size = (
-            len(json.dumps(event.payload).encode("utf-8")) if event.payload else 0
-        )
+        record = json.loads(message)
 
-        if (result_size + payload_size) > LOG_EVENT_SIZE_LIMIT:
-            log.error(
-                (
-                    "Event %s, %s, %s result/payload too large for CloudWatch: "
-                    "%s bytes. Removing the result and payload from the event"
-                ),
-                event.id,
-                event.category,
-                event.action,
-                result_size + payload_size,
+        if "_part" in record:
+            return None
+
+        compressed = record.pop("_compressed", None)
+        parts = record.pop("_parts", None)
+        blob_key = record.pop("_blob", None)
+
+        if parts:
+            compressed = self._get_split_data(record["id"], timestamp, parts)
+
+        if compressed:
+            record.update(json.loads(zlib.decompress(base64.b64decode(compressed))))
+
+        if blob_key:
+            if data := self.blob_store.get(blob_key):
+                record.update(json.loads(data))
+            else:
+                log.warning(
+                    "Blob %s of the event %s is missing", blob_key, record["id"]
+                )
+
+        return types.Event.model_validate(record)
+
+    def _get_split_data(self, event_id: str, timestamp: int, parts: int) -> str:
+        """Join the data of the continuation records of the event.
+
+        Continuation records have the same timestamp as the main record, so
+        only a single millisecond is scanned.
+        """
+        records: dict[int, str] = {}
+        kwargs = {
+            "logGroupName": self.log_group,
+            "startTime": timestamp,
+            "endTime": timestamp,
+            "filterPattern": f'{{ ($.id = "{event_id}") && ($._part > 0) }}',
+        }
+
+        for log_event in self._iter_matching_events(kwargs):
+            record = json.loads(log_event.get("message", "{}"))
+            records[record["_part"]] = record["_data"]
+
+        if len(records) != parts:
+            log.warning(
+                "Event %s has %s of %s continuation records",
+                event_id,
+                len(records),
+                parts,
             )
-            return event.model_dump_json(exclude={"result", "payload"})
+            return ""
+
+        return "".join(records[part] for part in sorted(records))
+
+    def _get_log_stream(self) -> str:
+        """Get the name of the log stream for the current write.
 
-        return event.model_dump_json()
+        If the log stream template is configured, every process and thread
+        writes into its own stream, and the `{date}` placeholder rolls
+        streams over daily. Events are read from the whole log group, so
+        the sharding doesn't affect reads.
+        """
+        if not self.log_stream_template:
+            return self.log_stream
+
+        return self.log_stream_template.format(
+            stream=self.log_stream,
+            hostname=socket.gethostname(),
+            pid=os.getpid(),
+            thread=threading.get_ident(),
+            date=datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+        )
 
     def _create_log_stream_if_not_exists(self, log_stream: str) -> str:
-        """Creates the log stream if it doesn't already exist."""
+        """Creates the log stream if it doesn't already exist.
+
+        Streams, that were created or found before, are remembered, so the
+        stream is created only on the first write.
+        """
+        if log_stream in self._log_streams:
+            return log_stream
+
         with suppress(self.client.exceptions.ResourceAlreadyExistsException):
             self.client.create_log_stream(
                 logGroupName=self.log_group,
                 logStreamName=log_stream,
             )
 
+        self._log_streams.add(log_stream)
+
         return log_stream
 
     def get_event(self, event_id: str) -> Optional[types.Event]:
@@ -190,24 +562,122 @@ class CloudWatchRepository(AbstractRepository, RemoveAll):
         Args:
             filters (types.Filters): filters to apply.
         """
+        return list(self.iter_events(filters))
+
+    def iter_events(self, filters: types.Filters) -> Iterator[types.Event]:
+        """Iterate over the filtered events, consuming the result pages lazily.
+
+        Events are ordered by `(timestamp, id)`. The logs are read from the
+        position of the cursor, and the reading stops as soon as the limit
+        is reached. The descending order is read slice by slice, starting
+        from the end of the time range.
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            Iterator[types.Event]: filtered events.
+        """
+        yield from iter_ordered(
+            self._iter_entries(filters), filters, LOG_EVENT_TIMESTAMP_PRECISION
+        )
+
+    def _iter_entries(
+        self, filters: types.Filters
+    ) -> Iterator[tuple[datetime, types.Event]]:
+        """Read the log events and their timestamps in the requested order."""
+        time_from, time_to = get_time_range(filters)
+
+        if config.get_cloudwatch_query_engine() == QUERY_ENGINE_INSIGHTS:
+            entries = self._iter_insights_events(filters, time_from, time_to)
+        else:
+            entries = self._iter_filtered_events(filters, time_from, time_to)
+
+        for timestamp, event in entries:
+            yield EPOCH + timedelta(milliseconds=timestamp), event
+
+    def _iter_filtered_events(
+        self,
+        filters: types.Filters,
+        time_from: datetime | None,
+        time_to: datetime | None,
+    ) -> Iterator[tuple[int, types.Event]]:
+        """Read events with `filter_log_events`."""
         kwargs: dict[str, str | int | datetime | None] = {
             "logGroupName": self.log_group,
-            "startTime": (
-                int(filters.time_from.timestamp() * 1000) if filters.time_from else None
-            ),
-            "endTime": (
-                int(filters.time_to.timestamp() * 1000) if filters.time_to else None
-            ),
+            "startTime": _to_milliseconds(time_from) if time_from else None,
+            "endTime": _to_milliseconds(time_to) if time_to else None,
             "filterPattern": self._build_filter_pattern(filters),
         }
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
 
-        return [
-            types.Event.model_validate(json.loads(e["message"]))
-            for e in self._get_all_matching_events(
-                {k: v for k, v in kwargs.items() if v is not None}
+        if filters.order == "desc" or (
+            config.is_cloudwatch_parallel_scan_enabled() and time_from
+        ):
+            log_events = self._iter_sliced_events(
+                kwargs, filters.order, time_from, time_to
             )
-            if "message" in e
-        ]
+        else:
+            log_events = self._iter_matching_events(kwargs)
+
+        for e in log_events:
+            timestamp = e.get("timestamp", 0)
+
+            if "message" in e and (
+                event := self._parse_message(e["message"], timestamp)
+            ):
+                yield timestamp, event
+
+    def _iter_sliced_events(
+        self,
+        kwargs: dict[str, Any],
+        order: str,
+        time_from: datetime | None,
+        time_to: datetime | None,
+    ) -> Iterator[FilteredLogEventTypeDef]:
+        """Scan time slices and yield their events in order.
+
+        If the parallel scan is enabled, at most `query_concurrency` slices
+        are fetched at the same time. Each slice is scanned by its own
+        paginator and sorted by the timestamp.
+        """
+        time_range = self._get_time_range(time_from, time_to)
+
+        if not time_range:
+            return
+
+        descending = order == "desc"
+        concurrency = (
+            config.get_cloudwatch_query_concurrency()
+            if config.is_cloudwatch_parallel_scan_enabled()
+            else 1
+        )
+
+        def scan(start: int, end: int) -> list[FilteredLogEventTypeDef]:
+            log_events = self._scan_slice(kwargs, start, end)
+            return log_events[::-1] if descending else log_events
+
+        yield from _iter_slices(scan, _get_slices(*time_range, descending), concurrency)
+
+    def _scan_slice(
+        self, kwargs: dict[str, Any], start: int, end: int
+    ) -> list[FilteredLogEventTypeDef]:
+        """Get the events of the time slice, sorted by the timestamp.
+
+        Args:
+            kwargs (dict[str, Any]): `filter_log_events` arguments.
+            start (int): start of the slice, in milliseconds.
+            end (int): end of the slice, exclusive, in milliseconds.
+        """
+        # the end time of filter_log_events is inclusive
+        log_events = list(
+            self._iter_matching_events(
+                {**kwargs, "startTime": start, "endTime": end - 1}
+            )
+        )
+        log_events.sort(key=lambda e: e.get("timestamp", 0))
+
+        return log_events
 
     def _build_filter_pattern(self, filters: types.Filters) -> Optional[str]:
         """Builds the CloudWatch filter pattern for querying logs."""
@@ -231,18 +701,162 @@ class CloudWatchRepository(AbstractRepository, RemoveAll):
 
         return None
 
-    def _get_all_matching_events(
+    def _iter_matching_events(
         self, kwargs: dict[str, Any]
-    ) -> list[FilteredLogEventTypeDef]:
-        """Retrieve all matching events from CloudWatch using pagination."""
-        events: list[FilteredLogEventTypeDef] = []
-
+    ) -> Iterator[FilteredLogEventTypeDef]:
+        """Iterate over the matching events, fetching the pages lazily."""
         paginator = self.client.get_paginator("filter_log_events")
 
         for page in paginator.paginate(**kwargs):
-            events.extend(page.get("events", []))
+            yield from page.get("events", [])
+
+    def _iter_insights_events(
+        self,
+        filters: types.Filters,
+        time_from: datetime | None,
+        time_to: datetime | None,
+    ) -> Iterator[tuple[int, types.Event]]:
+        """Read events with CloudWatch Logs Insights queries.
+
+        The time range is split into slices, that are queried in parallel,
+        and yielded one by one in the requested order.
+        """
+        time_range = self._get_time_range(time_from, time_to)
+
+        if not time_range:
+            return
+
+        descending = filters.order == "desc"
+        query = self._build_insights_query(filters)
+
+        def run(start: int, end: int) -> list[tuple[int, types.Event]]:
+            result = self._run_insights_query(query, start, end)
+            return result[::-1] if descending else result
+
+        for timestamp, event in _iter_slices(
+            run,
+            _get_slices(*time_range, descending),
+            config.get_cloudwatch_query_concurrency(),
+        ):
+            if match_event(event, filters):
+                yield timestamp, event
+
+    def _build_insights_query(self, filters: types.Filters) -> str:
+        """Compile the filters into the Logs Insights query."""
+        conditions = [
+            f'{field} = "{_escape_insights_value(value)}"'
+            for field in INSIGHTS_FIELDS
+            if (value := getattr(filters, field))
+        ]
+        query = ["fields @timestamp, @message"]
+
+        if conditions:
+            query.append(f"filter {' and '.join(conditions)}")
+
+        query.append("sort @timestamp asc")
+        query.append(f"limit {INSIGHTS_RESULTS_LIMIT}")
+
+        return " | ".join(query)
+
+    def _run_insights_query(
+        self, query: str, start: int, end: int
+    ) -> list[tuple[int, types.Event]]:
+        """Get the events of the time range, sorted by the timestamp.
+
+        If the query hits the limit of results, the time range is split in
+        halves, that are queried separately.
+
+        Args:
+            query (str): Logs Insights query.
+            start (int): start of the range, in milliseconds.
+            end (int): end of the range, exclusive, in milliseconds.
+
+        Returns:
+            list[tuple[int, types.Event]]: timestamps and events.
+        """
+        rows = self._get_insights_results(query, start, end)
+
+        if (
+            len(rows) >= INSIGHTS_RESULTS_LIMIT
+            and end - start > INSIGHTS_MIN_SPLIT_RANGE
+        ):
+            middle = start + (end - start) // 2
+
+            return self._run_insights_query(
+                query, start, middle
+            ) + self._run_insights_query(query, middle, end)
+
+        result: list[tuple[int, types.Event]] = []
+
+        for row in rows:
+            fields = {field["field"]: field["value"] for field in row}
+            timestamp = _parse_insights_timestamp(fields["@timestamp"])
+
+            # the query range is rounded to seconds
+            if start <= timestamp < end and (
+                event := self._parse_message(fields["@message"], timestamp)
+            ):
+                result.append((timestamp, event))
+
+        return result
+
+    def _get_insights_results(
+        self, query: str, start: int, end: int
+    ) -> list[list[dict[str, str]]]:
+        """Start the query and poll its results with exponential backoff."""
+        query_id = self.client.start_query(
+            logGroupName=self.log_group,
+            startTime=start // 1000,
+            endTime=math.ceil(end / 1000),
+            queryString=query,
+            limit=INSIGHTS_RESULTS_LIMIT,
+        )["queryId"]
+
+        delay = INSIGHTS_POLL_DELAY
 
-        return events
+        while True:
+            response = self.client.get_query_results(queryId=query_id)
+            status = response["status"]
+
+            if status == "Complete":
+                return response["results"]  # type: ignore
+
+            if status not in INSIGHTS_PENDING_STATUSES:
+                raise RuntimeError(
+                    f"CloudWatch Logs Insights query {query_id} is {status}"
+                )
+
+            time.sleep(delay)
+            delay = min(delay * 2, INSIGHTS_MAX_POLL_DELAY)
+
+    def _get_time_range(
+        self, time_from: datetime | None, time_to: datetime | None
+    ) -> tuple[int, int] | None:
+        """Get the queried time range in milliseconds, the end is exclusive.
+
+        If the start isn't set, the creation time of the log group is used.
+        """
+        if time_from:
+            start = _to_milliseconds(time_from)
+        else:
+            start = self._get_log_group_creation_time()
+
+            if start is None:
+                return None
+
+        end = _to_milliseconds(time_to or datetime.now(timezone.utc))
+
+        return start, end + 1
+
+    def _get_log_group_creation_time(self) -> int | None:
+        """Get the creation time of the log group in milliseconds."""
+        response = self.client.describe_log_groups(logGroupNamePrefix=self.log_group)
+
+        for log_group in response.get("logGroups", []):
+            if log_group.get("logGroupName") == self.log_group:
+                return log_group.get("creationTime")
+
+        return None
 
     def remove_event(self, event_id: str) -> types.Result:
         """Remove operation is not supported for CloudWatch logs.
@@ -270,6 +884,11 @@ class CloudWatchRepository(AbstractRepository, RemoveAll):
         Returns:
             types.Result: result of the operation.
         """
+        self._log_streams.clear()
+
+        if config.get_cloudwatch_oversize_strategy() == OVERSIZE_OFFLOAD:
+            self.blob_store.remove_all()
+
         try:
             self.client.delete_log_group(logGroupName=self.log_group)
         except self.client.exceptions.ResourceNotFoundException as err:
@@ -295,3 +914,164 @@ class CloudWatchRepository(AbstractRepository, RemoveAll):
             self._connection = True
 
         return self._connection
+
+
+def _is_transient_error(err: Exception) -> bool:
+    """Check if the failed call may succeed, if it's retried later."""
+    if isinstance(err, HTTPClientError):
+        return True
+
+    if not isinstance(err, ClientError):
+        return False
+
+    return (
+        err.response.get("Error", {}).get("Code") in TRANSIENT_ERROR_CODES
+        or err.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        >= HTTPStatus.INTERNAL_SERVER_ERROR
+    )
+
+
+def _count_rejected(info: Any, total: int) -> int:
+    """Count the log events, that are too old, too new or expired.
+
+    The end indexes are exclusive, the start index is inclusive.
+    """
+    too_old = max(
+        info.get("tooOldLogEventEndIndex", 0), info.get("expiredLogEventEndIndex", 0)
+    )
+    too_new = total - info.get("tooNewLogEventStartIndex", total)
+
+    return too_old + too_new
+
+
+def _compress(data: bytes) -> str:
+    return base64.b64encode(zlib.compress(data)).decode()
+
+
+def _split_record(record: dict[str, Any], data: str) -> list[str]:
+    """Split the record into the main record and continuation records."""
+    size = LOG_EVENT_SIZE_LIMIT - LOG_EVENT_OVERHEAD - PART_ENVELOPE_SIZE
+    chunks = [data[i : i + size] for i in range(0, len(data), size)]
+
+    return [json.dumps({**record, "_parts": len(chunks)})] + [
+        json.dumps({"id": record["id"], "_part": part, "_data": chunk})
+        for part, chunk in enumerate(chunks, 1)
+    ]
+
+
+def _get_message_size(message: str) -> int:
+    """Get the size of the log event, as it's counted by CloudWatch."""
+    return len(message.encode("utf-8")) + LOG_EVENT_OVERHEAD
+
+
+def _iter_batches(
+    log_events: Iterable[tuple[CloudWatchEvent, int]],
+) -> Iterator[list[CloudWatchEvent]]:
+    """Split sorted log events into batches within `put_log_events` limits."""
+    batch: list[CloudWatchEvent] = []
+    batch_size = 0
+
+    for log_event, size in log_events:
+        if batch and (
+            len(batch) >= BATCH_COUNT_LIMIT
+            or batch_size + size > BATCH_SIZE_LIMIT
+            or log_event["timestamp"] - batch[0]["timestamp"] >= BATCH_SPAN_LIMIT
+        ):
+            yield batch
+            batch, batch_size = [], 0
+
+        batch.append(log_event)
+        batch_size += size
+
+    if batch:
+        yield batch
+
+
+def _get_unwritten(
+    log_events: list[tuple[CloudWatchEvent, int, types.Event]],
+) -> list[types.Event]:
+    """Get the events of log events, that are not sent, in their order.
+
+    The event, that is split between the sent and unsent batches, is
+    included, its continuation records are merged by the part number.
+    """
+    return list({str(event.id): event for _, _, event in log_events}.values())
+
+
+def _split_time_range(start: int, end: int, size: int) -> list[tuple[int, int]]:
+    """Split the time range into slices of the given size.
+
+    Args:
+        start (int): start of the range.
+        end (int): end of the range, exclusive.
+        size (int): maximum size of a slice.
+
+    Returns:
+        list[tuple[int, int]]: adjacent slices, the end of each is exclusive.
+    """
+    return [
+        (slice_start, min(slice_start + size, end))
+        for slice_start in range(start, end, max(size, 1))
+    ]
+
+
+def _get_slices(start: int, end: int, descending: bool) -> list[tuple[int, int]]:
+    """Split the time range into query slices, in the order of reading."""
+    slices = _split_time_range(
+        start, end, config.get_cloudwatch_query_slice_hours() * 3_600_000
+    )
+
+    return slices[::-1] if descending else slices
+
+
+def _iter_slices(
+    fetch: Callable[[int, int], list[T]],
+    slices: list[tuple[int, int]],
+    concurrency: int,
+) -> Iterator[T]:
+    """Fetch time slices in parallel and yield their items in order.
+
+    At most `concurrency` slices are fetched at the same time, and slices are
+    yielded one by one, as soon as all the previous slices are yielded.
+    """
+    remaining = iter(slices)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending: deque[Future[list[T]]] = deque(
+            executor.submit(fetch, *time_slice)
+            for time_slice in islice(remaining, concurrency)
+        )
+
+        try:
+            while pending:
+                items = pending.popleft().result()
+
+                if time_slice := next(remaining, None):
+                    pending.append(executor.submit(fetch, *time_slice))
+
+                yield from items
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _parse_insights_timestamp(value: str) -> int:
+    """Parse the `@timestamp` field of the Logs Insights results.
+
+    Returns:
+        int: timestamp in milliseconds.
+    """
+    moment = datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f").replace(
+        tzinfo=timezone.utc
+    )
+
+    return _to_milliseconds(moment)
+
+
+def _escape_insights_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _to_milliseconds(moment: datetime) -> int:
+    """Get the exact number of milliseconds since epoch."""
+    return (moment - EPOCH) // timedelta(milliseconds=1)
@@ -1,21 +1,109 @@
 from __future__ import annotations
 
-from typing import Iterable, List
-
+import csv
+import io
+import json
+import logging
+import re
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator, List
+
+import sqlalchemy as sa
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session as SQLAlchemySession
+from sqlalchemy.sql import Select
 
 from ckan.model.meta import create_local_session
 
-from ckanext.event_audit import model, types
+from ckanext.event_audit import config, model, types
 from ckanext.event_audit.repositories.base import (
     AbstractRepository,
     RemoveAll,
     RemoveSingle,
+    iter_chunks,
+    validate_aggregation,
 )
 
+log = logging.getLogger(__name__)
+
+COPY_FORMATS = ("csv", "binary")
+COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_BINARY_TRAILER = struct.pack("!h", -1)
+COPY_BINARY_NULL = struct.pack("!i", -1)
+PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+JSON_COLUMNS = ("result", "payload")
+
+TABLE_NAME = "event_audit_event"
+STAGING_TABLE_NAME = f"{TABLE_NAME}_staging"
+DEFAULT_PARTITION_NAME = f"{TABLE_NAME}_default"
+PARTITION_NAME_RE = re.compile(rf"^{TABLE_NAME}_(\d{{8}})_(\d{{8}})$")
+PARTITION_INTERVALS = ("month", "day")
+
+
+@dataclass
+class Partition:
+    """A time range partition of the events table."""
+
+    start: datetime
+    end: datetime
+
+    @property
+    def name(self) -> str:
+        return f"{TABLE_NAME}_{self.start:%Y%m%d}_{self.end:%Y%m%d}"
+
+    @classmethod
+    def from_name(cls, name: str) -> Partition | None:
+        """Restore the partition from its name.
+
+        Returns None for tables that weren't created by the repository, e.g.
+        the default partition.
+        """
+        match = PARTITION_NAME_RE.match(name)
+
+        if not match:
+            return None
+
+        start, end = (
+            datetime.strptime(value, "%Y%m%d").replace(tzinfo=timezone.utc)
+            for value in match.groups()
+        )
+
+        return cls(start=start, end=end)
+
+    @classmethod
+    def for_moment(cls, moment: datetime, interval: str) -> Partition:
+        """Build the partition of the given interval that contains the moment."""
+        if interval not in PARTITION_INTERVALS:
+            raise ValueError(f"Unsupported partition interval: {interval}")
+
+        moment = _as_utc(moment)
+
+        if interval == "day":
+            start = datetime(moment.year, moment.month, moment.day, tzinfo=timezone.utc)
+            return cls(start=start, end=start + timedelta(days=1))
+
+        start = datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+        return cls(start=start, end=(start + timedelta(days=32)).replace(day=1))
+
+    def overlaps(self, other: Partition) -> bool:
+        return self.start < other.end and other.start < self.end
+
+    def is_within(self, time_from: datetime | None, time_to: datetime | None) -> bool:
+        """Check if all the partition events are inside the time range."""
+        if time_from and self.start < _as_utc(time_from):
+            return False
+
+        return not (time_to and self.end > _as_utc(time_to))
+
 
 class PostgresRepository(AbstractRepository, RemoveAll, RemoveSingle):
+    concurrent_writes = True
+
     def __init__(self):
         self.session = create_local_session()
 
@@ -47,18 +135,158 @@ class PostgresRepository(AbstractRepository, RemoveAll, RemoveSingle):
     def write_events(self, events: Iterable[types.Event]) -> types.Result:
         """Write multiple events to the repository.
 
+        Events are written with multi-row INSERT statements, bypassing the
+        `EventModel` instantiation. Each statement carries at most
+        `ckanext.event_audit.postgres.insert_chunk_size` rows, and the whole
+        batch is committed at once. Events, that are already stored, are
+        skipped, so a batch can be written again, e.g. when the write-ahead
+        log is replayed.
+
+        If `ckanext.event_audit.postgres.copy_format` is set, events are
+        streamed with `COPY ... FROM STDIN` instead. If the database driver
+        doesn't support COPY, we fall back to INSERT.
+
+        Every call uses its own session, so batches can be written from
+        multiple threads at the same time.
+
         Args:
             events (Iterable[types.Event]): events to write.
 
         Returns:
             types.Result: result of the operation.
         """
-        for event in events:
-            self.write_event(event, session=self.session, defer_commit=True)
+        session = create_local_session()
 
-        self.session.commit()
+        try:
+            return self._write_events(session, events)
+        finally:
+            session.close()
+
+    def _write_events(
+        self, session: SQLAlchemySession, events: Iterable[types.Event]
+    ) -> types.Result:
+        copy_format = config.get_postgres_copy_format()
+
+        if copy_format and copy_format not in COPY_FORMATS:
+            log.warning(
+                "Unsupported COPY format %s, falling back to INSERT", copy_format
+            )
+        elif copy_format:
+            cursor = self._get_copy_cursor(session)
+
+            if cursor is not None:
+                return self._copy_events(session, cursor, events, copy_format)
+
+            log.warning("Database driver doesn't support COPY, falling back to INSERT")
+
+        return self._insert_events(session, events)
+
+    def _insert_events(
+        self, session: SQLAlchemySession, events: Iterable[types.Event]
+    ) -> types.Result:
+        """Write events with chunked multi-row INSERT statements."""
+        table = model.EventModel.__table__
+        written = 0
+
+        try:
+            for chunk in iter_chunks(
+                (event.model_dump() for event in events),
+                config.get_postgres_insert_chunk_size(),
+            ):
+                session.execute(pg_insert(table).values(chunk).on_conflict_do_nothing())
+                written += len(chunk)
+
+            session.commit()
+        except SQLAlchemyError as e:
+            log.exception("Failed to write events to Postgres")
+            session.rollback()
+            return types.Result(status=False, message=str(e))
+
+        return types.Result(
+            status=True, message=f"{written} event(s) written successfully"
+        )
+
+    def _get_copy_cursor(self, session: SQLAlchemySession) -> Any | None:
+        """Return a DBAPI cursor that supports COPY, if the driver allows it.
+
+        The cursor belongs to the connection of the session, so the COPY is a
+        part of the session transaction.
+        """
+        cursor = session.connection().connection.cursor()
+
+        # psycopg2 exposes `copy_expert`, psycopg 3 exposes `copy`
+        if hasattr(cursor, "copy_expert") or hasattr(cursor, "copy"):
+            return cursor
+
+        cursor.close()
+
+        return None
+
+    def _copy_events(
+        self,
+        session: SQLAlchemySession,
+        cursor: Any,
+        events: Iterable[types.Event],
+        copy_format: str,
+    ) -> types.Result:
+        """Stream events into the table with `COPY ... FROM STDIN`.
+
+        COPY can't skip the stored events, so events are copied into the
+        temporary staging table first, and moved to the events table with
+        `INSERT ... ON CONFLICT DO NOTHING`.
+        """
+        table = model.EventModel.__table__
+        columns = [column.name for column in table.columns]
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        statement = (
+            f"COPY {STAGING_TABLE_NAME} ({column_list}) "
+            f"FROM STDIN WITH (FORMAT {copy_format})"
+        )
+        counter = _RowCounter(event.model_dump() for event in events)
+
+        if copy_format == "binary":
+            data = _iter_binary_copy_data(counter, columns)
+        else:
+            data = _iter_csv_copy_data(counter, columns)
+
+        try:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {STAGING_TABLE_NAME} "
+                f"(LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+
+            if hasattr(cursor, "copy_expert"):
+                cursor.copy_expert(statement, _IterableStream(data))
+            else:
+                with cursor.copy(statement) as copy:
+                    for chunk in data:
+                        copy.write(chunk)
+
+            # the names are constants of the model, not user input
+            cursor.execute(
+                f"INSERT INTO {table.name} ({column_list}) "  # noqa: S608
+                f"SELECT {column_list} FROM {STAGING_TABLE_NAME} "
+                "ON CONFLICT DO NOTHING"
+            )
+
+            session.commit()
+        except (SQLAlchemyError, self._get_dbapi_error()) as e:
+            log.exception("Failed to copy events to Postgres")
+            session.rollback()
+            return types.Result(status=False, message=str(e))
+        finally:
+            cursor.close()
+
+        return types.Result(
+            status=True, message=f"{counter.count} event(s) written successfully"
+        )
 
-        return types.Result(status=True)
+    def _get_dbapi_error(self) -> type[Exception]:
+        """Return the base exception class of the database driver."""
+        dialect = self.session.get_bind().dialect
+        dbapi = getattr(dialect, "loaded_dbapi", None) or dialect.dbapi
+
+        return dbapi.Error
 
     def get_event(self, event_id: str) -> types.Event | None:
         """Retrieves a single event from the repository.
@@ -91,6 +319,24 @@ class PostgresRepository(AbstractRepository, RemoveAll, RemoveSingle):
             types.Event.model_validate(event) for event in self._filter_events(filters)
         ]
 
+    def iter_events(self, filters: types.Filters) -> Iterator[types.Event]:
+        """Iterate over the filtered events using a server-side cursor.
+
+        Rows are fetched by chunks of `ckanext.event_audit.read_chunk_size`.
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            Iterator[types.Event]: filtered events.
+        """
+        query = self._build_query(filters).execution_options(
+            yield_per=config.get_read_chunk_size()
+        )
+
+        for event in self.session.execute(query).scalars():
+            yield types.Event.model_validate(event)
+
     def _filter_events(self, filters: types.Filters) -> list[model.EventModel]:
         """Filters events based on provided filter criteria.
 
@@ -100,9 +346,53 @@ class PostgresRepository(AbstractRepository, RemoveAll, RemoveSingle):
         Returns:
             list[model.EventModel]: list of event models.
         """
-        query = select(model.EventModel)
+        return self.session.execute(self._build_query(filters)).scalars().all()
+
+    def _build_query(self, filters: types.Filters) -> Select:
+        """Build the query for the filtered, ordered and paginated events.
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            Select: select statement.
+        """
+        table = model.EventModel.__table__
+        query = select(model.EventModel).where(*self._build_conditions(filters))
+        cursor = filters.get_cursor()
+        key = sa.tuple_(table.c.timestamp, table.c.id)
+
+        # keyset pagination, backed by the (timestamp, id) index
+        if cursor:
+            position = sa.tuple_(*(sa.literal(value) for value in cursor.sort_key()))
+            query = query.where(
+                key < position if filters.order == "desc" else key > position
+            )
+
+        if filters.order == "desc":
+            query = query.order_by(table.c.timestamp.desc(), table.c.id.desc())
+        else:
+            query = query.order_by(table.c.timestamp, table.c.id)
+
+        if filters.limit:
+            query = query.limit(filters.limit)
+
+        return query
+
+    def _build_conditions(self, filters: types.Filters) -> list[Any]:
+        """Translate the filters into SQL conditions.
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            list[Any]: list of SQL expressions.
+        """
+        table = model.EventModel.__table__
+        conditions: list[Any] = []
 
         filterable_fields = [
+            "id",
             "category",
             "action",
             "actor",
@@ -115,16 +405,88 @@ class PostgresRepository(AbstractRepository, RemoveAll, RemoveSingle):
         for field in filterable_fields:
             value = getattr(filters, field, None)
             if value:
-                query = query.where(getattr(model.EventModel, field) == value)
+                conditions.append(table.c[field] == value)
 
         if filters.time_from:
-            query = query.where(model.EventModel.timestamp >= filters.time_from)
+            conditions.append(table.c.timestamp >= filters.time_from)
         if filters.time_to:
-            query = query.where(model.EventModel.timestamp <= filters.time_to)
+            conditions.append(table.c.timestamp <= filters.time_to)
+
+        return conditions
+
+    def count_events(self, filters: types.Filters) -> int:
+        """Count the events that match the filters with a single `COUNT(*)`.
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            int: number of events.
+        """
+        table = model.EventModel.__table__
+        query = (
+            select(sa.func.count())
+            .select_from(table)
+            .where(*self._build_conditions(filters))
+        )
+
+        return self.session.execute(query).scalar_one()
+
+    def aggregate(
+        self,
+        filters: types.Filters,
+        group_by: list[str] | None = None,
+        bucket: str | None = None,
+    ) -> list[types.EventsAggregate]:
+        """Count the events by groups and time buckets with `GROUP BY`.
+
+        Buckets are truncated with `date_trunc` in UTC.
 
-        query.order_by(model.EventModel.timestamp)
+        Args:
+            filters (types.Filters): filters to apply.
+            group_by (list[str] | None, optional): event fields to group by.
+            bucket (str | None, optional): `hour` or `day`.
+
+        Returns:
+            list[types.EventsAggregate]: counts, ordered by the bucket and the
+            group values.
+        """
+        group_by = validate_aggregation(group_by, bucket)
+        table = model.EventModel.__table__
+        columns: list[Any] = [table.c[field] for field in group_by]
+
+        if bucket:
+            columns.insert(
+                0,
+                sa.func.date_trunc(
+                    bucket, sa.func.timezone("UTC", table.c.timestamp)
+                ).label("bucket"),
+            )
+
+        query = (
+            select(*columns, sa.func.count().label("count"))
+            .where(*self._build_conditions(filters))
+            .group_by(*columns)
+            .order_by(*columns)
+        )
+
+        result: list[types.EventsAggregate] = []
 
-        return self.session.execute(query).scalars().all()
+        for row in self.session.execute(query):
+            values = list(row)
+            bucket_start = values.pop(0) if bucket else None
+
+            result.append(
+                types.EventsAggregate(
+                    group=dict(zip(group_by, values[:-1])),
+                    count=values[-1],
+                    bucket=bucket_start.replace(tzinfo=timezone.utc)
+                    if bucket_start
+                    else None,
+                )
+            )
+
+        return result
 
     def remove_event(
         self,
@@ -142,11 +504,15 @@ class PostgresRepository(AbstractRepository, RemoveAll, RemoveSingle):
         Returns:
             types.Result: result of the operation.
         """
-        event = model.EventModel.get(event_id)
+        session = session or self.session
+        table = model.EventModel.__table__
 
-        if event:
-            event.delete(session=session or self.session, defer_commit=defer_commit)
+        result = session.execute(sa.delete(table).where(table.c.id == event_id))
 
+        if not defer_commit:
+            session.commit()
+
+        if result.rowcount:
             return types.Result(status=True, message="Event removed successfully")
 
         return types.Result(status=False, message="Event not found")
@@ -154,23 +520,266 @@ class PostgresRepository(AbstractRepository, RemoveAll, RemoveSingle):
     def remove_events(self, filters: types.Filters) -> types.Result:
         """Removes a filtered set of events from the repository.
 
+        Events are removed with a single `DELETE` statement. If
+        `ckanext.event_audit.postgres.delete_chunk_size` is set, the statement
+        is split into primary key ranges of that size, each one committed
+        separately, to keep the locks and WAL bursts short.
+
         Args:
             filters (types.Filters): filters to apply.
 
         Returns:
             types.Result: result of the operation.
         """
-        events = self._filter_events(filters)
+        removed = self._drop_covered_partitions(filters)
+        conditions = self._build_conditions(filters)
+        chunk_size = config.get_postgres_delete_chunk_size()
+
+        if chunk_size:
+            removed += self._delete_in_chunks(conditions, chunk_size)
+        else:
+            table = model.EventModel.__table__
+            removed += self.session.execute(
+                sa.delete(table).where(*conditions)
+            ).rowcount
+            self.session.commit()
+
+        return types.Result(
+            status=True, message=f"{removed} event(s) removed successfully"
+        )
+
+    def _delete_in_chunks(self, conditions: list[Any], chunk_size: int) -> int:
+        """Delete matching rows in primary key ranges of `chunk_size` rows.
+
+        Returns:
+            int: number of removed events.
+        """
+        table = model.EventModel.__table__
+        removed = 0
+        lower_bound: str | None = None
+
+        while True:
+            range_conditions = list(conditions)
+
+            if lower_bound is not None:
+                range_conditions.append(table.c.id > lower_bound)
+
+            upper_bound = self.session.execute(
+                select(table.c.id)
+                .where(*range_conditions)
+                .order_by(table.c.id)
+                .offset(chunk_size - 1)
+                .limit(1)
+            ).scalar()
+
+            if upper_bound is not None:
+                range_conditions.append(table.c.id <= upper_bound)
 
-        for event in events:
-            event.delete(defer_commit=True)
+            removed += self.session.execute(
+                sa.delete(table).where(*range_conditions)
+            ).rowcount
+            self.session.commit()
+
+            if upper_bound is None:
+                return removed
+
+            lower_bound = upper_bound
+
+    def _drop_covered_partitions(self, filters: types.Filters) -> int:
+        """Drop the partitions that are fully covered by a pure time filter.
+
+        Dropping a partition is much cheaper than deleting its rows one by
+        one, so we're doing it when the filters contain only the time range.
+        Only past partitions are dropped, even if the range is open-ended,
+        because events still arrive to the current and future ones. Their
+        rows are deleted instead.
+
+        Returns:
+            int: number of removed events.
+        """
+        other_filters = filters.model_dump(
+            exclude={"time_from", "time_to", *types.PAGINATION_FIELDS}
+        )
+
+        if any(other_filters.values()):
+            return 0
+
+        if not self.is_partitioned():
+            return 0
+
+        now = datetime.now(timezone.utc)
+        time_to = min(_as_utc(filters.time_to), now) if filters.time_to else now
+        removed = 0
+
+        for partition in self.get_partitions():
+            if not partition.is_within(filters.time_from, time_to):
+                continue
+
+            removed += self.session.execute(
+                sa.select(sa.func.count()).select_from(sa.table(partition.name))
+            ).scalar_one()
+            self._detach_partition(partition, drop=True)
 
         self.session.commit()
 
-        return types.Result(
-            status=True, message=f"{len(events)} event(s) removed successfully"
+        return removed
+
+    def is_partitioned(self) -> bool:
+        """Check if the events table is partitioned.
+
+        Returns:
+            bool: whether the table is partitioned.
+        """
+        relkind = self.session.execute(
+            sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": TABLE_NAME},
+        ).scalar()
+
+        return relkind == "p"
+
+    def get_partitions(self) -> list[Partition]:
+        """Return the time range partitions of the events table.
+
+        The default partition isn't included.
+
+        Returns:
+            list[Partition]: partitions, ordered by time.
+        """
+        names = self.session.execute(
+            sa.text(
+                """
+                SELECT c.relname FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass(:table)
+                """
+            ),
+            {"table": TABLE_NAME},
+        ).scalars()
+
+        partitions = [
+            partition for name in names if (partition := Partition.from_name(name))
+        ]
+
+        return sorted(partitions, key=lambda partition: partition.start)
+
+    def create_partitions(
+        self, ahead: int | None = None, interval: str | None = None
+    ) -> list[Partition]:
+        """Create the partitions for the current and the future intervals.
+
+        If the default partition contains events, the partitions are created
+        starting from the oldest of them, and the events are moved from the
+        default partition to the new ones.
+
+        Args:
+            ahead (int | None, optional): number of future partitions. If not
+                provided, the configured value is used.
+            interval (str | None, optional): `month` or `day`. If not
+                provided, the configured interval is used.
+
+        Returns:
+            list[Partition]: created partitions.
+        """
+        ahead = config.get_postgres_partitions_ahead() if ahead is None else ahead
+        interval = interval or config.get_postgres_partition_interval()
+
+        now = datetime.now(timezone.utc)
+        oldest = self.session.execute(
+            sa.select(sa.func.min(sa.column("timestamp"))).select_from(
+                sa.table(DEFAULT_PARTITION_NAME)
+            )
+        ).scalar()
+
+        partition = Partition.for_moment(min(oldest, now) if oldest else now, interval)
+        last = Partition.for_moment(now, interval)
+
+        for _ in range(ahead):
+            last = Partition.for_moment(last.end, interval)
+
+        existing = self.get_partitions()
+        created: list[Partition] = []
+
+        while partition.start <= last.start:
+            if not any(partition.overlaps(other) for other in existing):
+                self._attach_partition(partition)
+                created.append(partition)
+
+            partition = Partition.for_moment(partition.end, interval)
+
+        self.session.commit()
+
+        return created
+
+    def expire_partitions(
+        self, before: datetime, detach_only: bool = False
+    ) -> list[Partition]:
+        """Detach and drop the partitions that contain only old events.
+
+        Args:
+            before (datetime): partitions that end before this moment are expired.
+            detach_only (bool, optional): keep the detached partitions as
+                standalone tables instead of dropping them.
+
+        Returns:
+            list[Partition]: expired partitions.
+        """
+        expired = [
+            partition
+            for partition in self.get_partitions()
+            if partition.is_within(None, before)
+        ]
+
+        for partition in expired:
+            self._detach_partition(partition, drop=not detach_only)
+
+        self.session.commit()
+
+        return expired
+
+    def _attach_partition(self, partition: Partition):
+        """Create the partition and move its events from the default partition.
+
+        Attaching a partition, instead of creating it as `PARTITION OF`, allows
+        us to create partitions for ranges that have rows in the default one.
+        """
+        bounds = (
+            f"FROM ('{partition.start.isoformat()}') TO ('{partition.end.isoformat()}')"
         )
 
+        self.session.execute(
+            sa.text(
+                f"CREATE TABLE {partition.name} (LIKE {TABLE_NAME} INCLUDING DEFAULTS)"
+            )
+        )
+        # the partition name is built from its dates, so it's safe to format
+        self.session.execute(
+            sa.text(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION_NAME}
+                    WHERE "timestamp" >= :start AND "timestamp" < :end
+                    RETURNING *
+                )
+                INSERT INTO {partition.name} SELECT * FROM moved
+                """  # noqa: S608
+            ),
+            {"start": partition.start, "end": partition.end},
+        )
+        self.session.execute(
+            sa.text(
+                f"ALTER TABLE {TABLE_NAME} ATTACH PARTITION {partition.name} "
+                f"FOR VALUES {bounds}"
+            )
+        )
+
+    def _detach_partition(self, partition: Partition, drop: bool):
+        self.session.execute(
+            sa.text(f"ALTER TABLE {TABLE_NAME} DETACH PARTITION {partition.name}")
+        )
+
+        if drop:
+            self.session.execute(sa.text(f"DROP TABLE {partition.name}"))
+
     def remove_all_events(self) -> types.Result:
         """Removes all events from the repository.
 
@@ -188,3 +797,128 @@ class PostgresRepository(AbstractRepository, RemoveAll, RemoveSingle):
             bool: whether the connection was successful.
         """
         return True
+
+
+class _RowCounter:
+    """Count the rows while they are consumed from an iterable."""
+
+    def __init__(self, rows: Iterable[dict[str, Any]]):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+class _IterableStream(io.RawIOBase):
+    """File-like wrapper around an iterator of bytes.
+
+    psycopg2 `copy_expert` reads the data from a file object, this wrapper
+    allows us to feed it lazily, without building the whole payload in memory.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+
+            if chunk is None:
+                break
+
+            self._buffer += chunk
+
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+
+        return data
+
+
+def _iter_csv_copy_data(
+    rows: Iterable[dict[str, Any]], columns: list[str]
+) -> Iterator[bytes]:
+    """Encode rows in the COPY CSV format.
+
+    All the values are quoted, so empty strings aren't treated as NULL.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+
+    for row in rows:
+        writer.writerow(
+            [
+                json.dumps(row[column]) if column in JSON_COLUMNS else row[column]
+                for column in columns
+            ]
+        )
+
+        yield buffer.getvalue().encode("utf-8")
+
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _iter_binary_copy_data(
+    rows: Iterable[dict[str, Any]], columns: list[str]
+) -> Iterator[bytes]:
+    """Encode rows in the COPY binary format.
+
+    See https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4
+    """
+    yield COPY_BINARY_HEADER
+
+    field_count = struct.pack("!h", len(columns))
+
+    for row in rows:
+        parts = [field_count]
+
+        for column in columns:
+            value = _encode_binary_value(column, row[column])
+
+            if value is None:
+                parts.append(COPY_BINARY_NULL)
+            else:
+                parts.append(struct.pack("!i", len(value)))
+                parts.append(value)
+
+        yield b"".join(parts)
+
+    yield COPY_BINARY_TRAILER
+
+
+def _encode_binary_value(column: str, value: Any) -> bytes | None:
+    """Encode a single value in the binary format of the column type."""
+    if value is None:
+        return None
+
+    if column == "timestamp":
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(value)
+
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+
+        return struct.pack("!q", (value - PG_EPOCH) // timedelta(microseconds=1))
+
+    if column in JSON_COLUMNS:
+        # jsonb binary representation is a version number followed by text
+        return b"\x01" + json.dumps(value).encode("utf-8")
+
+    return str(value).encode("utf-8")
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """Treat naive datetimes as UTC ones."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+
+    return moment
@@ -1,22 +1,76 @@
 from __future__ import annotations
 
+import uuid
+from collections import Counter, defaultdict
+from contextlib import suppress
 from datetime import datetime as dt
-from typing import Any
+from datetime import timedelta as td
+from datetime import timezone as tz
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+from redis.exceptions import ResponseError
 
 from ckan.lib.redis import connect_to_redis
 
-from ckanext.event_audit import types
+from ckanext.event_audit import config, types
 from ckanext.event_audit.repositories.base import (
     AbstractRepository,
     RemoveAll,
     RemoveFiltered,
     RemoveSingle,
+    build_aggregates,
+    iter_chunks,
+    match_event,
+    truncate_timestamp,
+    validate_aggregation,
 )
 
+REDIS_KEY_PREFIX = "event-audit"
+REDIS_EVENT_KEY = REDIS_KEY_PREFIX + ":event:{id}"
+REDIS_BUCKETS_KEY = REDIS_KEY_PREFIX + ":buckets"
+REDIS_BUCKET_KEY = REDIS_KEY_PREFIX + ":bucket:{bucket}"
+REDIS_TIMELINE_KEY = REDIS_BUCKET_KEY + ":timeline"
+REDIS_INDEX_KEY = REDIS_BUCKET_KEY + ":index:{field}:{value}"
+REDIS_TMP_KEY = REDIS_KEY_PREFIX + ":tmp:{id}"
+REDIS_TMP_KEY_TTL = 60
+
+# the hash of the previous storage layout, see `migrate_legacy_events`
 REDIS_SET_KEY = "event-audit"
 
+INDEXED_FIELDS = (
+    "category",
+    "action",
+    "actor",
+    "action_object",
+    "action_object_id",
+    "target_type",
+    "target_id",
+)
+
+BUCKET_INTERVALS = {"hour": "%Y%m%d%H", "day": "%Y%m%d"}
+
+EPOCH = dt(1970, 1, 1, tzinfo=tz.utc)
+
 
 class RedisRepository(AbstractRepository, RemoveAll, RemoveSingle, RemoveFiltered):
+    """Store events in Redis.
+
+    Every event is stored as a JSON string under its own key. Event IDs are
+    kept in the `timeline` sorted set, scored by the event timestamp, and in
+    per-field index sorted sets, e.g. `index:action:created`.
+
+    Sorted sets are sharded into hourly or daily buckets. Buckets are listed
+    in the `event-audit:buckets` registry and, if the retention period is
+    configured, all the keys of the bucket expire together.
+
+    Filters are resolved by the intersection of the index sets and a range
+    query by the score in every bucket of the time range, so the lookup cost
+    doesn't grow with the total number of stored events.
+    """
+
+    concurrent_writes = True
+
     @classmethod
     def get_name(cls) -> str:
         return "redis"
@@ -33,42 +87,117 @@ class RedisRepository(AbstractRepository, RemoveAll, RemoveSingle, RemoveFiltere
         Returns:
             types.Result: result of the operation.
         """
-        key = self._build_event_key(event)
-
-        self.conn.hset(REDIS_SET_KEY, key, event.model_dump_json())
+        pipe = self.conn.pipeline(transaction=False)
+        self._add_events(pipe, [event])
+        pipe.execute()
 
         return types.Result(status=True)
 
-    def _build_event_key(self, event: types.Event) -> str:
-        """Builds the key for the event in Redis.
-
-        We store all the info inside the key to be able to search for it fast.
-        """
-        return (
-            f"id:{event.id}|"
-            f"category:{event.category}|"
-            f"action:{event.action}|"
-            f"actor:{event.actor}|"
-            f"action_object:{event.action_object}|"
-            f"action_object_id:{event.action_object_id}|"
-            f"target_type:{event.target_type}|"
-            f"target_id:{event.target_id}|"
-            f"ts:{event.timestamp}"
+    def write_events(self, events: Iterable[types.Event]) -> types.Result:
+        """Write multiple events to Redis.
+
+        Events and their index entries are sent in non-transactional
+        pipelines, one round trip per chunk of events.
+
+        Args:
+            events (Iterable[types.Event]): events to write.
+
+        Returns:
+            types.Result: result of the operation.
+        """
+        written = 0
+
+        for chunk in iter_chunks(events, config.get_redis_write_chunk_size()):
+            pipe = self.conn.pipeline(transaction=False)
+            written += self._add_events(pipe, chunk)
+            pipe.execute()
+
+        return types.Result(
+            status=True, message=f"{written} event(s) written successfully"
         )
 
-    def get_event(self, event_id: float) -> types.Event | None:
+    def _add_events(self, pipe: Any, events: list[types.Event]) -> int:
+        """Queue commands that store events and their index entries.
+
+        Events that are already older than the retention period are skipped.
+
+        Returns:
+            int: number of queued events.
+        """
+        interval = config.get_redis_bucket_interval()
+        retention = td(days=config.get_redis_retention_days())
+        now = dt.now(tz.utc)
+
+        buckets: dict[str, int] = {}
+        expirations: dict[str, int] = {}
+        queued = 0
+
+        for event in events:
+            timestamp = types.Cursor.from_event(event).timestamp
+            bucket, start, end = _get_bucket(timestamp, interval)
+            expire_at = end + retention
+
+            if retention and expire_at <= now:
+                continue
+
+            score = _get_score(timestamp)
+            keys = [_timeline_key(bucket), *_index_keys(bucket, event)]
+
+            pipe.set(
+                _event_key(event.id),
+                event.model_dump_json(),
+                ex=(expire_at - now) if retention else None,
+            )
+
+            for key in keys:
+                pipe.zadd(key, {event.id: score})
+
+                if retention:
+                    expirations[key] = int(expire_at.timestamp())
+
+            buckets[bucket] = _get_score(start)
+            queued += 1
+
+        if buckets:
+            pipe.zadd(REDIS_BUCKETS_KEY, buckets)
+
+        for key, expire_at in expirations.items():
+            pipe.expireat(key, expire_at)
+
+        if retention:
+            # forget expired buckets, whatever interval was used for them
+            oldest = now - retention - td(days=1)
+            pipe.zremrangebyscore(REDIS_BUCKETS_KEY, "-inf", _get_score(oldest))
+
+        return queued
+
+    def _discard_event(self, pipe: Any, event: types.Event):
+        """Queue commands that remove the event and its index entries."""
+        timestamp = types.Cursor.from_event(event).timestamp
+        pipe.delete(_event_key(event.id))
+
+        # the bucket interval could be changed after the event was written
+        for interval in BUCKET_INTERVALS:
+            bucket, _, _ = _get_bucket(timestamp, interval)
+
+            for key in [_timeline_key(bucket), *_index_keys(bucket, event)]:
+                pipe.zrem(key, event.id)
+
+    def get_event(self, event_id: str) -> types.Event | None:
         """Get an event by its ID.
 
         Args:
-            event_id (float): event ID.
+            event_id (str): event ID.
         """
-        _, result = self.conn.hscan(REDIS_SET_KEY, match=f"id:{event_id}|*")  # type: ignore
+        event_data = self.conn.get(_event_key(event_id))
 
-        for event_data in result.values():
-            return types.Event.model_validate_json(event_data)
+        if event_data is None:
+            return None
+
+        return types.Event.model_validate_json(event_data)  # type: ignore
 
     def filter_events(self, filters: types.Filters | Any) -> list[types.Event]:
-        """Filters events based on patterns generated from the provided filters.
+        """Filters events using the index sets.
 
         Args:
             filters (types.Filters): filters to apply.
@@ -78,91 +207,292 @@ class RedisRepository(AbstractRepository, RemoveAll, RemoveSingle, RemoveFiltere
                 f"Expected 'filters' to be an instance of Filters, got {type(filters)}"
             )
 
-        pattern = self._build_pattern(filters)
-        matching_events: list[types.Event] = []
+        return list(self.iter_events(filters))
 
-        for _, event_data in self.conn.hscan_iter(REDIS_SET_KEY, match=pattern or None):
-            matching_events.append(types.Event.model_validate_json(event_data))
+    def iter_events(self, filters: types.Filters) -> Iterator[types.Event]:
+        """Iterate over the filtered events lazily.
 
-        if not any([filters.time_from, filters.time_to]):
-            matching_events.sort(key=lambda event: event.timestamp)
-            return matching_events
+        Event IDs are read from the sorted sets in chunks and the events of
+        each chunk are fetched with a single `MGET`.
 
-        matching_events = self._filter_by_time(
-            matching_events, filters.time_from, filters.time_to
-        )
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            Iterator[types.Event]: filtered events.
+        """
+        ids = self._iter_ids(filters)
 
-        matching_events.sort(key=lambda event: event.timestamp)
+        if filters.limit:
+            ids = islice(ids, filters.limit)
 
-        return matching_events
+        for chunk in iter_chunks(ids, config.get_read_chunk_size()):
+            for event_data in self.conn.mget([_event_key(id_) for id_ in chunk]):
+                if event_data is not None:
+                    yield types.Event.model_validate_json(event_data)  # type: ignore
 
-    def _build_pattern(self, filters: types.Filters) -> str:
-        """Builds a search pattern based on the provided filters."""
-        parts = [
-            f"{key}:{value}" if value else f"{key}:*"
-            for key, value in filters.model_dump().items()
-            if key not in ["time_from", "time_to"] and value
+    def _iter_ids(self, filters: types.Filters) -> Iterator[str]:
+        """Iterate over the IDs of the filtered events in the requested order.
+
+        Sorted set members with the same score are ordered by the member
+        itself, so IDs follow the `(timestamp, id)` order, used by other
+        repositories.
+        """
+        if filters.id:
+            event = self.get_event(filters.id)
+
+            if event and match_event(event, filters):
+                yield event.id
+            return
+
+        min_score, max_score = _get_score_range(filters)
+        cursor = filters.get_cursor()
+        descending = filters.order == "desc"
+        position = (_get_score(cursor.timestamp), cursor.id) if cursor else None
+
+        if position and descending:
+            max_score = min(max_score, position[0])
+        elif position:
+            min_score = max(min_score, position[0])
+
+        if min_score > max_score:
+            return
+
+        for bucket in self._get_buckets(min_score, max_score, descending):
+            with self._source_key(bucket, filters) as key:
+                if key is None:
+                    continue
+
+                for id_, score in self._iter_range(
+                    key, min_score, max_score, descending
+                ):
+                    # skip the cursor position and everything before it
+                    if not position or _is_after((score, id_), position, descending):
+                        yield id_
+
+    def _iter_range(
+        self, key: str, min_score: float, max_score: float, descending: bool
+    ) -> Iterator[tuple[str, int]]:
+        """Iterate over members of the sorted set in the score range.
+
+        Every chunk starts at the score of the last read member, and skips
+        only the members with this score, that were read already, so the
+        cost of a chunk doesn't grow with the number of the read members.
+        """
+        chunk_size = config.get_read_chunk_size()
+        # number of the read members with the boundary score
+        offset = 0
+
+        while True:
+            if descending:
+                chunk: Any = self.conn.zrevrangebyscore(
+                    key,
+                    _format_score(max_score),
+                    _format_score(min_score),
+                    offset,
+                    chunk_size,
+                    withscores=True,
+                )
+            else:
+                chunk = self.conn.zrangebyscore(
+                    key,
+                    _format_score(min_score),
+                    _format_score(max_score),
+                    offset,
+                    chunk_size,
+                    withscores=True,
+                )
+
+            for member, score in chunk:
+                yield _decode(member), int(score)
+
+            if len(chunk) < chunk_size:
+                break
+
+            boundary = max_score if descending else min_score
+            last_score = int(chunk[-1][1])
+            same_score = sum(1 for _, score in chunk if int(score) == last_score)
+            offset = offset + same_score if last_score == boundary else same_score
+
+            if descending:
+                max_score = last_score
+            else:
+                min_score = last_score
+
+    def _get_buckets(
+        self, min_score: float, max_score: float, descending: bool = False
+    ) -> list[str]:
+        """Get names of the buckets that overlap the score range."""
+        # bucket is registered by its start, which is up to a day earlier
+        # than the events inside it
+        if min_score != float("-inf"):
+            min_score -= td(days=1) // td(microseconds=1)
+
+        buckets: Any = self.conn.zrangebyscore(
+            REDIS_BUCKETS_KEY, _format_score(min_score), _format_score(max_score)
+        )
+        buckets = [_decode(bucket) for bucket in buckets]
+
+        return buckets[::-1] if descending else buckets
+
+    def _source_key(self, bucket: str, filters: types.Filters) -> _SourceKey:
+        """Get the sorted set with IDs of the bucket events matching filters."""
+        keys = [
+            _index_key(bucket, field, value)
+            for field in INDEXED_FIELDS
+            if (value := getattr(filters, field))
         ]
 
-        if not parts:
-            return ""
+        return _SourceKey(self.conn, keys or [_timeline_key(bucket)])
+
+    def count_events(self, filters: types.Filters) -> int:
+        """Count the events that match the filters.
+
+        Events are counted with `ZCOUNT` over the intersection of the index
+        sets, without reading the events.
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            int: number of events.
+        """
+        if filters.id:
+            return super().count_events(filters)
 
-        return "*" + "*".join(parts) + "*"
+        min_score, max_score = _get_score_range(filters)
 
-    def _filter_by_time(
-        self, events: list[types.Event], time_from: dt | None, time_to: dt | None
-    ) -> list[types.Event]:
-        """Filters events based on the provided time range."""
-        if not time_from and not time_to:
-            return events
+        if min_score > max_score:
+            return 0
 
-        self.time_from = time_from
-        self.time_to = time_to
+        count = 0
 
-        if events:
-            return [
-                event
-                for event in events
-                if self._is_within_time_range(dt.fromisoformat(event.timestamp))
-            ]
+        for bucket in self._get_buckets(min_score, max_score):
+            with self._source_key(bucket, filters) as key:
+                if key is None:
+                    continue
 
-        filtered_events: list[types.Event] = []
+                count += self.conn.zcount(  # type: ignore
+                    key, _format_score(min_score), _format_score(max_score)
+                )
 
-        if not events:
-            for _, event_data in self.conn.hscan_iter(REDIS_SET_KEY):
-                event = types.Event.model_validate_json(event_data)
-                event_time = dt.fromisoformat(event.timestamp)
+        return count
 
-                if self._is_within_time_range(event_time):
-                    filtered_events.append(event)
+    def aggregate(
+        self,
+        filters: types.Filters,
+        group_by: list[str] | None = None,
+        bucket: str | None = None,
+    ) -> list[types.EventsAggregate]:
+        """Count the events that match the filters by groups and time buckets.
 
-        return filtered_events
+        Events are counted with `ZCOUNT` over the index set of every group
+        value, without reading the events. Group values are taken from the
+        names of the index keys. Grouping by multiple fields reduces the
+        events instead.
 
-    def _is_within_time_range(self, event_time: dt) -> bool:
-        if self.time_from and self.time_to:
-            return self.time_from <= event_time <= self.time_to
-        if self.time_from:
-            return self.time_from <= event_time
-        if self.time_to:
-            return event_time <= self.time_to
-        return True
+        Args:
+            filters (types.Filters): filters to apply.
+            group_by (list[str] | None, optional): event fields to group by.
+            bucket (str | None, optional): `hour` or `day` to additionally
+                group events by the truncated timestamp.
+
+        Returns:
+            list[types.EventsAggregate]: counts, ordered by the bucket and the
+            group values.
+        """
+        group_by = validate_aggregation(group_by, bucket)
+
+        if filters.id or len(group_by) > 1:
+            return super().aggregate(filters, group_by, bucket)
+
+        min_score, max_score = _get_score_range(filters)
+
+        if min_score > max_score:
+            return []
+
+        buckets = self._get_buckets(min_score, max_score)
+        field = group_by[0] if group_by else None
+        values = self._get_index_values(buckets, field) if field else {}
+        counter: Counter[tuple[dt | None, tuple[Any, ...]]] = Counter()
+
+        for name in buckets:
+            slices = _get_slices(name, bucket, min_score, max_score)
+            totals = self._count_slices(self._source_key(name, filters), slices)
+
+            if not field:
+                for bucket_start, count in totals.items():
+                    counter[(bucket_start, ())] += count
+                continue
+
+            filtered = getattr(filters, field)
+
+            for value in [filtered] if filtered else values.get(name, []):
+                group_filters = filters.model_copy(update={field: value})
+                counts = self._count_slices(
+                    self._source_key(name, group_filters), slices
+                )
+
+                for bucket_start, count in counts.items():
+                    counter[(bucket_start, (value,))] += count
+                    totals[bucket_start] -= count
+
+            # events without the value of the field are not indexed
+            for bucket_start, count in totals.items():
+                counter[(bucket_start, (None,))] += count
 
-    def remove_event(self, event_id: float) -> types.Result:
+        return build_aggregates(counter, group_by)
+
+    def _get_index_values(self, buckets: list[str], field: str) -> dict[str, list[str]]:
+        """Get the indexed values of the field in every bucket."""
+        prefix = REDIS_BUCKET_KEY.format(bucket="")
+        separator = f":index:{field}:"
+        pattern = REDIS_INDEX_KEY.format(bucket="*", field=field, value="*")
+        wanted = set(buckets)
+        values: defaultdict[str, list[str]] = defaultdict(list)
+
+        for key in self.conn.scan_iter(match=pattern):
+            name, _, value = _decode(key)[len(prefix) :].partition(separator)
+
+            if name in wanted:
+                values[name].append(value)
+
+        return values
+
+    def _count_slices(
+        self, source: _SourceKey, slices: list[tuple[dt | None, float, float]]
+    ) -> Counter[dt | None]:
+        """Count the events of the source set in every score slice."""
+        counts: Counter[dt | None] = Counter()
+
+        with source as key:
+            if key is None:
+                return counts
+
+            for bucket_start, min_score, max_score in slices:
+                counts[bucket_start] += self.conn.zcount(  # type: ignore
+                    key, _format_score(min_score), _format_score(max_score)
+                )
+
+        return counts
+
+    def remove_event(self, event_id: str) -> types.Result:
         """Removes an event by its ID.
 
         Args:
-            event_id (float): event ID.
+            event_id (str): event ID.
 
         Returns:
             types.Result: result of the operation.
         """
-        _, result = self.conn.hscan(REDIS_SET_KEY, match=f"id:{event_id}|*")  # type: ignore
+        event = self.get_event(event_id)
 
-        if not result:
+        if not event:
             return types.Result(status=False, message="Event not found")
 
-        for key in result:
-            self.conn.hdel(REDIS_SET_KEY, key)
+        pipe = self.conn.pipeline(transaction=False)
+        self._discard_event(pipe, event)
+        pipe.execute()
 
         return types.Result(status=True, message="Event removed successfully")
 
@@ -175,26 +505,90 @@ class RedisRepository(AbstractRepository, RemoveAll, RemoveSingle, RemoveFiltere
         Returns:
             types.Result: result of the operation.
         """
-        events = self.filter_events(filters)
+        # pages are read from the cursor, so the removal of the previous
+        # pages doesn't shift the next ones
+        events = super().iter_events(filters)
+        removed = 0
 
-        for event in events:
-            key = self._build_event_key(event)
-            self.conn.hdel(REDIS_SET_KEY, key)
+        for chunk in iter_chunks(events, config.get_read_chunk_size()):
+            pipe = self.conn.pipeline(transaction=False)
+
+            for event in chunk:
+                self._discard_event(pipe, event)
+
+            pipe.execute()
+            removed += len(chunk)
 
         return types.Result(
-            status=True, message=f"{len(events)} event(s) removed successfully"
+            status=True, message=f"{removed} event(s) removed successfully"
         )
 
     def remove_all_events(self) -> types.Result:
         """Removes all events from the repository.
 
+        Keys are removed incrementally, chunk by chunk, with `UNLINK`, that
+        reclaims the memory in the background, so the server is never blocked
+        by the removal of a large key.
+
         Returns:
             types.Result: result of the operation.
         """
-        self.conn.delete(REDIS_SET_KEY)
+        patterns = [
+            _event_key("*"),
+            REDIS_BUCKET_KEY.format(bucket="*"),
+            REDIS_TMP_KEY.format(id="*"),
+        ]
+
+        for pattern in patterns:
+            keys = self.conn.scan_iter(match=pattern)
+
+            for chunk in iter_chunks(keys, config.get_read_chunk_size()):
+                self._unlink(*chunk)
+
+        self._unlink(REDIS_BUCKETS_KEY)
 
         return types.Result(status=True, message="All events removed successfully")
 
+    def _unlink(self, *keys: Any):
+        """Remove keys without blocking the server.
+
+        `UNLINK` is available since Redis 4.0, `DEL` is used on older servers.
+        """
+        try:
+            self.conn.unlink(*keys)
+        except ResponseError:
+            self.conn.delete(*keys)
+
+    def migrate_legacy_events(self, keep: bool = False) -> int:
+        """Move events from the hash of the previous storage layout.
+
+        Previously, all events were stored inside the single `event-audit`
+        hash, with the filterable fields in the name of the hash field.
+
+        Args:
+            keep (bool, optional): keep the legacy hash after the migration.
+
+        Returns:
+            int: number of migrated events.
+        """
+        if _decode(self.conn.type(REDIS_SET_KEY)) != "hash":  # type: ignore
+            return 0
+
+        migrated = 0
+        events = (
+            types.Event.model_validate_json(event_data)
+            for _, event_data in self.conn.hscan_iter(REDIS_SET_KEY)
+        )
+
+        for chunk in iter_chunks(events, config.get_redis_write_chunk_size()):
+            migrated += len(chunk)
+            self.write_events(chunk)
+
+        if not keep:
+            self._unlink(REDIS_SET_KEY)
+
+        return migrated
+
     def test_connection(self) -> bool:
         """Tests the connection to the repository.
 
@@ -202,3 +596,155 @@ class RedisRepository(AbstractRepository, RemoveAll, RemoveSingle, RemoveFiltere
             bool: whether the connection was successful.
         """
         return True
+
+
+class _SourceKey:
+    """Context manager that provides the sorted set with the filtered IDs.
+
+    The intersection of multiple index sets is stored in a temporary key,
+    which is removed on exit.
+    """
+
+    def __init__(self, conn: Any, keys: list[str]):
+        self.conn = conn
+        self.keys = keys
+        self.tmp_key: str | None = None
+
+    def __enter__(self) -> str | None:
+        if len(self.keys) == 1:
+            return self.keys[0]
+
+        self.tmp_key = REDIS_TMP_KEY.format(id=uuid.uuid4())
+
+        pipe = self.conn.pipeline(transaction=False)
+        # the member has the same score in every index set
+        pipe.zinterstore(self.tmp_key, self.keys, aggregate="MAX")
+        pipe.expire(self.tmp_key, REDIS_TMP_KEY_TTL)
+        size, _ = pipe.execute()
+
+        return self.tmp_key if size else None
+
+    def __exit__(self, *args: Any):
+        if self.tmp_key:
+            self.conn.delete(self.tmp_key)
+
+
+def _event_key(event_id: str) -> str:
+    return REDIS_EVENT_KEY.format(id=event_id)
+
+
+def _timeline_key(bucket: str) -> str:
+    return REDIS_TIMELINE_KEY.format(bucket=bucket)
+
+
+def _index_key(bucket: str, field: str, value: str) -> str:
+    return REDIS_INDEX_KEY.format(bucket=bucket, field=field, value=value)
+
+
+def _index_keys(bucket: str, event: types.Event) -> Iterable[str]:
+    for field in INDEXED_FIELDS:
+        value = getattr(event, field)
+
+        if value:
+            yield _index_key(bucket, field, value)
+
+
+def _get_bucket(moment: dt, interval: str) -> tuple[str, dt, dt]:
+    """Get the name, the start and the end of the bucket of the moment."""
+    if interval not in BUCKET_INTERVALS:
+        raise ValueError(f"Unsupported bucket interval: {interval}")
+
+    start = moment.astimezone(tz.utc).replace(minute=0, second=0, microsecond=0)
+
+    if interval == "day":
+        start = start.replace(hour=0)
+        end = start + td(days=1)
+    else:
+        end = start + td(hours=1)
+
+    return start.strftime(BUCKET_INTERVALS[interval]), start, end
+
+
+def _get_bucket_range(name: str) -> tuple[dt, dt]:
+    """Get the start and the end of the bucket by its name."""
+    for interval, fmt in BUCKET_INTERVALS.items():
+        with suppress(ValueError):
+            moment = dt.strptime(name, fmt).replace(tzinfo=tz.utc)
+            bucket, start, end = _get_bucket(moment, interval)
+
+            if bucket == name:
+                return start, end
+
+    raise ValueError(f"Unsupported bucket name: {name}")
+
+
+def _get_slices(
+    name: str, bucket: str | None, min_score: float, max_score: float
+) -> list[tuple[dt | None, float, float]]:
+    """Split the score range inside the bucket by the aggregation buckets.
+
+    Args:
+        name (str): name of the storage bucket.
+        bucket (str | None): `hour` or `day` aggregation bucket.
+        min_score (float): start of the score range.
+        max_score (float): end of the score range, inclusive.
+
+    Returns:
+        list[tuple[dt | None, float, float]]: the start of the aggregation
+            bucket and the inclusive score range of every slice.
+    """
+    if not bucket:
+        return [(None, min_score, max_score)]
+
+    start, end = _get_bucket_range(name)
+    step = td(days=1) if bucket == "day" else td(hours=1)
+    moment = truncate_timestamp(start, bucket)
+    slices: list[tuple[dt | None, float, float]] = []
+
+    while moment < end:
+        low = max(_get_score(moment), min_score)
+        high = min(_get_score(moment + step) - 1, max_score)
+
+        if low <= high:
+            slices.append((moment, low, high))
+
+        moment += step
+
+    return slices
+
+
+def _get_score(moment: dt) -> int:
+    """Get the score of the moment: microseconds since epoch.
+
+    Unlike the float timestamp, this value is exact within the precision of
+    the sorted set score.
+    """
+    return (moment - EPOCH) // td(microseconds=1)
+
+
+def _get_score_range(filters: types.Filters) -> tuple[float, float]:
+    return (
+        _get_score(filters.time_from) if filters.time_from else float("-inf"),
+        _get_score(filters.time_to) if filters.time_to else float("inf"),
+    )
+
+
+def _is_after(
+    position: tuple[int, str], cursor: tuple[int, str], descending: bool
+) -> bool:
+    """Check if the `(score, id)` position follows the cursor."""
+    return position < cursor if descending else position > cursor
+
+
+def _format_score(score: float) -> str:
+    if score == float("inf"):
+        return "+inf"
+
+    if score == float("-inf"):
+        return "-inf"
+
+    return str(int(score))
+
+
+def _decode(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+from datetime import datetime as dt
+from datetime import timedelta as td
+from datetime import timezone
+from typing import Any, Iterable, Iterator
+
+from redis.exceptions import ResponseError
+
+from ckan.lib.redis import connect_to_redis
+
+from ckanext.event_audit import config, types
+from ckanext.event_audit.repositories.base import (
+    AbstractRepository,
+    RemoveAll,
+    RemoveSingle,
+    get_time_range,
+    iter_chunks,
+    iter_ordered,
+    match_event,
+)
+
+REDIS_STREAM_KEY = "event-audit:stream"
+REDIS_STREAM_IDS_KEY = "event-audit:stream:ids"
+MAX_ENTRY_SEQUENCE = 2**64 - 1
+
+
+class RedisStreamRepository(AbstractRepository, RemoveAll, RemoveSingle):
+    """Store events in a Redis Stream.
+
+    Events are appended to the stream with `XADD` and the stream is trimmed
+    to the approximate maximum length. The millisecond of the write of every
+    event is kept in a sorted set, to get events by ID, and the set is
+    trimmed along with the stream.
+
+    Stream entry IDs are based on the time of the write, so the time range of
+    a query is resolved with `XRANGE`, extended by the maximum delay between
+    the creation of the event and its write. The same delay bounds the
+    window, in which events are sorted by their timestamps.
+
+    Downstream workers can read new events through consumer groups, see
+    `create_consumer_group`, `consume` and `ack`. Requires Redis 5.0+.
+    """
+
+    concurrent_writes = True
+
+    @classmethod
+    def get_name(cls) -> str:
+        return "redis_stream"
+
+    def __init__(self) -> None:
+        self.conn = connect_to_redis()
+
+    def write_event(self, event: types.Event) -> types.Result:
+        """Append an event to the stream.
+
+        Args:
+            event (types.Event): event to write.
+
+        Returns:
+            types.Result: result of the operation.
+        """
+        return self.write_events([event])
+
+    def write_events(self, events: Iterable[types.Event]) -> types.Result:
+        """Append multiple events to the stream, in pipelined chunks.
+
+        Args:
+            events (Iterable[types.Event]): events to write.
+
+        Returns:
+            types.Result: result of the operation.
+        """
+        max_length = config.get_redis_stream_max_length()
+        written = 0
+
+        for chunk in iter_chunks(events, config.get_redis_write_chunk_size()):
+            pipe = self.conn.pipeline(transaction=False)
+
+            for event in chunk:
+                pipe.xadd(
+                    REDIS_STREAM_KEY,
+                    {"id": event.id, "data": event.model_dump_json()},
+                    maxlen=max_length or None,
+                    approximate=True,
+                )
+
+            if max_length:
+                pipe.xrange(REDIS_STREAM_KEY, "-", "+", count=1)
+
+            results = pipe.execute()
+
+            pipe = self.conn.pipeline(transaction=False)
+            pipe.zadd(
+                REDIS_STREAM_IDS_KEY,
+                {
+                    event.id: _get_entry_milliseconds(_decode(entry_id))
+                    for event, entry_id in zip(chunk, results)
+                },
+            )
+
+            # IDs of the trimmed entries are dropped along with them
+            if max_length and results[-1]:
+                first_id = _decode(results[-1][0][0])
+                first_ms = _get_entry_milliseconds(first_id)
+                pipe.zremrangebyscore(REDIS_STREAM_IDS_KEY, "-inf", f"({first_ms}")
+
+            pipe.execute()
+            written += len(chunk)
+
+        return types.Result(
+            status=True, message=f"{written} event(s) written successfully"
+        )
+
+    def get_event(self, event_id: str) -> types.Event | None:
+        """Get an event by its ID.
+
+        Args:
+            event_id (str): event ID.
+        """
+        entry = self._find_entry(event_id)
+
+        return _parse_entry(entry[1]) if entry else None
+
+    def _find_entry(self, event_id: str) -> tuple[str, dict[Any, Any]] | None:
+        """Find the stream entry of the event.
+
+        The index keeps the millisecond of the write, and entries of this
+        millisecond are checked one by one.
+        """
+        milliseconds = self.conn.zscore(REDIS_STREAM_IDS_KEY, event_id)
+
+        if milliseconds is None:
+            return None
+
+        moment = str(int(milliseconds))  # type: ignore
+
+        for entry_id, fields in self._iter_range(moment, moment, "asc"):
+            if _decode(fields.get(b"id", fields.get("id"))) == event_id:
+                return entry_id, fields
+
+        # the entry was trimmed from the stream
+        self.conn.zrem(REDIS_STREAM_IDS_KEY, event_id)
+
+        return None
+
+    def filter_events(self, filters: types.Filters) -> list[types.Event]:
+        """Filter events from the stream.
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            list[types.Event]: list of filtered events.
+        """
+        return list(self.iter_events(filters))
+
+    def iter_events(self, filters: types.Filters) -> Iterator[types.Event]:
+        """Iterate over the filtered events lazily, by `(timestamp, id)`.
+
+        The stream is read from the position of the cursor, and events, that
+        were written out of order, are sorted within the ingest lag window.
+
+        Args:
+            filters (types.Filters): filters to apply.
+
+        Returns:
+            Iterator[types.Event]: filtered events.
+        """
+        lag = td(seconds=config.get_redis_stream_max_ingest_lag())
+
+        yield from iter_ordered(self._iter_entries(filters), filters, lag)
+
+    def _iter_entries(self, filters: types.Filters) -> Iterator[tuple[dt, types.Event]]:
+        """Read the stream range that may contain the filtered events.
+
+        Entries are read in the requested order, starting from the cursor.
+        """
+        if filters.id:
+            event = self.get_event(filters.id)
+
+            if event and match_event(event, filters):
+                yield types.Cursor.from_event(event).timestamp, event
+            return
+
+        lag = td(seconds=config.get_redis_stream_max_ingest_lag())
+        time_from, time_to = get_time_range(filters)
+
+        start = _get_entry_id(time_from) if time_from else "-"
+        end = _get_entry_id(time_to + lag) if time_to else "+"
+
+        for entry_id, fields in self._iter_range(start, end, filters.order):
+            event = _parse_entry(fields)
+
+            if match_event(event, filters):
+                yield _get_entry_time(entry_id), event
+
+    def _iter_range(
+        self, start: str, end: str, order: str
+    ) -> Iterator[tuple[str, dict[Any, Any]]]:
+        """Read the range of the stream in chunks."""
+        chunk_size = config.get_read_chunk_size()
+
+        while True:
+            if order == "desc":
+                entries: Any = self.conn.xrevrange(
+                    REDIS_STREAM_KEY, end, start, count=chunk_size
+                )
+            else:
+                entries = self.conn.xrange(
+                    REDIS_STREAM_KEY, start, end, count=chunk_size
+                )
+
+            for entry_id, fields in entries:
+                yield _decode(entry_id), fields
+
+            if len(entries) < chunk_size:
+                break
+
+            last_id = _decode(entries[-1][0])
+
+            if order == "desc":
+                end = _get_previous_entry_id(last_id)
+            else:
+                start = _get_next_entry_id(last_id)
+
+    def remove_event(self, event_id: str) -> types.Result:
+        """Removes an event by its ID.
+
+        Args:
+            event_id (str): event ID.
+
+        Returns:
+            types.Result: result of the operation.
+        """
+        entry = self._find_entry(event_id)
+
+        if entry is None or not self.conn.xdel(REDIS_STREAM_KEY, entry[0]):
+            return types.Result(status=False, message="Event not found")
+
+        self.conn.zrem(REDIS_STREAM_IDS_KEY, event_id)
+
+        return types.Result(status=True, message="Event removed successfully")
+
+    def remove_all_events(self) -> types.Result:
+        """Removes all events from the repository.
+
+        Consumer groups are removed as well. Keys are removed with `UNLINK`,
+        that is available on every server with streams, so the server isn't
+        blocked by a large stream.
+
+        Returns:
+            types.Result: result of the operation.
+        """
+        self.conn.unlink(REDIS_STREAM_KEY, REDIS_STREAM_IDS_KEY)
+
+        return types.Result(status=True, message="All events removed successfully")
+
+    def create_consumer_group(self, group: str, start: str = "$") -> bool:
+        """Create a consumer group, if it doesn't exist yet.
+
+        Args:
+            group (str): name of the group.
+            start (str, optional): the stream entry ID, after which the group
+                reads events. `$` means new events only, `0` - all events.
+
+        Returns:
+            bool: whether the group was created.
+        """
+        try:
+            self.conn.xgroup_create(REDIS_STREAM_KEY, group, start, mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+            return False
+
+        return True
+
+    def consume(
+        self,
+        group: str,
+        consumer: str,
+        count: int = 100,
+        block: int | None = None,
+    ) -> list[tuple[str, types.Event]]:
+        """Read events, not yet delivered to the consumer group.
+
+        Every event must be acknowledged with `ack` after processing,
+        otherwise it stays in the pending list of the group.
+
+        Example:
+            ```python
+            repo.create_consumer_group("archive")
+
+            for message_id, event in repo.consume("archive", "worker-1"):
+                archive(event)
+                repo.ack("archive", message_id)
+            ```
+
+        Args:
+            group (str): name of the group.
+            consumer (str): name of the consumer inside the group.
+            count (int, optional): maximum number of events.
+            block (int | None, optional): wait for new events this number of
+                milliseconds.
+
+        Returns:
+            list[tuple[str, types.Event]]: message IDs and events.
+        """
+        response: Any = self.conn.xreadgroup(
+            group, consumer, {REDIS_STREAM_KEY: ">"}, count=count, block=block
+        )
+
+        return [
+            (_decode(entry_id), _parse_entry(fields))
+            for _, entries in response or []
+            for entry_id, fields in entries
+        ]
+
+    def ack(self, group: str, *message_ids: str) -> int:
+        """Acknowledge processed messages of the consumer group.
+
+        Args:
+            group (str): name of the group.
+            *message_ids (str): IDs returned by `consume`.
+
+        Returns:
+            int: number of acknowledged messages.
+        """
+        if not message_ids:
+            return 0
+
+        return self.conn.xack(REDIS_STREAM_KEY, group, *message_ids)  # type: ignore
+
+    def test_connection(self) -> bool:
+        """Tests the connection to the repository.
+
+        Returns:
+            bool: whether the connection was successful.
+        """
+        return True
+
+
+def _parse_entry(fields: dict[Any, Any]) -> types.Event:
+    data = fields.get(b"data", fields.get("data"))
+
+    return types.Event.model_validate_json(data)
+
+
+def _get_entry_id(moment: dt) -> str:
+    """Get the stream entry ID that corresponds to the moment."""
+    return str(int(moment.timestamp() * 1000))
+
+
+def _get_entry_milliseconds(entry_id: str) -> int:
+    """Get the millisecond of the write from the stream entry ID."""
+    milliseconds, _ = entry_id.split("-")
+
+    return int(milliseconds)
+
+
+def _get_entry_time(entry_id: str) -> dt:
+    """Get the time of the write from the stream entry ID."""
+    return dt.fromtimestamp(_get_entry_milliseconds(entry_id) / 1000, tz=timezone.utc)
+
+
+def _get_next_entry_id(entry_id: str) -> str:
+    """Get the smallest possible stream entry ID after the given one."""
+    milliseconds, sequence = entry_id.split("-")
+
+    return f"{milliseconds}-{int(sequence) + 1}"
+
+
+def _get_previous_entry_id(entry_id: str) -> str:
+    """Get the greatest possible stream entry ID before the given one."""
+    milliseconds, sequence = entry_id.split("-")
+
+    if int(sequence):
+        return f"{milliseconds}-{int(sequence) - 1}"
+
+    return f"{int(milliseconds) - 1}-{MAX_ENTRY_SEQUENCE}"
+
+
+def _decode(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,227 @@
+"""Retries, rate limiting and circuit breaking for remote repositories."""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class RetryPolicy:
+    """Retry failed calls with the exponential backoff and full jitter.
+
+    The delay before the n-th retry is a random number between zero and
+    `base_delay * 2 ** n`, but not more than `max_delay`, so retries of
+    different processes don't hit the service at the same moment.
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 5.0
+
+    def get_delay(self, attempt: int) -> float:
+        """Get the delay before the retry, in seconds.
+
+        Args:
+            attempt (int): number of the retry, starting from zero.
+        """
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+
+        # the jitter only spreads the retries, it doesn't need a secure source
+        return random.uniform(0, delay)  # noqa: S311
+
+    def call(
+        self,
+        func: Callable[[], T],
+        is_retryable: Callable[[Exception], bool],
+    ) -> T:
+        """Call the function, retrying it on the retryable errors.
+
+        Args:
+            func (Callable[[], T]): function to call.
+            is_retryable (Callable[[Exception], bool]): whether the error
+                is transient and the call may be retried.
+
+        Returns:
+            T: result of the function.
+
+        Raises:
+            Exception: the last error, if it's not retryable or there are no
+                attempts left.
+        """
+        for attempt in range(self.attempts):
+            try:
+                return func()
+            except Exception as e:  # noqa: PERF203
+                if not is_retryable(e):
+                    raise
+
+                delay = self.get_delay(attempt)
+                log.warning("Retrying in %.2fs after the error: %s", delay, e)
+                time.sleep(delay)
+
+        return func()
+
+
+class TokenBucket:
+    """Limit the rate of requests.
+
+    The bucket is refilled with `rate` tokens per second, up to `capacity`
+    tokens. Every request takes a token, waiting for it if the bucket is
+    empty. The bucket is shared between threads.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        """Token bucket.
+
+        Args:
+            rate (float): tokens per second, zero disables the limit.
+            capacity (float | None, optional): size of the burst. Defaults
+                to the rate.
+        """
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Take tokens from the bucket, waiting until they are available.
+
+        Tokens are reserved before waiting, so concurrent callers are served
+        in order.
+
+        Args:
+            tokens (float, optional): number of tokens to take.
+
+        Returns:
+            float: the wait time, in seconds.
+        """
+        if self.rate <= 0:
+            return 0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+
+        return wait
+
+
+class CircuitBreaker:
+    """Stop calling the service, that keeps failing.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects calls for `reset_timeout` seconds. Then it's half-open: a single
+    probe call is allowed and either closes the breaker on success, or opens
+    it again on failure. Other calls are rejected while the probe is running.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """Circuit breaker.
+
+        Args:
+            failure_threshold (int): number of consecutive failures, that
+                opens the breaker. Zero disables the breaker.
+            reset_timeout (float): time in seconds, before a call is
+                allowed again.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._failures = 0
+        self._opened_at: float | None = None
+        # start of the probe call in the half-open state
+        self._probe_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        """Check if the call is allowed.
+
+        In the half-open state, the call becomes the probe. If the probe
+        doesn't report its result, the next probe is allowed after the
+        `reset_timeout`.
+        """
+        state = self.state
+
+        if state != self.HALF_OPEN:
+            return state == self.CLOSED
+
+        with self._lock:
+            now = time.monotonic()
+
+            if self._probe_at is not None and now - self._probe_at < self.reset_timeout:
+                return False
+
+            self._probe_at = now
+
+        return True
+
+    def get_wait_time(self) -> float:
+        """Get the time in seconds, before the next call may be allowed."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+
+            now = time.monotonic()
+            wait = self._opened_at + self.reset_timeout - now
+
+            # the running probe blocks other calls until its timeout
+            if wait <= 0 and self._probe_at is not None:
+                wait = self._probe_at + self.reset_timeout - now
+
+            return max(wait, 0)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_at = None
+
+    def record_failure(self):
+        if self.failure_threshold <= 0:
+            return
+
+        with self._lock:
+            self._failures += 1
+
+            # a failed call in the half-open state opens the breaker again
+            if self._opened_at is None and self._failures < self.failure_threshold:
+                return
+
+            if self._opened_at is None:
+                log.warning("Circuit breaker is open after %s failures", self._failures)
+
+            self._opened_at = time.monotonic()
+            self._probe_at = None
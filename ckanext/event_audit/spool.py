@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from ckanext.event_audit import config, types
+
+log = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".wal"
+REPLAY_PREFIX = "replay-"
+
+
+class EventSpool:
+    """Write-ahead log of the queued events.
+
+    Events are appended to the segment file of the process before they are
+    queued, and acknowledged after they are written to the repository.
+    Once all the events of the segment are acknowledged, the segment is
+    removed, or truncated, if it's the current one. Segments are rotated,
+    when they grow over `segment_size` bytes.
+
+    Every append is flushed to the OS, so events survive the crash of the
+    process, but `fsync` is called at most once per `fsync_interval`
+    seconds, to survive the crash of the server.
+
+    Events, that failed to be written, are `release`d: their segments are
+    kept on disk, once the rest of their events are acknowledged.
+
+    Segments, left by the processes, that are not running anymore, and the
+    released segments of the current process are replayed with `replay`.
+    Delivery is at-least-once: events of a partially acknowledged segment
+    are written again.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        segment_size: int | None = None,
+        fsync_interval: float | None = None,
+    ):
+        """Event spool.
+
+        Args:
+            path (str | None, optional): directory of the segments. If not
+                specified, the configured spool directory will be used.
+            segment_size (int | None, optional): size of a segment in bytes.
+            fsync_interval (float | None, optional): time between `fsync`
+                calls in seconds.
+        """
+        self.path = Path(path or config.get_spool_path(), "wal")
+        self.segment_size = segment_size or config.get_spool_segment_size()
+        self.fsync_interval = (
+            config.get_spool_fsync_interval()
+            if fsync_interval is None
+            else fsync_interval
+        )
+        self.prefix = f"{socket.gethostname()}-{os.getpid()}-"
+
+        self._lock = threading.Lock()
+        self._file: IO[str] | None = None
+        self._segment: str | None = None
+        self._sequence = 0
+        self._synced_at = time.monotonic()
+
+        # number of not acknowledged events per segment
+        self._pending: dict[str, int] = {}
+        self._segments: dict[str, str] = {}
+        # segments with released events, that are kept for the replay
+        self._released: set[str] = set()
+
+    def append(self, event: types.Event):
+        """Store the event, before it's queued."""
+        line = event.model_dump_json() + "\n"
+
+        with self._lock:
+            f = self._get_file()
+            f.write(line)
+            f.flush()
+
+            segment: str = self._segment  # type: ignore
+            self._segments[str(event.id)] = segment
+            self._pending[segment] = self._pending.get(segment, 0) + 1
+
+            if time.monotonic() - self._synced_at >= self.fsync_interval:
+                self._sync()
+
+            if f.tell() >= self.segment_size:
+                self._close()
+
+    def ack(self, events: Iterable[types.Event]):
+        """Acknowledge events, that are written or dropped deliberately."""
+        with self._lock:
+            for event in events:
+                segment = self._segments.pop(str(event.id), None)
+
+                if segment is not None:
+                    self._settle(segment)
+
+    def release(self, events: Iterable[types.Event]):
+        """Keep events, that failed to be written, for the replay."""
+        with self._lock:
+            for event in events:
+                segment = self._segments.pop(str(event.id), None)
+
+                if segment is not None:
+                    self._released.add(segment)
+                    self._settle(segment)
+
+    def replay(self) -> Iterator[tuple[str, list[types.Event]]]:
+        """Claim the segments of stopped processes and read their events.
+
+        Every segment is renamed to the name of the current process first,
+        so it's claimed by a single process. Call `remove` once its events
+        are written, otherwise the segment is replayed again by the next
+        call.
+
+        Returns:
+            Iterator[tuple[str, list[types.Event]]]: claimed segments and
+                their events.
+        """
+        for name in self._get_orphans():
+            claimed = name
+
+            if not name.startswith(f"{self.prefix}{REPLAY_PREFIX}"):
+                claimed = f"{self.prefix}{REPLAY_PREFIX}{name}"
+
+                try:
+                    (self.path / name).rename(self.path / claimed)
+                except FileNotFoundError:
+                    continue
+
+            yield claimed, list(self._read(claimed))
+
+    def remove(self, segment: str):
+        """Remove the replayed segment."""
+        (self.path / segment).unlink(missing_ok=True)
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _get_file(self) -> IO[str]:
+        if self._file is not None:
+            return self._file
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        # skip segments of the previous process with the same PID
+        while True:
+            self._sequence += 1
+            segment = f"{self.prefix}{self._sequence:06d}{SEGMENT_SUFFIX}"
+
+            if not (self.path / segment).exists():
+                break
+
+        self._segment = segment
+        self._file = (self.path / segment).open("a", encoding="utf-8")
+
+        return self._file
+
+    def _sync(self):
+        if self._file:
+            os.fsync(self._file.fileno())
+
+        self._synced_at = time.monotonic()
+
+    def _settle(self, segment: str):
+        """Count the acknowledged or released event of the segment.
+
+        Once all the events of the segment are settled, it's removed, or
+        truncated, if it's the current one. The segment with released events
+        is closed and kept for the replay instead.
+        """
+        self._pending[segment] -= 1
+
+        if self._pending[segment] > 0:
+            return
+
+        del self._pending[segment]
+
+        if segment == self._segment:
+            if segment in self._released:
+                self._close()
+            elif self._file:
+                self._file.seek(0)
+                self._file.truncate()
+        elif segment not in self._released:
+            (self.path / segment).unlink(missing_ok=True)
+
+        self._released.discard(segment)
+
+    def _close(self):
+        """Close the current segment, removing it, if it's acknowledged."""
+        if self._file is None:
+            return
+
+        self._sync()
+        self._file.close()
+
+        segment: str = self._segment  # type: ignore
+
+        if not self._pending.get(segment) and segment not in self._released:
+            (self.path / segment).unlink(missing_ok=True)
+
+        self._file = None
+        self._segment = None
+
+    def _get_orphans(self) -> list[str]:
+        """Get the segments of the processes, that are not running anymore."""
+        try:
+            names = sorted(path.name for path in self.path.iterdir())
+        except FileNotFoundError:
+            return []
+
+        hostname = socket.gethostname()
+        orphans: list[str] = []
+
+        for name in names:
+            # segments of the current process, that are still in use
+            if (
+                not name.endswith(SEGMENT_SUFFIX)
+                or name == self._segment
+                or name in self._pending
+            ):
+                continue
+
+            host, pid = _get_owner(name)
+
+            if host != hostname or not pid.isdigit():
+                continue
+
+            if int(pid) == os.getpid() or not is_running(int(pid)):
+                orphans.append(name)
+
+        return orphans
+
+    def _read(self, segment: str) -> Iterator[types.Event]:
+        with (self.path / segment).open(encoding="utf-8") as f:
+            for line in f:
+                # the last line might be incomplete, if the process crashed
+                if not line.endswith("\n"):
+                    break
+
+                try:
+                    yield types.Event.model_validate_json(line)
+                except ValueError:
+                    log.exception("Skipping invalid record of %s", segment)
+
+
+def _get_owner(segment: str) -> tuple[str, str]:
+    """Get the hostname and the PID of the process, that owns the segment.
+
+    Segments are named `{hostname}-{pid}-{sequence}.wal`, and replayed ones
+    are prefixed with `{hostname}-{pid}-replay-` of the claimant.
+    """
+    if f"-{REPLAY_PREFIX}" in segment:
+        owner = segment.split(f"-{REPLAY_PREFIX}", 1)[0]
+    else:
+        owner = segment.rpartition("-")[0]
+
+    host, _, pid = owner.rpartition("-")
+
+    return host, pid
+
+
+def is_running(pid: int) -> bool:
+    """Check if the process with the PID is running on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
@@ -0,0 +1,85 @@
+"""Compare the write paths of the postgres repository.
+
+Benchmarks are excluded from the default test run, use the marker to run them:
+
+    pytest --ckan-ini=test.ini -m benchmark ckanext/event_audit/tests/benchmarks
+
+The timings are attached to the test report as user properties.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Callable
+
+import pytest
+
+from ckanext.event_audit import config, const, model, types
+from ckanext.event_audit.repositories import PostgresRepository
+
+log = logging.getLogger(__name__)
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def _generate_events(size: int) -> list[types.Event]:
+    return [
+        types.Event(
+            category=const.Category.API.value,
+            action="package_create",
+            action_object="package",
+            action_object_id=str(i),
+            result={"id": str(i), "name": f"dataset-{i}"},
+            payload={"name": f"dataset-{i}", "title": f"Dataset {i}"},
+        )
+        for i in range(size)
+    ]
+
+
+def _save_per_row(repo: PostgresRepository, events: list[types.Event]):
+    for event in events:
+        model.EventModel(**event.model_dump()).save(
+            session=repo.session, defer_commit=True
+        )
+
+    repo.session.commit()
+
+
+@pytest.mark.benchmark
+@pytest.mark.usefixtures("with_plugins", "clean_db")
+@pytest.mark.ckan_config(config.CONF_DATABASE_TRACK_ENABLED, False)
+@pytest.mark.ckan_config(config.CONF_ACTIVE_REPO, "postgres")
+class TestPostgresWriteBenchmark:
+    @pytest.mark.parametrize("size", SIZES)
+    @pytest.mark.parametrize("mode", ["per_row", "insert", "copy_csv", "copy_binary"])
+    def test_write(
+        self,
+        mode: str,
+        size: int,
+        repo: PostgresRepository,
+        ckan_config: dict[str, Any],
+        monkeypatch: pytest.MonkeyPatch,
+        record_property: Callable[[str, Any], None],
+    ):
+        events = _generate_events(size)
+
+        if mode.startswith("copy_"):
+            monkeypatch.setitem(
+                ckan_config, config.CONF_POSTGRES_COPY_FORMAT, mode[len("copy_") :]
+            )
+
+        start = time.perf_counter()
+
+        if mode == "per_row":
+            _save_per_row(repo, events)
+        else:
+            assert repo.write_events(events).status
+
+        elapsed = time.perf_counter() - start
+
+        record_property("seconds", round(elapsed, 3))
+        record_property("events_per_second", round(size / elapsed))
+        log.warning("%s, %s events: %.3fs", mode, size, elapsed)
+
+        assert repo.session.query(model.EventModel).count() == size
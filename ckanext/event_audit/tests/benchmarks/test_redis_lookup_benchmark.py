@@ -0,0 +1,95 @@
+"""Measure the lookup latency of the redis repository by the number of events.
+
+Benchmarks are excluded from the default test run, use the marker to run them:
+
+    pytest --ckan-ini=test.ini -m benchmark ckanext/event_audit/tests/benchmarks
+
+The repository is filled incrementally and the average latency of
+`get_event` and `remove_event` is measured at each size. The timings are
+attached to the test report as user properties.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import time
+from typing import Any, Callable
+
+import pytest
+
+from ckanext.event_audit import config, const, types
+from ckanext.event_audit.repositories import RedisRepository
+
+log = logging.getLogger(__name__)
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+SAMPLES = 1000
+CHUNK_SIZE = 10_000
+
+
+def _fill(repo: RedisRepository, ids: list[str], count: int):
+    for start in range(0, count, CHUNK_SIZE):
+        pipe = repo.conn.pipeline(transaction=False)
+
+        events = [
+            types.Event(
+                category=const.Category.API.value,
+                action="package_show",
+                action_object="package",
+                action_object_id=str(i),
+            )
+            for i in range(start, min(start + CHUNK_SIZE, count))
+        ]
+        repo._add_events(pipe, events)
+        ids.extend(event.id for event in events)
+
+        pipe.execute()
+
+
+def _measure(operation: Callable[[str], Any], ids: list[str]) -> float:
+    start = time.perf_counter()
+
+    for event_id in ids:
+        operation(event_id)
+
+    return (time.perf_counter() - start) / len(ids)
+
+
+@pytest.mark.benchmark
+@pytest.mark.usefixtures("with_plugins", "clean_redis")
+@pytest.mark.ckan_config(config.CONF_DATABASE_TRACK_ENABLED, False)
+@pytest.mark.ckan_config(config.CONF_ACTIVE_REPO, "redis")
+class TestRedisLookupBenchmark:
+    def test_lookup(
+        self,
+        repo: RedisRepository,
+        record_property: Callable[[str, Any], None],
+    ):
+        ids: list[str] = []
+        latencies: dict[int, float] = {}
+
+        for size in SIZES:
+            _fill(repo, ids, size - len(ids))
+            sample = random.sample(ids, SAMPLES)
+
+            get_latency = _measure(repo.get_event, sample)
+            remove_latency = _measure(repo.remove_event, sample)
+
+            # put the removed events back, to keep the size
+            removed = set(sample)
+            ids[:] = [event_id for event_id in ids if event_id not in removed]
+            _fill(repo, ids, SAMPLES)
+
+            latencies[size] = get_latency
+            record_property(f"get_event_{size}_ms", round(get_latency * 1000, 4))
+            record_property(f"remove_event_{size}_ms", round(remove_latency * 1000, 4))
+            log.warning(
+                "%s events: get %.4fms, remove %.4fms",
+                size,
+                get_latency * 1000,
+                remove_latency * 1000,
+            )
+
+        # constant-time lookups: allow for noise, but not for linear growth
+        assert latencies[SIZES[-1]] < latencies[SIZES[0]] * 5
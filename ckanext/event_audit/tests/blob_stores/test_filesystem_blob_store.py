@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import pathlib
+
+import pytest
+
+from ckanext.event_audit.blob_stores import FileSystemBlobStore
+
+
+class TestFileSystemBlobStore:
+    def test_put_and_get(self, tmp_path: pathlib.Path):
+        store = FileSystemBlobStore(str(tmp_path))
+
+        store.put("event-id", b"data")
+
+        assert store.get("event-id") == b"data"
+
+    def test_replace(self, tmp_path: pathlib.Path):
+        store = FileSystemBlobStore(str(tmp_path))
+
+        store.put("event-id", b"data")
+        store.put("event-id", b"new data")
+
+        assert store.get("event-id") == b"new data"
+
+    def test_missing_blob(self, tmp_path: pathlib.Path):
+        assert FileSystemBlobStore(str(tmp_path)).get("event-id") is None
+
+    @pytest.mark.parametrize("key", ["", ".", "..", "../event-id", "a/b"])
+    def test_invalid_key(self, tmp_path: pathlib.Path, key: str):
+        store = FileSystemBlobStore(str(tmp_path))
+
+        with pytest.raises(ValueError, match="Invalid blob key"):
+            store.put(key, b"data")
+
+    def test_remove_all(self, tmp_path: pathlib.Path):
+        store = FileSystemBlobStore(str(tmp_path / "blobs"))
+
+        store.put("event-id", b"data")
+        store.remove_all()
+
+        assert store.get("event-id") is None
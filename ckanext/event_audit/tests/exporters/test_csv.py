@@ -76,3 +76,24 @@ class TestCSVExporter:
 
         with pytest.raises(TypeError, match='bad "quoting" value'):
             exporter.export([event_factory() for _ in range(5)])
+
+    def test_stream(self, event_factory: Callable[..., types.Event]):
+        events = [event_factory() for _ in range(5)]
+        exporter = exporters.CSVExporter()
+
+        chunks = list(exporter.stream(events))
+
+        # header goes with the first row
+        assert len(chunks) == 5
+        assert "".join(chunks) == exporter.export(events)
+
+    def test_stream_from_filters_with_events(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        events = [event_factory() for _ in range(5)]
+        repo.write_events(events)
+
+        result = "".join(exporters.CSVExporter().stream_from_filters(types.Filters()))
+
+        for event in events:
+            assert event.id in result
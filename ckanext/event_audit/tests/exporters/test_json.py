@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from typing import Callable
 
 import pytest
@@ -52,3 +53,15 @@ class TestJSONExporter:
         assert result
         assert isinstance(result, list)
         assert isinstance(result[0], dict)
+
+    def test_stream(self, event_factory: Callable[..., types.Event]):
+        events = [event_factory() for _ in range(5)]
+        exporter = exporters.JSONExporter()
+
+        result = "".join(exporter.stream(events))
+
+        assert json.loads(result) == [event.model_dump() for event in events]
+        assert result == exporter.export(events)
+
+    def test_stream_no_events(self):
+        assert list(exporters.JSONExporter().stream([])) == []
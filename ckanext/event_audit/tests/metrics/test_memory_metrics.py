@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import pytest
+
+from ckanext.event_audit.metrics import InMemoryMetrics, NullMetrics, base
+
+
+class TestInMemoryMetrics:
+    def test_counter(self):
+        metrics = InMemoryMetrics()
+
+        metrics.inc(base.WRITE_FAILURES, labels={"repository": "redis"})
+        metrics.inc(base.WRITE_FAILURES, 2, labels={"repository": "redis"})
+
+        assert metrics.get_value(base.WRITE_FAILURES, {"repository": "redis"}) == 3
+        assert not metrics.get_value(base.WRITE_FAILURES, {"repository": "mongo"})
+
+    def test_gauge(self):
+        metrics = InMemoryMetrics()
+
+        metrics.set(base.QUEUE_SIZE, 10)
+        metrics.set(base.QUEUE_SIZE, 5)
+
+        assert metrics.get_value(base.QUEUE_SIZE) == 5
+
+    def test_histogram(self):
+        metrics = InMemoryMetrics()
+
+        for value in (1, 3, 2000):
+            metrics.observe(base.BATCH_SIZE, value)
+
+        histogram = metrics.get_histogram(base.BATCH_SIZE)
+
+        assert histogram
+        assert histogram.count == 3
+        assert histogram.sum == 2004
+        assert histogram.counts[:2] == [1, 1]
+
+    def test_render(self):
+        metrics = InMemoryMetrics()
+
+        metrics.inc(base.EVENTS_WRITTEN, 3, {"repository": "redis"})
+        metrics.observe(base.WRITE_DURATION, 0.2, {"repository": "redis"})
+
+        lines = metrics.render().splitlines()
+
+        assert "# TYPE event_audit_events_written_total counter" in lines
+        assert 'event_audit_events_written_total{repository="redis"} 3' in lines
+        assert "# TYPE event_audit_write_duration_seconds histogram" in lines
+        assert (
+            'event_audit_write_duration_seconds_bucket{repository="redis",le="0.1"} 0'
+            in lines
+        )
+        assert (
+            'event_audit_write_duration_seconds_bucket{repository="redis",le="0.25"} 1'
+            in lines
+        )
+        assert (
+            'event_audit_write_duration_seconds_bucket{repository="redis",le="+Inf"} 1'
+            in lines
+        )
+        assert 'event_audit_write_duration_seconds_count{repository="redis"} 1' in lines
+
+    def test_render_escapes_labels(self):
+        metrics = InMemoryMetrics()
+
+        metrics.inc(base.EVENTS_SKIPPED, labels={"category": 'a"b\nc'})
+
+        assert 'category="a\\"b\\nc"' in metrics.render()
+
+    def test_render_without_metrics(self):
+        assert InMemoryMetrics().render() == ""
+
+
+class TestNullMetrics:
+    def test_render_is_not_supported(self):
+        metrics = NullMetrics()
+        metrics.inc(base.EVENTS_WRITTEN)
+
+        with pytest.raises(NotImplementedError):
+            metrics.render()
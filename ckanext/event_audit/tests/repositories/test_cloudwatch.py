@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import json
+import os
+import pathlib
+import secrets
 from datetime import datetime as dt
 from datetime import timedelta as td
 from datetime import timezone as tz
 from typing import Any, Callable
 
 import pytest
-from botocore.stub import Stubber
+from botocore.stub import ANY, Stubber
 
-from ckanext.event_audit import const, types
+from ckanext.event_audit import config, const, resilience, types
+from ckanext.event_audit.blob_stores import FileSystemBlobStore
+from ckanext.event_audit.repositories import cloudwatch
 from ckanext.event_audit.repositories.cloudwatch import CloudWatchRepository
 
+LARGE_DATA_SIZE = 200_000  # bytes of random data, 400KB in hex
+
 put_log_events_response: dict[str, Any] = {
     "nextSequenceToken": "49654796026243824240318171692305216662718669063406487010",
     "ResponseMetadata": {
@@ -47,6 +55,196 @@ class TestCloudWatchRepository:
 
         assert result.status
 
+    def test_write_events_in_batches(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event_factory: Callable[..., types.Event],
+    ):
+        repo, stubber = cloudwatch_repo
+        now = dt.now(tz.utc)
+
+        recent = event_factory(timestamp=now.isoformat())
+        older = event_factory(timestamp=(now - td(hours=1)).isoformat())
+        oldest = event_factory(timestamp=(now - td(days=2)).isoformat())
+
+        stubber.add_response("create_log_stream", {})
+
+        # events are sorted and split by the 24 hours span
+        for batch in [[oldest], [older, recent]]:
+            stubber.add_response(
+                "put_log_events",
+                put_log_events_response,
+                {
+                    "logGroupName": repo.log_group,
+                    "logStreamName": repo.log_stream,
+                    "logEvents": [
+                        repo._build_log_events(event)[0][0] for event in batch
+                    ],
+                },
+            )
+
+        with stubber:
+            result = repo.write_events([recent, oldest, older])
+
+        assert result.status
+        assert result.message == "3 event(s) written successfully"
+        stubber.assert_no_pending_responses()
+
+    def test_only_unwritten_events_are_retried(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event_factory: Callable[..., types.Event],
+    ):
+        repo, stubber = cloudwatch_repo
+        now = dt.now(tz.utc)
+
+        recent = event_factory(timestamp=now.isoformat())
+        older = event_factory(timestamp=(now - td(hours=1)).isoformat())
+        oldest = event_factory(timestamp=(now - td(days=2)).isoformat())
+
+        stubber.add_response("create_log_stream", {})
+        stubber.add_response("put_log_events", put_log_events_response)
+        stubber.add_client_error("put_log_events", "ServiceUnavailableException")
+
+        with stubber:
+            result = repo.write_events([recent, oldest, older])
+
+        # the first batch is accepted, so it must not be sent again
+        assert not result.status
+        assert result.retry
+        assert result.unwritten == [older, recent]
+        stubber.assert_no_pending_responses()
+
+    def test_write_events_failure(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event: types.Event,
+    ):
+        repo, stubber = cloudwatch_repo
+
+        stubber.add_response("create_log_stream", {})
+        stubber.add_client_error("put_log_events", "ServiceUnavailableException")
+
+        with stubber:
+            result = repo.write_events([event])
+
+        assert not result.status
+
+    def test_log_stream_creation_failure(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event: types.Event,
+    ):
+        repo, stubber = cloudwatch_repo
+
+        stubber.add_client_error("create_log_stream", "AccessDeniedException")
+
+        with stubber:
+            result = repo.write_events([event])
+
+        assert not result.status
+        assert "AccessDeniedException" in (result.message or "")
+
+    def test_rejected_events(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event_factory: Callable[..., types.Event],
+    ):
+        repo, stubber = cloudwatch_repo
+
+        stubber.add_response("create_log_stream", {})
+        stubber.add_response(
+            "put_log_events",
+            {
+                **put_log_events_response,
+                "rejectedLogEventsInfo": {
+                    "tooOldLogEventEndIndex": 1,
+                    "tooNewLogEventStartIndex": 2,
+                },
+            },
+        )
+
+        with stubber:
+            result = repo.write_events([event_factory() for _ in range(3)])
+
+        # accepted events must not be written again
+        assert not result.status
+        assert not result.retry
+        assert (result.message or "").startswith("2 log event(s) rejected")
+
+    def test_log_stream_is_created_once(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event_factory: Callable[..., types.Event],
+    ):
+        repo, stubber = cloudwatch_repo
+
+        stubber.add_response("create_log_stream", {})
+        stubber.add_response("put_log_events", put_log_events_response)
+        stubber.add_response("put_log_events", put_log_events_response)
+
+        with stubber:
+            assert repo.write_event(event_factory()).status
+            assert repo.write_event(event_factory()).status
+
+        stubber.assert_no_pending_responses()
+
+    def test_log_stream_is_recreated(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event_factory: Callable[..., types.Event],
+    ):
+        repo, stubber = cloudwatch_repo
+
+        stubber.add_response("create_log_stream", {})
+        stubber.add_response("put_log_events", put_log_events_response)
+        stubber.add_client_error("put_log_events", "ResourceNotFoundException")
+        stubber.add_response("create_log_stream", {})
+        stubber.add_response("put_log_events", put_log_events_response)
+
+        with stubber:
+            assert repo.write_event(event_factory()).status
+            assert repo.write_event(event_factory()).status
+
+        stubber.assert_no_pending_responses()
+
+    def test_log_stream_template(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event: types.Event,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        repo, stubber = cloudwatch_repo
+        monkeypatch.setattr(repo, "log_stream_template", "{stream}/{date}/{pid}")
+        log_stream = "{}/{}/{}".format(
+            repo.log_stream, dt.now(tz.utc).strftime("%Y-%m-%d"), os.getpid()
+        )
+
+        stubber.add_response(
+            "create_log_stream",
+            {},
+            {"logGroupName": repo.log_group, "logStreamName": log_stream},
+        )
+        stubber.add_response("put_log_events", put_log_events_response)
+
+        with stubber:
+            assert repo.write_event(event).status
+
+        stubber.assert_no_pending_responses()
+
+    def test_iter_batches_limits(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(cloudwatch, "BATCH_COUNT_LIMIT", 3)
+        monkeypatch.setattr(cloudwatch, "BATCH_SIZE_LIMIT", 100)
+
+        log_events: list[tuple[cloudwatch.CloudWatchEvent, int]] = [
+            ({"timestamp": i, "message": "x"}, size)
+            for i, size in enumerate([10, 10, 10, 10, 60, 50])
+        ]
+
+        batches = list(cloudwatch._iter_batches(log_events))
+
+        assert [len(batch) for batch in batches] == [3, 2, 1]
+
     def test_get_event(
         self, cloudwatch_repo: tuple[CloudWatchRepository, Stubber], event: types.Event
     ):
@@ -177,7 +375,7 @@ class TestCloudWatchRepository:
     ):
         repo, _ = cloudwatch_repo
 
-        assert repo._get_event_dump(event) == event.model_dump_json()
+        assert repo._dump_messages(event)[0][0] == event.model_dump_json()
 
     def test_get_event_dump_large_event(
         self,
@@ -198,6 +396,401 @@ class TestCloudWatchRepository:
             payload=long_data,
         )
 
-        assert repo._get_event_dump(event) == event.model_dump_json(
+        assert repo._dump_messages(event)[0][0] == event.model_dump_json(
             exclude={"result", "payload"}
         )
+
+
+class TestCloudWatchResilience:
+    @pytest.fixture(autouse=True)
+    def breaker(self, ckan_config: dict[str, Any], monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setitem(ckan_config, config.CONF_CLOUDWATCH_BREAKER_THRESHOLD, 2)
+
+    def test_throttled_write_is_not_retried(
+        self, cloudwatch_repo: tuple[CloudWatchRepository, Stubber], event: types.Event
+    ):
+        repo, stubber = cloudwatch_repo
+
+        stubber.add_response("create_log_stream", {})
+        stubber.add_client_error("put_log_events", "ThrottlingException")
+
+        with stubber:
+            result = repo.write_event(event)
+
+        # the writer retries it
+        assert not result.status
+        assert result.retry
+        assert result.retry_after is None
+        stubber.assert_no_pending_responses()
+        assert repo._breaker.state == resilience.CircuitBreaker.CLOSED
+
+    def test_invalid_write_is_not_retried(
+        self, cloudwatch_repo: tuple[CloudWatchRepository, Stubber], event: types.Event
+    ):
+        repo, stubber = cloudwatch_repo
+
+        stubber.add_response("create_log_stream", {})
+        stubber.add_client_error("put_log_events", "InvalidParameterException")
+
+        with stubber:
+            result = repo.write_event(event)
+
+        assert not result.status
+        assert not result.retry
+        stubber.assert_no_pending_responses()
+        assert repo._breaker.state == resilience.CircuitBreaker.CLOSED
+
+    def test_breaker_is_open(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event_factory: Callable[..., types.Event],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        repo, stubber = cloudwatch_repo
+        event = event_factory()
+
+        stubber.add_response("create_log_stream", {})
+
+        for _ in range(2):
+            stubber.add_client_error("put_log_events", "ThrottlingException")
+
+        stubber.add_response(
+            "put_log_events",
+            put_log_events_response,
+            {
+                "logGroupName": repo.log_group,
+                "logStreamName": repo.log_stream,
+                "logEvents": [repo._build_log_events(event)[0][0]],
+            },
+        )
+
+        with stubber:
+            for _ in range(2):
+                result = repo.write_event(event)
+                assert not result.status
+                assert result.retry
+
+            assert repo._breaker.state == resilience.CircuitBreaker.OPEN
+
+            # no calls, while the breaker is open
+            result = repo.write_event(event)
+            assert not result.status
+            assert result.message == (
+                "CloudWatch is unavailable, 1 event(s) are not written"
+            )
+            # the batch waits until the breaker is half-open
+            assert 0 < (result.retry_after or 0) <= repo._breaker.reset_timeout
+
+            # the writer retries the failed events
+            monkeypatch.setattr(repo._breaker, "reset_timeout", 0)
+            result = repo.write_event(event)
+
+        assert result.status
+        assert repo._breaker.state == resilience.CircuitBreaker.CLOSED
+        stubber.assert_no_pending_responses()
+
+
+class TestCloudWatchOversize:
+    @pytest.fixture
+    def large_event(self, event_factory: Callable[..., types.Event]) -> types.Event:
+        # random data doesn't compress well, so it takes a few records
+        return event_factory(
+            result={"data": secrets.token_hex(LARGE_DATA_SIZE)},
+            payload={"key": "value"},
+        )
+
+    @pytest.mark.ckan_config(config.CONF_CLOUDWATCH_OVERSIZE_STRATEGY, "compress")
+    def test_compress(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event_factory: Callable[..., types.Event],
+    ):
+        repo, _ = cloudwatch_repo
+        long_data = {f"key_{i}": [f"value_{i}" for _ in range(100)] for i in range(120)}
+        event = event_factory(result=long_data, payload=long_data)
+
+        dump = repo._dump_messages(event)[0][0]
+
+        assert "_compressed" in json.loads(dump)
+        assert cloudwatch._get_message_size(dump) < cloudwatch.LOG_EVENT_SIZE_LIMIT
+        assert repo._parse_message(dump, 0) == event
+
+    @pytest.mark.ckan_config(config.CONF_CLOUDWATCH_OVERSIZE_STRATEGY, "compress")
+    def test_compress_fallback_to_drop(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        large_event: types.Event,
+    ):
+        repo, _ = cloudwatch_repo
+
+        assert repo._dump_messages(large_event)[0][0] == large_event.model_dump_json(
+            exclude={"result", "payload"}
+        )
+
+    @pytest.mark.ckan_config(config.CONF_CLOUDWATCH_OVERSIZE_STRATEGY, "split")
+    def test_split(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        large_event: types.Event,
+    ):
+        repo, stubber = cloudwatch_repo
+        log_events = [log_event for log_event, _ in repo._build_log_events(large_event)]
+        main, parts = log_events[0], log_events[1:]
+
+        assert len(parts) > 1
+        assert json.loads(main["message"])["_parts"] == len(parts)
+        assert all(
+            size <= cloudwatch.LOG_EVENT_SIZE_LIMIT
+            for _, size in repo._build_log_events(large_event)
+        )
+
+        stubber.add_response(
+            "filter_log_events", {"events": log_events}, {"logGroupName": ANY}
+        )
+        stubber.add_response(
+            "filter_log_events",
+            {"events": parts},
+            {
+                "logGroupName": repo.log_group,
+                "startTime": main["timestamp"],
+                "endTime": main["timestamp"],
+                "filterPattern": ANY,
+            },
+        )
+
+        with stubber:
+            result = repo.filter_events(types.Filters())
+
+        # continuation records are joined into the event
+        assert result == [large_event]
+        stubber.assert_no_pending_responses()
+
+    @pytest.mark.ckan_config(config.CONF_CLOUDWATCH_OVERSIZE_STRATEGY, "offload")
+    def test_offload(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        large_event: types.Event,
+        tmp_path: pathlib.Path,
+    ):
+        repo, _ = cloudwatch_repo
+        repo._blob_store = FileSystemBlobStore(str(tmp_path))
+
+        dump = repo._dump_messages(large_event)[0][0]
+
+        assert json.loads(dump)["_blob"] == large_event.id
+        assert repo.blob_store.get(large_event.id)
+        assert repo._parse_message(dump, 0) == large_event
+
+    @pytest.mark.ckan_config(config.CONF_CLOUDWATCH_OVERSIZE_STRATEGY, "offload")
+    def test_offloaded_blob_is_missing(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        large_event: types.Event,
+        tmp_path: pathlib.Path,
+    ):
+        repo, _ = cloudwatch_repo
+        repo._blob_store = FileSystemBlobStore(str(tmp_path))
+
+        dump = repo._dump_messages(large_event)[0][0]
+        repo.blob_store.remove_all()
+
+        event = repo._parse_message(dump, 0)
+
+        assert event
+        assert event.id == large_event.id
+        assert not event.result
+
+
+def _insights_row(event: types.Event) -> list[dict[str, str]]:
+    timestamp = dt.fromisoformat(event.timestamp).astimezone(tz.utc)
+    value = timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+    return [
+        {"field": "@timestamp", "value": value},
+        {"field": "@message", "value": event.model_dump_json()},
+    ]
+
+
+class TestCloudWatchInsights:
+    @pytest.fixture(autouse=True)
+    def insights(self, ckan_config: dict[str, Any], monkeypatch: pytest.MonkeyPatch):
+        for key, value in [
+            (config.CONF_CLOUDWATCH_QUERY_ENGINE, "insights"),
+            (config.CONF_CLOUDWATCH_QUERY_SLICE_HOURS, 1),
+            (config.CONF_CLOUDWATCH_QUERY_CONCURRENCY, 1),
+        ]:
+            monkeypatch.setitem(ckan_config, key, value)
+
+        monkeypatch.setattr(cloudwatch.time, "sleep", lambda _: None)
+
+    def test_filter_events(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event_factory: Callable[..., types.Event],
+    ):
+        repo, stubber = cloudwatch_repo
+        now = dt.now(tz.utc)
+        first = event_factory(timestamp=(now - td(minutes=90)).isoformat())
+        second = event_factory(timestamp=(now - td(minutes=30)).isoformat())
+
+        # two slices of an hour, queried one by one
+        for query_id, events in [("q1", [first]), ("q2", [second])]:
+            stubber.add_response(
+                "start_query",
+                {"queryId": query_id},
+                {
+                    "logGroupName": repo.log_group,
+                    "startTime": ANY,
+                    "endTime": ANY,
+                    "queryString": (
+                        'fields @timestamp, @message | filter action = "created"'
+                        " | sort @timestamp asc | limit 10000"
+                    ),
+                    "limit": 10000,
+                },
+            )
+            stubber.add_response(
+                "get_query_results",
+                {"status": "Running", "results": []},
+                {"queryId": query_id},
+            )
+            stubber.add_response(
+                "get_query_results",
+                {
+                    "status": "Complete",
+                    "results": [_insights_row(event) for event in events],
+                },
+                {"queryId": query_id},
+            )
+
+        with stubber:
+            result = repo.filter_events(
+                types.Filters(
+                    action="created", time_from=now - td(hours=2), time_to=now
+                )
+            )
+
+        assert [event.id for event in result] == [first.id, second.id]
+        stubber.assert_no_pending_responses()
+
+    def test_failed_query(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+    ):
+        repo, stubber = cloudwatch_repo
+        now = dt.now(tz.utc)
+
+        stubber.add_response("start_query", {"queryId": "q1"})
+        stubber.add_response("get_query_results", {"status": "Failed", "results": []})
+
+        with stubber, pytest.raises(RuntimeError, match="is Failed"):
+            repo.filter_events(types.Filters(time_from=now - td(minutes=30)))
+
+
+class TestCloudWatchParallelScan:
+    @pytest.fixture(autouse=True)
+    def parallel_scan(
+        self, ckan_config: dict[str, Any], monkeypatch: pytest.MonkeyPatch
+    ):
+        for key, value in [
+            (config.CONF_CLOUDWATCH_PARALLEL_SCAN, True),
+            (config.CONF_CLOUDWATCH_QUERY_SLICE_HOURS, 1),
+            (config.CONF_CLOUDWATCH_QUERY_CONCURRENCY, 1),
+        ]:
+            monkeypatch.setitem(ckan_config, key, value)
+
+    def test_filter_events(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event_factory: Callable[..., types.Event],
+    ):
+        repo, stubber = cloudwatch_repo
+        now = dt.now(tz.utc)
+        time_from = now - td(hours=3)
+
+        events = [
+            event_factory(timestamp=(now - td(minutes=minutes)).isoformat())
+            for minutes in [170, 100, 110, 30]
+        ]
+        # the last slice covers the inclusive end of the range
+        slices = [[events[0]], [events[1], events[2]], [events[3]], []]
+
+        for i, slice_events in enumerate(slices):
+            start = cloudwatch._to_milliseconds(time_from + td(hours=i))
+            stubber.add_response(
+                "filter_log_events",
+                {
+                    "events": [
+                        repo._build_log_events(event)[0][0] for event in slice_events
+                    ],
+                },
+                {
+                    "logGroupName": repo.log_group,
+                    "startTime": start,
+                    "endTime": ANY,
+                },
+            )
+
+        with stubber:
+            result = list(
+                repo.iter_events(types.Filters(time_from=time_from, time_to=now))
+            )
+
+        # slices are yielded in order, events inside the slice are sorted
+        assert [event.id for event in result] == [
+            events[0].id,
+            events[2].id,
+            events[1].id,
+            events[3].id,
+        ]
+        stubber.assert_no_pending_responses()
+
+    def test_descending_order(
+        self,
+        cloudwatch_repo: tuple[CloudWatchRepository, Stubber],
+        event_factory: Callable[..., types.Event],
+    ):
+        repo, stubber = cloudwatch_repo
+        now = dt.now(tz.utc)
+        time_from = now - td(hours=3)
+
+        events = [
+            event_factory(timestamp=(now - td(minutes=minutes)).isoformat())
+            for minutes in [170, 100, 110, 30]
+        ]
+        slices = [[events[0]], [events[1], events[2]], [events[3]], []]
+
+        # slices are read from the end of the range
+        for i, slice_events in reversed(list(enumerate(slices))):
+            start = cloudwatch._to_milliseconds(time_from + td(hours=i))
+            stubber.add_response(
+                "filter_log_events",
+                {
+                    "events": [
+                        repo._build_log_events(event)[0][0] for event in slice_events
+                    ],
+                },
+                {
+                    "logGroupName": repo.log_group,
+                    "startTime": start,
+                    "endTime": ANY,
+                },
+            )
+
+        with stubber:
+            result = repo.filter_events(
+                types.Filters(time_from=time_from, time_to=now, order="desc")
+            )
+
+        assert [event.id for event in result] == [
+            events[3].id,
+            events[1].id,
+            events[2].id,
+            events[0].id,
+        ]
+        stubber.assert_no_pending_responses()
+
+
+def test_split_time_range():
+    assert cloudwatch._split_time_range(0, 25, 10) == [(0, 10), (10, 20), (20, 25)]
+    assert cloudwatch._split_time_range(0, 0, 10) == []
@@ -1,3 +1,6 @@
+from __future__ import annotations
+
+import pathlib
 from datetime import datetime as dt
 from datetime import timedelta as td
 from datetime import timezone as tz
@@ -5,8 +8,11 @@ from typing import Callable
 
 import pytest
 
-from ckanext.event_audit import config, const, types
+from ckanext.event_audit import config, const, queues, types
 from ckanext.event_audit.repositories import PostgresRepository
+from ckanext.event_audit.repositories.postgres import Partition
+from ckanext.event_audit.spool import EventSpool
+from ckanext.event_audit.writer import EventWriteThread
 
 
 @pytest.mark.usefixtures("with_plugins", "clean_db")
@@ -17,6 +23,107 @@ class TestPostgresRepo:
         status = repo.write_event(event)
         assert status.status
 
+    def test_write_events(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        result = repo.write_events([event_factory() for _ in range(5)])
+
+        assert result.status
+        assert result.message == "5 event(s) written successfully"
+        assert len(repo.filter_events(types.Filters())) == 5
+
+    @pytest.mark.ckan_config(config.CONF_POSTGRES_INSERT_CHUNK_SIZE, 2)
+    def test_write_events_in_chunks(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        events = [event_factory() for _ in range(5)]
+        result = repo.write_events(events)
+
+        assert result.message == "5 event(s) written successfully"
+
+        for event in events:
+            loaded_event = repo.get_event(event.id)
+
+            assert loaded_event
+            assert loaded_event.model_dump() == event.model_dump()
+
+    def test_write_events_empty(self, repo: PostgresRepository):
+        result = repo.write_events([])
+
+        assert result.status
+        assert result.message == "0 event(s) written successfully"
+
+    @pytest.mark.parametrize("copy_format", ["csv", "binary", "xxx"])
+    def test_write_events_with_copy(
+        self,
+        copy_format: str,
+        event_factory: Callable[..., types.Event],
+        repo: PostgresRepository,
+        ckan_config: dict[str, str],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Unsupported COPY format falls back to INSERT."""
+        monkeypatch.setitem(ckan_config, config.CONF_POSTGRES_COPY_FORMAT, copy_format)
+
+        events = [
+            event_factory(
+                action_object='with "quotes", commas',
+                result={"key": ["value", 1]},
+                payload={"nested": {"key": None}},
+            )
+            for _ in range(5)
+        ]
+        result = repo.write_events(events)
+
+        assert result.status
+        assert result.message == "5 event(s) written successfully"
+
+        for event in events:
+            loaded_event = repo.get_event(event.id)
+
+            assert loaded_event
+            assert loaded_event.model_dump() == event.model_dump()
+
+    @pytest.mark.parametrize("copy_format", ["", "csv", "binary"])
+    def test_replay_partially_written_batch(
+        self,
+        copy_format: str,
+        event_factory: Callable[..., types.Event],
+        repo: PostgresRepository,
+        ckan_config: dict[str, str],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """The replayed segment contains events, that are already written."""
+        monkeypatch.setitem(ckan_config, config.CONF_POSTGRES_COPY_FORMAT, copy_format)
+
+        events = [event_factory() for _ in range(3)]
+        assert repo.write_events(events[:1]).status
+
+        assert repo.write_events(events).status
+        assert len(repo.filter_events(types.Filters())) == 3
+
+    def test_replay_partially_acked_segment(
+        self,
+        event_factory: Callable[..., types.Event],
+        repo: PostgresRepository,
+        tmp_path: pathlib.Path,
+    ):
+        stopped = EventSpool(str(tmp_path))
+        events = [event_factory() for _ in range(3)]
+
+        for event in events:
+            stopped.append(event)
+
+        repo.write_events(events[:1])
+        stopped.ack(events[:1])
+        stopped.close()
+
+        spool = EventSpool(str(tmp_path))
+        EventWriteThread(queues.BoundedEventQueue(spool=spool))._replay()
+
+        assert len(repo.filter_events(types.Filters())) == 3
+        assert not list(spool.path.iterdir())
+
     def test_get_event(self, event: types.Event, repo: PostgresRepository):
         repo.write_event(event)
         loaded_event = repo.get_event(event.id)
@@ -107,6 +214,106 @@ class TestPostgresRepo:
 
         assert len(events) == 5
 
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_paginate_events(
+        self,
+        order: str,
+        event_factory: Callable[..., types.Event],
+        repo: PostgresRepository,
+    ):
+        now = dt.now(tz.utc)
+        events = [
+            event_factory(timestamp=(now - td(minutes=i)).isoformat())
+            for i in range(5)
+        ]
+        # same timestamp, the order is decided by the id
+        events.append(event_factory(timestamp=events[0].timestamp))
+        repo.write_events(events)
+
+        expected = sorted(
+            events,
+            key=lambda event: (dt.fromisoformat(event.timestamp), event.id),
+            reverse=order == "desc",
+        )
+
+        filters = types.Filters(limit=2, order=order)  # type: ignore
+        loaded: list[types.Event] = []
+
+        while True:
+            page = repo.paginate_events(filters)
+            loaded.extend(page.events)
+
+            if not page.next_cursor:
+                break
+
+            assert len(page.events) == 2
+            filters = filters.model_copy(update={"cursor": page.next_cursor})
+
+        assert [event.id for event in loaded] == [event.id for event in expected]
+
+    def test_filter_events_limit(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        repo.write_events([event_factory() for _ in range(5)])
+
+        assert len(repo.filter_events(types.Filters(limit=3))) == 3
+
+    @pytest.mark.ckan_config(config.CONF_READ_CHUNK_SIZE, 2)
+    def test_iter_events(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        events = [event_factory(category="test") for _ in range(5)]
+        repo.write_events([*events, event_factory(category="test2")])
+
+        result = repo.iter_events(types.Filters(category="test"))
+
+        assert not isinstance(result, list)
+        assert {event.id for event in result} == {event.id for event in events}
+
+    @pytest.mark.ckan_config(config.CONF_READ_CHUNK_SIZE, 2)
+    def test_iter_events_with_limit(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        repo.write_events([event_factory() for _ in range(5)])
+
+        assert len(list(repo.iter_events(types.Filters(limit=3)))) == 3
+
+    def test_count_events(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        repo.write_events([event_factory(category="test") for _ in range(3)])
+        repo.write_events([event_factory(category="test2") for _ in range(2)])
+
+        assert repo.count_events(types.Filters()) == 5
+        assert repo.count_events(types.Filters(category="test", limit=1)) == 3
+
+    def test_aggregate(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        day = dt(2024, 1, 1, 12, tzinfo=tz.utc)
+        repo.write_events(
+            [
+                event_factory(action="created", timestamp=day.isoformat()),
+                event_factory(action="created", timestamp=day.isoformat()),
+                event_factory(action="deleted", timestamp=day.isoformat()),
+                event_factory(
+                    action="created", timestamp=(day + td(days=1)).isoformat()
+                ),
+            ]
+        )
+
+        result = repo.aggregate(types.Filters(), ["action"], "day")
+
+        assert [(item.bucket, item.group, item.count) for item in result] == [
+            (dt(2024, 1, 1, tzinfo=tz.utc), {"action": "created"}, 2),
+            (dt(2024, 1, 1, tzinfo=tz.utc), {"action": "deleted"}, 1),
+            (dt(2024, 1, 2, tzinfo=tz.utc), {"action": "created"}, 1),
+        ]
+
+    def test_aggregate_invalid_field(self, repo: PostgresRepository):
+        with pytest.raises(ValueError, match="Unsupported group by field"):
+            repo.aggregate(types.Filters(), ["payload"])
+
     def test_remove_event(self, event: types.Event, repo: PostgresRepository):
         repo.write_event(event)
         assert repo.get_event(event.id) is not None
@@ -150,3 +357,123 @@ class TestPostgresRepo:
 
         events = repo.filter_events(types.Filters())
         assert len(events) == 0
+
+    @pytest.mark.ckan_config(config.CONF_POSTGRES_DELETE_CHUNK_SIZE, 2)
+    def test_remove_filtered_events_in_chunks(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        repo.write_event(event_factory(category="test"))
+
+        for _ in range(5):
+            repo.write_event(event_factory(category="test2"))
+
+        status = repo.remove_events(types.Filters(category="test2"))
+        assert status.message == "5 event(s) removed successfully"
+
+        events = repo.filter_events(types.Filters())
+        assert len(events) == 1
+        assert events[0].category == "test"
+
+    def test_remove_events_by_id(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        event = event_factory()
+        repo.write_events([event, event_factory()])
+
+        status = repo.remove_events(types.Filters(id=event.id))
+        assert status.message == "1 event(s) removed successfully"
+
+        assert repo.get_event(event.id) is None
+        assert len(repo.filter_events(types.Filters())) == 1
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db")
+@pytest.mark.ckan_config(config.CONF_DATABASE_TRACK_ENABLED, False)
+@pytest.mark.ckan_config(config.CONF_ACTIVE_REPO, "postgres")
+class TestPostgresPartitions:
+    def test_table_is_partitioned(self, repo: PostgresRepository):
+        assert repo.is_partitioned()
+        assert repo.get_partitions() == []
+
+    @pytest.mark.parametrize("interval", ["month", "day"])
+    def test_create_partitions(self, interval: str, repo: PostgresRepository):
+        created = repo.create_partitions(ahead=2, interval=interval)
+
+        assert len(created) == 3
+        assert repo.get_partitions() == created
+        assert created[0] == Partition.for_moment(dt.now(tz.utc), interval)
+
+        # existing partitions are skipped
+        assert repo.create_partitions(ahead=2, interval=interval) == []
+
+    def test_create_partitions_moves_default_rows(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        old_event = event_factory(timestamp=(dt.now(tz.utc) - td(days=65)).isoformat())
+        repo.write_event(old_event)
+
+        created = repo.create_partitions(ahead=0, interval="month")
+
+        assert created[0] == Partition.for_moment(
+            dt.fromisoformat(old_event.timestamp), "month"
+        )
+        assert repo.get_event(old_event.id)
+
+    def test_expire_partitions(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        old_event = event_factory(timestamp=(dt.now(tz.utc) - td(days=95)).isoformat())
+        event = event_factory()
+        repo.write_events([old_event, event])
+        repo.create_partitions(ahead=0, interval="month")
+
+        expired = repo.expire_partitions(dt.now(tz.utc) - td(days=35))
+
+        assert (
+            Partition.for_moment(dt.fromisoformat(old_event.timestamp), "month")
+            in expired
+        )
+        assert Partition.for_moment(dt.now(tz.utc), "month") not in expired
+        assert not repo.get_event(old_event.id)
+        assert repo.get_event(event.id)
+
+    def test_remove_events_drops_partitions(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        partition = Partition.for_moment(dt.now(tz.utc) - td(days=1), "day")
+
+        repo.write_events(
+            [
+                event_factory(timestamp=(partition.start + td(hours=1)).isoformat())
+                for _ in range(3)
+            ]
+        )
+        repo.write_event(
+            event_factory(timestamp=(partition.start - td(hours=1)).isoformat())
+        )
+        repo.create_partitions(ahead=1, interval="day")
+
+        result = repo.remove_events(
+            types.Filters(time_from=partition.start, time_to=partition.end)
+        )
+
+        assert result.message == "3 event(s) removed successfully"
+        assert partition not in repo.get_partitions()
+        assert len(repo.filter_events(types.Filters())) == 1
+
+    def test_remove_events_keeps_current_partitions(
+        self, event_factory: Callable[..., types.Event], repo: PostgresRepository
+    ):
+        partitions = repo.create_partitions(ahead=1, interval="day")
+        tomorrow = partitions[-1].start + td(hours=1)
+
+        repo.write_events(
+            [event_factory(), event_factory(timestamp=tomorrow.isoformat())]
+        )
+
+        # only the start of the range is set, like `--start` of the CLI
+        result = repo.remove_events(types.Filters(time_from=partitions[0].start))
+
+        assert result.message == "2 event(s) removed successfully"
+        assert repo.get_partitions() == partitions
+        assert not repo.filter_events(types.Filters())
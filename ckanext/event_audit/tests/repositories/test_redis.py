@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from datetime import datetime as dt
 from datetime import timedelta as td
 from datetime import timezone as tz
@@ -7,6 +9,10 @@ import pytest
 
 from ckanext.event_audit import config, const, types
 from ckanext.event_audit.repositories import RedisRepository
+from ckanext.event_audit.repositories.redis import (
+    REDIS_BUCKETS_KEY,
+    REDIS_KEY_PREFIX,
+)
 
 
 @pytest.mark.usefixtures("clean_redis", "with_plugins")
@@ -22,6 +28,21 @@ class TestRedisRepo:
         assert isinstance(loaded_event, types.Event)
         assert event.model_dump() == loaded_event.model_dump()
 
+    @pytest.mark.ckan_config(config.CONF_REDIS_WRITE_CHUNK_SIZE, 2)
+    def test_write_events_in_chunks(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        events = [event_factory(category="test") for _ in range(5)]
+
+        result = repo.write_events(iter(events))
+
+        assert result.status
+        assert result.message == "5 event(s) written successfully"
+        assert repo.count_events(types.Filters(category="test")) == 5
+        assert {event.id for event in repo.filter_events(types.Filters())} == {
+            event.id for event in events
+        }
+
     def test_get_event_not_found(self, repo: RedisRepository):
         assert not repo.get_event(1)
 
@@ -95,6 +116,143 @@ class TestRedisRepo:
         assert len(events) == 1
         assert events[0].model_dump() == event.model_dump()
 
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_paginate_events(
+        self,
+        order: str,
+        event_factory: Callable[..., types.Event],
+        repo: RedisRepository,
+    ):
+        now = dt.now(tz.utc)
+        events = [
+            event_factory(timestamp=(now - td(minutes=i)).isoformat())
+            for i in range(5)
+        ]
+        # same timestamp, the order is decided by the id
+        events.append(event_factory(timestamp=events[0].timestamp))
+        repo.write_events(events)
+
+        expected = sorted(
+            events,
+            key=lambda event: (dt.fromisoformat(event.timestamp), event.id),
+            reverse=order == "desc",
+        )
+
+        filters = types.Filters(limit=2, order=order)  # type: ignore
+        loaded: list[types.Event] = []
+
+        while True:
+            page = repo.paginate_events(filters)
+            loaded.extend(page.events)
+
+            if not page.next_cursor:
+                break
+
+            assert len(page.events) == 2
+            filters = filters.model_copy(update={"cursor": page.next_cursor})
+
+        assert [event.id for event in loaded] == [event.id for event in expected]
+
+    def test_filter_events_limit(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        repo.write_events([event_factory() for _ in range(5)])
+
+        assert len(repo.filter_events(types.Filters(limit=3))) == 3
+
+    @pytest.mark.ckan_config(config.CONF_READ_CHUNK_SIZE, 2)
+    def test_iter_events(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        events = [event_factory(category="test") for _ in range(5)]
+        repo.write_events([*events, event_factory(category="test2")])
+
+        result = repo.iter_events(types.Filters(category="test"))
+
+        assert not isinstance(result, list)
+        assert {event.id for event in result} == {event.id for event in events}
+
+    @pytest.mark.ckan_config(config.CONF_READ_CHUNK_SIZE, 2)
+    def test_iter_events_with_limit(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        repo.write_events([event_factory() for _ in range(5)])
+
+        assert len(list(repo.iter_events(types.Filters(limit=3)))) == 3
+
+    def test_count_events(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        repo.write_events([event_factory(category="test") for _ in range(3)])
+        repo.write_events([event_factory(category="test2") for _ in range(2)])
+
+        assert repo.count_events(types.Filters()) == 5
+        assert repo.count_events(types.Filters(category="test")) == 3
+
+    def test_aggregate(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        hour = dt(2024, 1, 1, 12, tzinfo=tz.utc)
+        repo.write_events(
+            [
+                event_factory(action="created", timestamp=hour.isoformat()),
+                event_factory(
+                    action="created", timestamp=(hour + td(minutes=5)).isoformat()
+                ),
+                event_factory(
+                    action="deleted", timestamp=(hour + td(hours=1)).isoformat()
+                ),
+            ]
+        )
+
+        result = repo.aggregate(types.Filters(), ["action"], "hour")
+
+        assert [(item.bucket, item.group, item.count) for item in result] == [
+            (hour, {"action": "created"}, 2),
+            (hour + td(hours=1), {"action": "deleted"}, 1),
+        ]
+
+    @pytest.mark.parametrize("group_by", [[], ["action"], ["actor"]])
+    @pytest.mark.parametrize("bucket", [None, "hour", "day"])
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            types.Filters(),
+            types.Filters(category="test"),
+            types.Filters(time_from=dt(2024, 1, 1, 13, tzinfo=tz.utc)),
+        ],
+    )
+    def test_aggregate_with_indexes(
+        self,
+        group_by: list[str],
+        bucket: str | None,
+        filters: types.Filters,
+        event_factory: Callable[..., types.Event],
+        repo: RedisRepository,
+    ):
+        hour = dt(2024, 1, 1, 12, tzinfo=tz.utc)
+        repo.write_events(
+            [
+                event_factory(
+                    category=category,
+                    action=action,
+                    actor=actor,
+                    timestamp=(hour + td(minutes=minutes)).isoformat(),
+                )
+                for category, action, actor, minutes in [
+                    ("test", "created", "user", 0),
+                    ("test", "created", None, 5),
+                    ("test", "deleted", "user", 70),
+                    ("other", "created", "admin", 60 * 25),
+                ]
+            ]
+        )
+
+        # counts of the indexes are the same as the counts of the events
+        expected = super(RedisRepository, repo).aggregate(filters, group_by, bucket)
+
+        assert repo.aggregate(filters, group_by, bucket) == expected
+
     def test_redis_remove_event(self, event: types.Event, repo: RedisRepository):
         result = repo.write_event(event)
         assert result.status is True
@@ -102,6 +260,32 @@ class TestRedisRepo:
         assert repo.remove_event(event.id).status is True
         assert not repo.get_event(event.id)
 
+    def test_redis_remove_event_clears_indexes(
+        self, event: types.Event, repo: RedisRepository
+    ):
+        repo.write_event(event)
+        repo.remove_event(event.id)
+
+        assert not repo.conn.keys(f"{REDIS_KEY_PREFIX}:event:*")
+        assert not repo.conn.keys(f"{REDIS_KEY_PREFIX}:bucket:*")
+
+    def test_filter_by_intersection(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        event = event_factory(category="test", action="created")
+        repo.write_events(
+            [
+                event,
+                event_factory(category="test", action="deleted"),
+                event_factory(category="test2", action="created"),
+            ]
+        )
+
+        events = repo.filter_events(types.Filters(category="test", action="created"))
+
+        assert [item.id for item in events] == [event.id]
+        assert not repo.conn.keys(f"{REDIS_KEY_PREFIX}:tmp:*")
+
     def test_redis_remove_event_not_found(self, repo: RedisRepository):
         result = repo.remove_event(1)
 
@@ -122,6 +306,50 @@ class TestRedisRepo:
         events = repo.filter_events(types.Filters())
         assert len(events) == 0
 
+    def test_redis_remove_all_events_clears_keys(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        repo.write_events([event_factory() for _ in range(5)])
+
+        repo.remove_all_events()
+
+        assert not repo.conn.keys(f"{REDIS_KEY_PREFIX}:*")
+
+    @pytest.mark.ckan_config(config.CONF_REDIS_BUCKET_INTERVAL, "hour")
+    def test_filter_across_buckets(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        now = dt.now(tz.utc)
+        events = [
+            event_factory(timestamp=(now - td(hours=i)).isoformat()) for i in range(5)
+        ]
+        repo.write_events(events)
+
+        assert len(repo.conn.zrange(REDIS_BUCKETS_KEY, 0, -1)) == 5
+
+        result = repo.filter_events(
+            types.Filters(time_from=now - td(hours=2, minutes=30), order="desc")
+        )
+
+        assert [event.id for event in result] == [event.id for event in events[:3]]
+
+    @pytest.mark.ckan_config(config.CONF_REDIS_RETENTION_DAYS, 1)
+    def test_retention(
+        self, event_factory: Callable[..., types.Event], repo: RedisRepository
+    ):
+        now = dt.now(tz.utc)
+        event = event_factory(timestamp=now.isoformat())
+        expired = event_factory(timestamp=(now - td(days=3)).isoformat())
+
+        result = repo.write_events([event, expired])
+
+        assert result.message == "1 event(s) written successfully"
+        assert repo.get_event(expired.id) is None
+        assert 0 < repo.conn.ttl(f"{REDIS_KEY_PREFIX}:event:{event.id}") <= 2 * 86400
+
+        for key in repo.conn.keys(f"{REDIS_KEY_PREFIX}:bucket:*"):
+            assert 0 < repo.conn.ttl(key) <= 2 * 86400
+
     def test_redis_remove_filtered_events(
         self, event_factory: Callable[..., types.Event], repo: RedisRepository
     ):
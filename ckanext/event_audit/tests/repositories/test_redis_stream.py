@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from datetime import datetime as dt
+from datetime import timedelta as td
+from datetime import timezone as tz
+from typing import Callable
+
+import pytest
+
+from ckanext.event_audit import config, types
+from ckanext.event_audit.repositories import RedisStreamRepository
+from ckanext.event_audit.repositories.redis_stream import (
+    REDIS_STREAM_IDS_KEY,
+    REDIS_STREAM_KEY,
+)
+
+
+@pytest.mark.usefixtures("clean_redis", "with_plugins")
+@pytest.mark.ckan_config(config.CONF_DATABASE_TRACK_ENABLED, False)
+@pytest.mark.ckan_config(config.CONF_ACTIVE_REPO, "redis_stream")
+class TestRedisStreamRepo:
+    def test_get_event(self, event: types.Event, repo: RedisStreamRepository):
+        assert repo.write_event(event).status
+
+        assert repo.get_event(event.id) == event
+
+    def test_get_event_not_found(self, repo: RedisStreamRepository):
+        assert repo.get_event("xxx") is None
+
+    def test_filter_events(
+        self, event_factory: Callable[..., types.Event], repo: RedisStreamRepository
+    ):
+        events = [event_factory(category="test") for _ in range(3)]
+        repo.write_events([*events, event_factory(category="test2")])
+
+        result = repo.filter_events(types.Filters(category="test"))
+
+        assert [event.id for event in result] == [event.id for event in events]
+
+    @pytest.mark.ckan_config(config.CONF_READ_CHUNK_SIZE, 2)
+    @pytest.mark.ckan_config(config.CONF_REDIS_STREAM_MAX_INGEST_LAG, 3 * 86400)
+    def test_filter_by_time(
+        self, event_factory: Callable[..., types.Event], repo: RedisStreamRepository
+    ):
+        now = dt.now(tz.utc)
+        old_event = event_factory(timestamp=(now - td(days=2)).isoformat())
+        events = [event_factory() for _ in range(5)]
+        repo.write_events([old_event, *events])
+
+        result = repo.filter_events(types.Filters(time_from=now - td(hours=1)))
+
+        assert [event.id for event in result] == [event.id for event in events]
+        assert len(repo.filter_events(types.Filters(time_to=now - td(days=1)))) == 1
+
+    def test_iter_events_with_limit(
+        self, event_factory: Callable[..., types.Event], repo: RedisStreamRepository
+    ):
+        repo.write_events([event_factory() for _ in range(5)])
+
+        assert len(list(repo.iter_events(types.Filters(limit=3)))) == 3
+
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    @pytest.mark.ckan_config(config.CONF_READ_CHUNK_SIZE, 2)
+    @pytest.mark.ckan_config(config.CONF_REDIS_STREAM_MAX_INGEST_LAG, 600)
+    def test_paginate_events(
+        self,
+        order: str,
+        event_factory: Callable[..., types.Event],
+        repo: RedisStreamRepository,
+    ):
+        now = dt.now(tz.utc)
+        # events are written out of the timestamp order
+        events = [
+            event_factory(timestamp=(now - td(minutes=i)).isoformat())
+            for i in range(5)
+        ]
+        events.append(event_factory(timestamp=events[0].timestamp))
+        repo.write_events(events)
+
+        expected = sorted(
+            events,
+            key=lambda event: (dt.fromisoformat(event.timestamp), event.id),
+            reverse=order == "desc",
+        )
+
+        filters = types.Filters(limit=2, order=order)  # type: ignore
+        loaded: list[types.Event] = []
+
+        while True:
+            page = repo.paginate_events(filters)
+            loaded.extend(page.events)
+
+            if not page.next_cursor:
+                break
+
+            filters = filters.model_copy(update={"cursor": page.next_cursor})
+
+        assert [event.id for event in loaded] == [event.id for event in expected]
+
+        # the lazy iteration follows the same order
+        filters = types.Filters(limit=2, order=order)  # type: ignore
+        assert list(repo.iter_events(filters)) == expected[:2]
+
+    @pytest.mark.ckan_config(config.CONF_REDIS_STREAM_MAX_LENGTH, 10)
+    def test_stream_is_trimmed(
+        self, event_factory: Callable[..., types.Event], repo: RedisStreamRepository
+    ):
+        repo.write_events([event_factory() for _ in range(1000)])
+
+        assert repo.conn.xlen(REDIS_STREAM_KEY) < 1000
+
+        # the ID index doesn't outgrow the stream
+        first_id, _ = repo.conn.xrange(REDIS_STREAM_KEY, count=1)[0]
+        first_ms = int(first_id.decode().split("-")[0])
+        assert not repo.conn.zcount(REDIS_STREAM_IDS_KEY, "-inf", f"({first_ms}")
+
+    def test_remove_event(self, event: types.Event, repo: RedisStreamRepository):
+        repo.write_event(event)
+
+        assert repo.remove_event(event.id).status
+        assert repo.get_event(event.id) is None
+        assert not repo.remove_event(event.id).status
+
+    def test_remove_all_events(
+        self, event_factory: Callable[..., types.Event], repo: RedisStreamRepository
+    ):
+        repo.write_events([event_factory() for _ in range(5)])
+
+        assert repo.remove_all_events().status
+        assert not repo.filter_events(types.Filters())
+
+    def test_consumer_group(
+        self, event_factory: Callable[..., types.Event], repo: RedisStreamRepository
+    ):
+        assert repo.create_consumer_group("archive")
+        assert not repo.create_consumer_group("archive")
+
+        events = [event_factory() for _ in range(3)]
+        repo.write_events(events)
+
+        messages = repo.consume("archive", "worker-1", count=2)
+        assert [event.id for _, event in messages] == [event.id for event in events[:2]]
+
+        assert repo.ack("archive", *(message_id for message_id, _ in messages)) == 2
+
+        messages = repo.consume("archive", "worker-2")
+        assert [event.id for _, event in messages] == [events[2].id]
+        assert not repo.consume("archive", "worker-1")
@@ -1,11 +1,22 @@
 import json
+from datetime import datetime as dt
+from datetime import timedelta as td
+from datetime import timezone as tz
 from pathlib import Path
+from typing import Callable
 
 import pytest
 
-from ckanext.event_audit import types
-from ckanext.event_audit.cli import export_data, remove_events
-from ckanext.event_audit.repositories import RedisRepository
+from ckanext.event_audit import config, types
+from ckanext.event_audit.cli import (
+    export_data,
+    manage_partitions,
+    migrate_redis,
+    remove_events,
+)
+from ckanext.event_audit.repositories import PostgresRepository, RedisRepository
+from ckanext.event_audit.repositories.postgres import Partition
+from ckanext.event_audit.repositories.redis import REDIS_SET_KEY
 
 
 @pytest.mark.usefixtures("clean_redis")
@@ -147,3 +158,56 @@ class TestRemoveEventsCLI:
             "cloudwatch does not support removing events by time range."
             in result.output
         )
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db")
+class TestManagePartitionsCLI:
+    def test_create_partitions(self, cli):
+        result = cli.invoke(manage_partitions, ["--ahead", "1"])
+
+        assert result.output.count("Created partition") == 2
+
+    @pytest.mark.ckan_config(config.CONF_DATABASE_TRACK_ENABLED, False)
+    def test_expire_partitions(self, cli, event_factory: Callable[..., types.Event]):
+        repo = PostgresRepository()
+        old_event = event_factory(timestamp=(dt.now(tz.utc) - td(days=95)).isoformat())
+        repo.write_event(old_event)
+
+        # the old partition is created for the event in the default partition
+        cli.invoke(manage_partitions, ["--ahead", "0", "--retention", "0"])
+        partition = Partition.for_moment(dt.fromisoformat(old_event.timestamp), "month")
+        assert partition in repo.get_partitions()
+
+        result = cli.invoke(manage_partitions, ["--ahead", "0", "--retention", "35"])
+
+        assert "Created partition" not in result.output
+        assert f"Dropped partition {partition.name}" in result.output
+        assert partition not in repo.get_partitions()
+        assert not repo.get_event(old_event.id)
+
+    def test_nothing_to_expire(self, cli):
+        cli.invoke(manage_partitions, ["--ahead", "1"])
+
+        result = cli.invoke(manage_partitions, ["--ahead", "0", "--retention", "1"])
+
+        assert "Created partition" not in result.output
+        assert "Dropped partition" not in result.output
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_redis")
+class TestMigrateRedisCLI:
+    def test_nothing_to_migrate(self, cli):
+        result = cli.invoke(migrate_redis)
+
+        assert "0 event(s) migrated" in result.output
+
+    def test_migrate_legacy_events(
+        self, cli, event: types.Event, repo: RedisRepository
+    ):
+        repo.conn.hset(REDIS_SET_KEY, f"id:{event.id}|", event.model_dump_json())
+
+        result = cli.invoke(migrate_redis)
+
+        assert "1 event(s) migrated" in result.output
+        assert repo.get_event(event.id) == event
+        assert not repo.conn.exists(REDIS_SET_KEY)
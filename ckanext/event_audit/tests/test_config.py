@@ -74,7 +74,7 @@ class TestIgnoreConfig:
 class TestRestrictAvailableRepos:
     def test_not_restricted_by_default(self):
         assert config.get_list_of_available_repos() == []
-        assert len(utils.get_available_repos()) == 3
+        assert len(utils.get_available_repos()) == 4
 
     @pytest.mark.ckan_config(config.CONF_RESTRICT_AVAILABLE_REPOS, "cloudwatch")
     @pytest.mark.ckan_config(config.CONF_ACTIVE_REPO, "cloudwatch")
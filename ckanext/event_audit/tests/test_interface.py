@@ -8,6 +8,7 @@ import ckan.plugins as p
 from ckan.tests.helpers import call_action
 
 from ckanext.event_audit import config, const, types, utils
+from ckanext.event_audit.blob_stores import FileSystemBlobStore
 from ckanext.event_audit.exporters import AbstractExporter
 from ckanext.event_audit.interfaces import IEventAudit
 from ckanext.event_audit.repositories import AbstractRepository
@@ -33,6 +34,12 @@ class MyExporter(AbstractExporter):
         return True
 
 
+class MyBlobStore(FileSystemBlobStore):
+    @classmethod
+    def get_name(cls) -> str:
+        return "my_blob_store"
+
+
 class TestEventAuditPlugin(p.SingletonPlugin):
     p.implements(IEventAudit, inherit=True)
 
@@ -46,6 +53,11 @@ class TestEventAuditPlugin(p.SingletonPlugin):
             "my_exporter": MyExporter,
         }
 
+    def register_blob_store(self) -> dict[str, type[FileSystemBlobStore]]:
+        return {
+            MyBlobStore.get_name(): MyBlobStore,
+        }
+
     def skip_event(self, event: types.Event) -> bool:
         if event.category == const.Category.API.value and event.action == "status_show":
             return True
@@ -70,6 +82,11 @@ class TestEventAuditInterace:
         assert "my_exporter" in exporters
         assert exporters["my_exporter"]().export([]) == True
 
+    def test_get_available_blob_stores(self):
+        blob_stores = utils.get_available_blob_stores()
+        assert "filesystem" in blob_stores
+        assert isinstance(utils.get_blob_store("my_blob_store"), MyBlobStore)
+
     def test_write_event_doesnt_trigger_skip_event(self, event):
         """We're not calling the skip_event method for regular write_event calls,
         because it's up to user to decide whether to skip the event or not.
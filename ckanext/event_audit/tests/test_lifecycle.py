@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import signal
+from typing import Any, Callable
+
+import pytest
+
+from ckanext.event_audit import config, lifecycle, plugin, queues, types, utils
+from ckanext.event_audit.tests.test_writer import FakeRepository
+
+
+@pytest.fixture
+def fake_repo(monkeypatch: pytest.MonkeyPatch) -> FakeRepository:
+    repo = FakeRepository()
+    monkeypatch.setattr(utils, "get_active_repo", lambda: repo)
+
+    return repo
+
+
+@pytest.fixture
+def event_queue(
+    ckan_config: dict[str, Any], monkeypatch: pytest.MonkeyPatch
+) -> queues.BoundedEventQueue:
+    monkeypatch.setitem(ckan_config, config.CONF_BATCH_TIMEOUT, 3600)
+
+    event_queue = queues.BoundedEventQueue()
+
+    monkeypatch.setattr(plugin.EventAuditPlugin, "event_queue", event_queue)
+    monkeypatch.setattr(plugin.EventAuditPlugin, "writer", None)
+    monkeypatch.setattr(lifecycle._state, "writer_pid", None)
+
+    return event_queue
+
+
+@pytest.mark.usefixtures("event_queue", "fake_repo")
+class TestEnsureWriter:
+    def test_writer_is_started_once(self):
+        pool = lifecycle.ensure_writer()
+
+        assert pool.is_alive()
+        assert plugin.EventAuditPlugin.writer is pool
+        assert lifecycle.ensure_writer() is pool
+
+    def test_writer_is_started_in_new_process(self, monkeypatch: pytest.MonkeyPatch):
+        pool = lifecycle.ensure_writer()
+
+        # the writer was started by the parent process
+        monkeypatch.setattr(lifecycle._state, "writer_pid", -1)
+
+        assert lifecycle.ensure_writer() is not pool
+
+
+class TestShutdown:
+    def test_queued_events_are_written(
+        self,
+        event_queue: queues.BoundedEventQueue,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+    ):
+        lifecycle.ensure_writer()
+        event = event_factory()
+        event_queue.offer(event)
+
+        assert lifecycle.shutdown(timeout=5)
+        assert fake_repo.batches == [[event]]
+
+    @pytest.mark.usefixtures("event_queue")
+    def test_without_writer(self):
+        assert lifecycle.shutdown(timeout=5)
+
+
+class TestRegisterHooks:
+    @pytest.mark.parametrize("enabled", [True, False])
+    def test_sigterm_handler_is_opt_in(
+        self,
+        enabled: bool,
+        ckan_config: dict[str, Any],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setitem(ckan_config, config.CONF_SHUTDOWN_HANDLE_SIGTERM, enabled)
+        monkeypatch.setattr(lifecycle._state, "hooks_registered", False)
+        monkeypatch.setattr(lifecycle.atexit, "register", lambda func: func)
+        monkeypatch.setattr(
+            lifecycle.os, "register_at_fork", lambda **kwargs: None, raising=False
+        )
+        monkeypatch.setattr(signal, "getsignal", lambda signum: signal.SIG_DFL)
+
+        handled: list[int] = []
+        monkeypatch.setattr(
+            signal, "signal", lambda signum, handler: handled.append(signum)
+        )
+
+        lifecycle._register_hooks()
+
+        assert handled == ([signal.SIGTERM] if enabled else [])
+
+
+@pytest.mark.usefixtures("with_plugins", "event_queue")
+class TestResetAfterFork:
+    def test_state_is_dropped(self):
+        repo = utils.get_active_repo()
+        event_queue = plugin.EventAuditPlugin.event_queue
+        lifecycle.ensure_writer()
+
+        lifecycle._reset_after_fork()
+
+        assert plugin.EventAuditPlugin.writer is None
+        assert plugin.EventAuditPlugin.event_queue is not event_queue
+        assert "_instance" not in vars(type(repo))
+        assert utils.get_active_repo() is not repo
+
+    def test_engine_pool_is_disposed(self, monkeypatch: pytest.MonkeyPatch):
+        calls: list[dict[str, Any]] = []
+        monkeypatch.setattr(
+            lifecycle.model.meta.engine,
+            "dispose",
+            lambda **kwargs: calls.append(kwargs),
+        )
+
+        lifecycle._reset_after_fork()
+
+        assert calls == [{"close": False}]
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import pathlib
+from typing import Callable
+
+import pytest
+
+from ckanext.event_audit import metrics, queues, types
+from ckanext.event_audit.writer import FlushRequest
+
+
+class TestBoundedEventQueue:
+    def test_block(self, event_factory: Callable[..., types.Event]):
+        queue = queues.BoundedEventQueue(1, queues.POLICY_BLOCK, block_timeout=0.01)
+
+        assert queue.offer(event_factory())
+        assert not queue.offer(event_factory())
+        assert queue.stats()["dropped"] == 1
+
+    def test_drop_newest(self, event_factory: Callable[..., types.Event]):
+        queue = queues.BoundedEventQueue(2, queues.POLICY_DROP_NEWEST)
+        events = [event_factory() for _ in range(3)]
+
+        assert [queue.offer(event) for event in events] == [True, True, False]
+        assert [queue.get_nowait() for _ in range(2)] == events[:2]
+        assert queue.dropped == 1
+
+    def test_drop_oldest(self, event_factory: Callable[..., types.Event]):
+        queue = queues.BoundedEventQueue(2, queues.POLICY_DROP_OLDEST)
+        events = [event_factory() for _ in range(3)]
+
+        assert all(queue.offer(event) for event in events)
+        assert [queue.get_nowait() for _ in range(2)] == events[1:]
+        assert queue.dropped == 1
+        assert queue.unfinished_tasks == 2
+
+    def test_drop_oldest_keeps_flush_requests(
+        self, event_factory: Callable[..., types.Event]
+    ):
+        queue = queues.BoundedEventQueue(2, queues.POLICY_DROP_OLDEST)
+        request = FlushRequest()
+        events = [event_factory() for _ in range(2)]
+
+        queue.put(request)
+        queue.offer(events[0])
+        queue.offer(events[1])
+
+        assert [queue.get_nowait() for _ in range(2)] == [request, events[1]]
+
+    def test_spill(
+        self, event_factory: Callable[..., types.Event], tmp_path: pathlib.Path
+    ):
+        spill = queues.EventSpill(str(tmp_path))
+        queue = queues.BoundedEventQueue(1, queues.POLICY_SPILL, spill=spill)
+        events = [event_factory() for _ in range(3)]
+
+        assert all(queue.offer(event) for event in events)
+        assert queue.stats() == {
+            "size": 1,
+            "max_size": 1,
+            "dropped": 0,
+            "spilled": 2,
+            "spill_size": 2,
+        }
+        assert list(spill.drain()) == events[1:]
+        assert not list(spill.drain())
+        assert not list(tmp_path.iterdir())
+
+    def test_spill_while_draining(
+        self, event_factory: Callable[..., types.Event], tmp_path: pathlib.Path
+    ):
+        spill = queues.EventSpill(str(tmp_path))
+        events = [event_factory() for _ in range(3)]
+
+        spill.append(events[0])
+        drained = spill.drain()
+
+        assert next(drained) == events[0]
+
+        # events are spilled to the new file, while the old one is read
+        spill.append(events[1])
+        assert not list(drained)
+        assert len(spill) == 1
+
+        spill.append(events[2])
+        assert list(spill.drain()) == events[1:]
+
+    def test_replay_spill_of_stopped_process(
+        self, event_factory: Callable[..., types.Event], tmp_path: pathlib.Path
+    ):
+        events = [event_factory() for _ in range(2)]
+        # the PID over the maximum, so the process is never running
+        stopped = tmp_path / f"{queues.SPILL_PREFIX}{2**31 - 1}{queues.SPILL_SUFFIX}"
+        stopped.write_text(
+            "".join(event.model_dump_json() + "\n" for event in events)
+        )
+
+        spill = queues.EventSpill(str(tmp_path))
+        spill.append(event_factory())
+
+        assert list(spill.replay()) == events
+        assert [path.name for path in tmp_path.iterdir()] == [spill.path.name]
+
+    def test_metrics(
+        self,
+        event_factory: Callable[..., types.Event],
+        tmp_path: pathlib.Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        backend = metrics.InMemoryMetrics()
+        monkeypatch.setattr(queues.utils, "get_metrics", lambda: backend)
+
+        spill = queues.EventSpill(str(tmp_path))
+        queue = queues.BoundedEventQueue(1, queues.POLICY_SPILL, spill=spill)
+
+        for _ in range(3):
+            queue.offer(event_factory())
+
+        queue = queues.BoundedEventQueue(1, queues.POLICY_DROP_NEWEST)
+
+        for _ in range(2):
+            queue.offer(event_factory())
+
+        assert backend.get_value(metrics.base.EVENTS_SPILLED) == 2
+        assert backend.get_value(metrics.base.EVENTS_DROPPED) == 1
+
+    @pytest.mark.parametrize("policy", [queues.POLICY_BLOCK, queues.POLICY_SPILL])
+    def test_unbounded(self, event_factory: Callable[..., types.Event], policy: str):
+        queue = queues.BoundedEventQueue(0, policy)
+
+        assert all(queue.offer(event_factory()) for _ in range(100))
+        assert queue.qsize() == 100
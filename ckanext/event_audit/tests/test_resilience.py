@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import pytest
+
+from ckanext.event_audit import resilience
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+
+    monkeypatch.setattr(resilience.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(resilience.time, "sleep", clock.sleep)
+
+    return clock
+
+
+class TestRetryPolicy:
+    def test_retry_until_success(self, clock: FakeClock):
+        calls = iter([ValueError(), ValueError(), "ok"])
+
+        def func():
+            result = next(calls)
+
+            if isinstance(result, Exception):
+                raise result
+
+            return result
+
+        policy = resilience.RetryPolicy(attempts=3, base_delay=1, max_delay=3)
+
+        assert policy.call(func, lambda e: True) == "ok"
+        assert len(clock.sleeps) == 2
+        assert clock.sleeps[0] <= 1
+        assert clock.sleeps[1] <= 2
+
+    def test_no_attempts_left(self, clock: FakeClock):
+        def func():
+            raise ValueError("failed")
+
+        with pytest.raises(ValueError, match="failed"):
+            resilience.RetryPolicy(attempts=2).call(func, lambda e: True)
+
+        assert len(clock.sleeps) == 2
+
+    def test_not_retryable(self, clock: FakeClock):
+        def func():
+            raise KeyError
+
+        with pytest.raises(KeyError):
+            resilience.RetryPolicy().call(func, lambda e: not isinstance(e, KeyError))
+
+        assert not clock.sleeps
+
+    def test_delay_is_capped(self):
+        policy = resilience.RetryPolicy(base_delay=1, max_delay=3)
+
+        assert all(0 <= policy.get_delay(10) <= 3 for _ in range(100))
+
+
+class TestTokenBucket:
+    def test_burst_and_wait(self, clock: FakeClock):
+        bucket = resilience.TokenBucket(rate=2)
+
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == pytest.approx(0.5)
+
+        clock.now += 10
+
+        # the bucket isn't refilled over the capacity
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == pytest.approx(0.5)
+
+    def test_no_limit(self, clock: FakeClock):
+        bucket = resilience.TokenBucket(rate=0)
+
+        assert all(bucket.acquire() == 0 for _ in range(100))
+
+
+class TestCircuitBreaker:
+    def test_open_and_reset(self, clock: FakeClock):
+        breaker = resilience.CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+        breaker.record_failure()
+        assert breaker.state == breaker.CLOSED
+
+        breaker.record_failure()
+        assert breaker.state == breaker.OPEN
+        assert not breaker.allow_request()
+
+        clock.now += 10
+        assert breaker.state == breaker.HALF_OPEN
+        assert breaker.allow_request()
+
+        breaker.record_success()
+        assert breaker.state == breaker.CLOSED
+
+    def test_single_probe(self, clock: FakeClock):
+        breaker = resilience.CircuitBreaker(failure_threshold=1, reset_timeout=10)
+
+        breaker.record_failure()
+        clock.now += 10
+
+        assert breaker.allow_request()
+        # other calls wait for the result of the probe
+        assert not breaker.allow_request()
+
+        # the probe, that never reported its result, is replaced
+        clock.now += 10
+        assert breaker.allow_request()
+
+        breaker.record_success()
+        assert breaker.allow_request()
+        assert breaker.allow_request()
+
+    def test_half_open_failure(self, clock: FakeClock):
+        breaker = resilience.CircuitBreaker(failure_threshold=1, reset_timeout=10)
+
+        breaker.record_failure()
+        clock.now += 10
+
+        breaker.record_failure()
+        assert breaker.state == breaker.OPEN
+
+    def test_wait_time(self, clock: FakeClock):
+        breaker = resilience.CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        assert breaker.get_wait_time() == 0
+
+        breaker.record_failure()
+        clock.now += 4
+        assert breaker.get_wait_time() == 6
+
+        # the running probe blocks other calls
+        clock.now += 6
+        assert breaker.allow_request()
+        assert breaker.get_wait_time() == 10
+
+        breaker.record_success()
+        assert breaker.get_wait_time() == 0
+
+    def test_disabled(self):
+        breaker = resilience.CircuitBreaker(failure_threshold=0, reset_timeout=10)
+
+        for _ in range(10):
+            breaker.record_failure()
+
+        assert breaker.state == breaker.CLOSED
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import pathlib
+from typing import Callable
+
+from ckanext.event_audit import types
+from ckanext.event_audit.spool import EventSpool
+
+
+def _segments(spool: EventSpool) -> list[str]:
+    return sorted(path.name for path in spool.path.iterdir())
+
+
+class TestEventSpool:
+    def test_ack_truncates_current_segment(
+        self, event_factory: Callable[..., types.Event], tmp_path: pathlib.Path
+    ):
+        spool = EventSpool(str(tmp_path), segment_size=1_000_000, fsync_interval=0)
+        events = [event_factory() for _ in range(2)]
+
+        for event in events:
+            spool.append(event)
+
+        [segment] = _segments(spool)
+        path = spool.path / segment
+
+        spool.ack(events[:1])
+        assert path.stat().st_size > 0
+
+        spool.ack(events[1:])
+        assert path.stat().st_size == 0
+
+    def test_rotation(
+        self, event_factory: Callable[..., types.Event], tmp_path: pathlib.Path
+    ):
+        spool = EventSpool(str(tmp_path), segment_size=1, fsync_interval=0)
+        events = [event_factory() for _ in range(3)]
+
+        for event in events:
+            spool.append(event)
+
+        assert len(_segments(spool)) == 3
+
+        # acknowledged segments are removed
+        spool.ack(events[:2])
+        assert len(_segments(spool)) == 1
+
+    def test_replay(
+        self, event_factory: Callable[..., types.Event], tmp_path: pathlib.Path
+    ):
+        stopped = EventSpool(str(tmp_path), segment_size=1_000_000)
+        events = [event_factory() for _ in range(3)]
+
+        for event in events:
+            stopped.append(event)
+
+        stopped.ack(events[:1])
+        stopped.close()
+
+        spool = EventSpool(str(tmp_path))
+        [(segment, replayed)] = list(spool.replay())
+
+        # the segment is replayed as a whole
+        assert replayed == events
+        assert _segments(spool) == [segment]
+
+        spool.remove(segment)
+        assert not _segments(spool)
+        assert not list(spool.replay())
+
+    def test_replay_skips_incomplete_record(
+        self, event_factory: Callable[..., types.Event], tmp_path: pathlib.Path
+    ):
+        stopped = EventSpool(str(tmp_path))
+        event = event_factory()
+
+        stopped.append(event)
+        stopped.close()
+
+        [segment] = _segments(stopped)
+
+        with (stopped.path / segment).open("a") as f:
+            f.write('{"id": "incomplete')
+
+        [(_, replayed)] = list(EventSpool(str(tmp_path)).replay())
+
+        assert replayed == [event]
+
+    def test_segments_in_use_are_not_replayed(
+        self, event_factory: Callable[..., types.Event], tmp_path: pathlib.Path
+    ):
+        spool = EventSpool(str(tmp_path), segment_size=1)
+
+        spool.append(event_factory())
+        spool.append(event_factory())
+
+        assert not list(spool.replay())
+
+    def test_released_events_are_replayed(
+        self, event_factory: Callable[..., types.Event], tmp_path: pathlib.Path
+    ):
+        spool = EventSpool(str(tmp_path), segment_size=1_000_000)
+        events = [event_factory() for _ in range(2)]
+
+        for event in events:
+            spool.append(event)
+
+        spool.release(events[:1])
+        assert not list(spool.replay())
+
+        # the segment is kept, once the rest of its events are acknowledged
+        spool.ack(events[1:])
+        [(segment, replayed)] = list(spool.replay())
+        assert replayed == events
+
+        # the segment, that is not removed, is replayed again
+        assert list(spool.replay()) == [(segment, events)]
+
+        spool.remove(segment)
+        assert not _segments(spool)
@@ -204,3 +204,44 @@ class TestFilters:
         """Test that an invalid actor reference raises a ValidationError."""
         with pytest.raises(ValidationError, match="Not found: User"):
             types.Filters(actor="non-existent-user")
+
+    def test_invalid_limit(self):
+        """Test that the limit must be a positive number."""
+        with pytest.raises(ValueError, match="greater than or equal to 1"):
+            types.Filters(limit=0)
+
+    def test_invalid_order(self):
+        """Test that only asc and desc orders are allowed."""
+        with pytest.raises(ValueError, match="Input should be 'asc' or 'desc'"):
+            types.Filters(order="xxx")  # type: ignore
+
+    def test_invalid_cursor(self):
+        """Test that the cursor must be produced by the Cursor class."""
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            types.Filters(cursor="xxx")
+
+
+class TestCursor:
+    def test_encode_decode(self):
+        """Test that the cursor survives the round trip."""
+        event = types.Event(category=const.Category.MODEL.value, action="created")
+        cursor = types.Cursor.from_event(event)
+
+        decoded = types.Cursor.decode(cursor.encode())
+
+        assert decoded == cursor
+        assert decoded.id == event.id
+        assert decoded.timestamp == datetime.fromisoformat(event.timestamp)
+
+    def test_naive_timestamp_is_utc(self):
+        """Test that naive timestamps are treated as UTC ones."""
+        cursor = types.Cursor(timestamp=datetime(2024, 1, 1), id="xxx")  # noqa: DTZ001
+
+        assert cursor.timestamp.tzinfo == timezone.utc
+
+    def test_filters_get_cursor(self):
+        """Test that filters decode the cursor."""
+        cursor = types.Cursor(timestamp=datetime.now(timezone.utc), id="xxx")
+
+        assert types.Filters(cursor=cursor.encode()).get_cursor() == cursor
+        assert types.Filters().get_cursor() is None
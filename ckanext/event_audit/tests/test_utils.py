@@ -2,7 +2,15 @@ from __future__ import annotations
 
 import pytest
 
-from ckanext.event_audit import config, exporters, repositories, utils
+from ckanext.event_audit import (
+    config,
+    const,
+    exporters,
+    metrics,
+    repositories,
+    types,
+    utils,
+)
 
 
 class TestEventAuditUtils:
@@ -42,3 +50,42 @@ class TestEventAuditUtils:
         result = utils.test_active_connection()
 
         assert result is True
+
+
+class TestMetricsUtils:
+    def test_get_metrics(self):
+        backend = utils.get_metrics()
+
+        assert isinstance(backend, metrics.InMemoryMetrics)
+        assert utils.get_metrics() is backend
+
+    @pytest.mark.ckan_config(config.CONF_METRICS, "null")
+    def test_get_null_metrics(self):
+        assert isinstance(utils.get_metrics(), metrics.NullMetrics)
+
+    @pytest.mark.ckan_config(config.CONF_METRICS, "missing")
+    def test_get_missing_metrics(self):
+        with pytest.raises(ValueError, match="backend missing not found"):
+            utils.get_metrics()
+
+    @pytest.mark.ckan_config(config.CONF_IGNORED_ACTIONS, ["status_show"])
+    def test_skipped_events_are_counted(self, monkeypatch: pytest.MonkeyPatch):
+        backend = metrics.InMemoryMetrics()
+        monkeypatch.setattr(utils, "get_metrics", lambda: backend)
+
+        event = types.Event(category=const.Category.API.value, action="status_show")
+
+        labels = {"category": const.Category.API.value}
+
+        assert utils.is_event_skipped(event)
+        assert backend.get_value(metrics.base.EVENTS_SKIPPED, labels) == 1
+
+    @pytest.mark.usefixtures("with_plugins")
+    def test_collect_metrics(self, monkeypatch: pytest.MonkeyPatch):
+        backend = metrics.InMemoryMetrics()
+        monkeypatch.setattr(utils, "get_metrics", lambda: backend)
+
+        utils.collect_metrics()
+
+        assert backend.get_value(metrics.base.QUEUE_SIZE) is not None
+        assert backend.get_value(metrics.base.OLDEST_EVENT_AGE) is not None
@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import pathlib
+import queue
+import time
+from typing import Any, Callable, Iterable
+
+import pytest
+
+from ckanext.event_audit import config, metrics, queues, types, writer
+from ckanext.event_audit.spool import EventSpool
+from ckanext.event_audit.writer import EventWriteThread, WriterPool
+
+
+class FakeRepository:
+    concurrent_writes = True
+
+    def __init__(self):
+        self.batches: list[list[types.Event]] = []
+        self.failures = 0
+
+    @classmethod
+    def get_name(cls) -> str:
+        return "fake"
+
+    def write_events(self, events: Iterable[types.Event]) -> types.Result:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError
+
+        self.batches.append(list(events))
+
+        return types.Result(status=True)
+
+
+def _wait_for(condition: Callable[[], Any], timeout: float = 5):
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def fake_repo(monkeypatch: pytest.MonkeyPatch) -> FakeRepository:
+    repo = FakeRepository()
+    monkeypatch.setattr(writer.utils, "get_active_repo", lambda: repo)
+
+    return repo
+
+
+@pytest.fixture
+def write_thread(
+    ckan_config: dict[str, Any], monkeypatch: pytest.MonkeyPatch
+) -> EventWriteThread:
+    monkeypatch.setitem(ckan_config, config.CONF_BATCH_SIZE, 2)
+    monkeypatch.setitem(ckan_config, config.CONF_BATCH_TIMEOUT, 3600)
+    monkeypatch.setitem(ckan_config, config.CONF_BATCH_RETRY_DELAY, 0)
+
+    thread = EventWriteThread(queue.Queue())
+    thread.daemon = True
+    thread.start()
+
+    return thread
+
+
+class TestEventWriteThread:
+    def test_push_on_batch_size(
+        self,
+        write_thread: EventWriteThread,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+    ):
+        events = [event_factory() for _ in range(3)]
+
+        for event in events:
+            write_thread.queue.put(event)
+
+        write_thread.queue.join()
+
+        assert fake_repo.batches == [events[:2]]
+
+    def test_push_on_timeout(
+        self,
+        write_thread: EventWriteThread,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+        ckan_config: dict[str, Any],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setitem(ckan_config, config.CONF_BATCH_TIMEOUT, 0.1)
+        event = event_factory()
+
+        # no more events arrive after the first one
+        write_thread.queue.put(event)
+
+        _wait_for(lambda: fake_repo.batches)
+        assert fake_repo.batches == [[event]]
+
+    def test_flush(
+        self,
+        write_thread: EventWriteThread,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+    ):
+        event = event_factory()
+        write_thread.queue.put(event)
+
+        assert write_thread.flush(timeout=5)
+        assert fake_repo.batches == [[event]]
+
+    def test_flush_without_events(
+        self, write_thread: EventWriteThread, fake_repo: FakeRepository
+    ):
+        assert write_thread.flush(timeout=5)
+        assert not fake_repo.batches
+
+    def test_failed_batch_is_retried(
+        self,
+        write_thread: EventWriteThread,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+    ):
+        fake_repo.failures = 2
+        events = [event_factory() for _ in range(4)]
+
+        for event in events:
+            write_thread.queue.put(event)
+
+        assert write_thread.flush(timeout=5)
+        assert write_thread.is_alive()
+        assert fake_repo.batches == [events[:2], events[2:]]
+
+    def test_failed_batch_is_dropped(
+        self,
+        write_thread: EventWriteThread,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+        ckan_config: dict[str, Any],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setitem(ckan_config, config.CONF_BATCH_MAX_RETRIES, 1)
+
+        fake_repo.failures = 2
+        events = [event_factory() for _ in range(4)]
+
+        for event in events:
+            write_thread.queue.put(event)
+
+        assert write_thread.flush(timeout=5)
+        assert write_thread.is_alive()
+        assert fake_repo.batches == [events[2:]]
+
+    def test_rejected_batch_is_not_retried(
+        self,
+        write_thread: EventWriteThread,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        results = iter([types.Result(status=False, retry=False)])
+        write_events = fake_repo.write_events
+        monkeypatch.setattr(
+            fake_repo,
+            "write_events",
+            lambda events: next(results, None) or write_events(events),
+        )
+
+        events = [event_factory() for _ in range(4)]
+
+        for event in events:
+            write_thread.queue.put(event)
+
+        assert write_thread.flush(timeout=5)
+        assert fake_repo.batches == [events[2:]]
+
+    def test_unavailable_repository_does_not_spend_retries(
+        self,
+        write_thread: EventWriteThread,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+        ckan_config: dict[str, Any],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setitem(ckan_config, config.CONF_BATCH_MAX_RETRIES, 0)
+
+        results = iter([types.Result(status=False, retry_after=0)] * 3)
+        write_events = fake_repo.write_events
+        monkeypatch.setattr(
+            fake_repo,
+            "write_events",
+            lambda events: next(results, None) or write_events(events),
+        )
+
+        events = [event_factory() for _ in range(4)]
+
+        for event in events:
+            write_thread.queue.put(event)
+
+        assert write_thread.flush(timeout=5)
+        assert fake_repo.batches == [events[:2], events[2:]]
+
+    def test_only_unwritten_events_are_retried(
+        self,
+        write_thread: EventWriteThread,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        events = [event_factory() for _ in range(4)]
+
+        results = iter([types.Result(status=False, unwritten=events[1:2])])
+        write_events = fake_repo.write_events
+        monkeypatch.setattr(
+            fake_repo,
+            "write_events",
+            lambda events: next(results, None) or write_events(events),
+        )
+
+        for event in events:
+            write_thread.queue.put(event)
+
+        assert write_thread.flush(timeout=5)
+        assert fake_repo.batches == [events[1:2], events[2:]]
+
+    def test_write_metrics(
+        self,
+        write_thread: EventWriteThread,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        backend = metrics.InMemoryMetrics()
+        monkeypatch.setattr(writer.utils, "get_metrics", lambda: backend)
+        labels = {"repository": "fake"}
+
+        fake_repo.failures = 1
+
+        for _ in range(4):
+            write_thread.queue.put(event_factory())
+
+        assert write_thread.flush(timeout=5)
+        assert backend.get_value(metrics.base.WRITE_FAILURES, labels) == 1
+        assert backend.get_value(metrics.base.EVENTS_WRITTEN, labels) == 4
+        assert backend.get_value(metrics.base.LAST_WRITE, labels)
+
+        # the failed batch is written again
+        histogram = backend.get_histogram(metrics.base.BATCH_SIZE, labels)
+        assert histogram
+        assert histogram.count == 3
+
+    def test_flush_full_queue(self, event_factory: Callable[..., types.Event]):
+        # the writer isn't started, so the queue stays full
+        thread = EventWriteThread(queue.Queue(maxsize=1))
+        thread.queue.put(event_factory())
+
+        started_at = time.monotonic()
+
+        assert not thread.flush(timeout=0.1)
+        assert time.monotonic() - started_at < 1
+
+    def test_restore_spilled_events(
+        self,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+        tmp_path: pathlib.Path,
+    ):
+        spill = queues.EventSpill(str(tmp_path))
+        events = [event_factory() for _ in range(3)]
+
+        for event in events:
+            spill.append(event)
+
+        thread = EventWriteThread(queues.BoundedEventQueue(1, spill=spill))
+        thread.daemon = True
+        thread.start()
+
+        assert thread.flush(timeout=5)
+        assert sum(fake_repo.batches, []) == events
+
+    def test_written_events_are_acknowledged(
+        self,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+        tmp_path: pathlib.Path,
+    ):
+        spool = EventSpool(str(tmp_path), segment_size=1)
+        event_queue = queues.BoundedEventQueue(spool=spool)
+        events = [event_factory() for _ in range(2)]
+
+        thread = EventWriteThread(event_queue)
+        thread.daemon = True
+        thread.start()
+
+        for event in events:
+            event_queue.offer(event)
+
+        assert thread.flush(timeout=5)
+        assert fake_repo.batches == [events]
+        assert not list(spool.path.iterdir())
+
+    def test_replay_on_start(
+        self,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+        tmp_path: pathlib.Path,
+    ):
+        stopped = EventSpool(str(tmp_path))
+        events = [event_factory() for _ in range(2)]
+
+        for event in events:
+            stopped.append(event)
+
+        stopped.close()
+
+        spool = EventSpool(str(tmp_path))
+        thread = EventWriteThread(queues.BoundedEventQueue(spool=spool))
+        thread.daemon = True
+        thread.start()
+
+        assert thread.flush(timeout=5)
+        assert fake_repo.batches == [events]
+        assert not list(spool.path.iterdir())
+
+    def test_failed_batch_is_replayed(
+        self,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+        tmp_path: pathlib.Path,
+        ckan_config: dict[str, Any],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setitem(ckan_config, config.CONF_BATCH_MAX_RETRIES, 0)
+        monkeypatch.setitem(ckan_config, config.CONF_SPOOL_REPLAY_INTERVAL, 1)
+
+        spool = EventSpool(str(tmp_path))
+        events = [event_factory() for _ in range(2)]
+
+        thread = EventWriteThread(queues.BoundedEventQueue(spool=spool))
+        thread.daemon = True
+        thread.start()
+
+        fake_repo.failures = 1
+
+        for event in events:
+            thread.queue.offer(event)
+
+        assert thread.flush(timeout=5)
+        assert not fake_repo.batches
+
+        # the released batch stays in the spool, until it's replayed
+        _wait_for(lambda: fake_repo.batches == [events])
+        _wait_for(lambda: not list(spool.path.iterdir()))
+
+
+@pytest.fixture
+def writer_pool(
+    ckan_config: dict[str, Any], monkeypatch: pytest.MonkeyPatch
+) -> WriterPool:
+    monkeypatch.setitem(ckan_config, config.CONF_BATCH_SIZE, 2)
+    monkeypatch.setitem(ckan_config, config.CONF_BATCH_TIMEOUT, 3600)
+
+    pool = WriterPool(queue.Queue(), size=3)
+    pool.start()
+
+    return pool
+
+
+class TestWriterPool:
+    def test_flush(
+        self,
+        writer_pool: WriterPool,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+    ):
+        events = [event_factory() for _ in range(7)]
+
+        for event in events:
+            writer_pool.queue.put(event)
+
+        assert writer_pool.flush(timeout=5)
+        assert writer_pool.is_alive()
+
+        written = sum(fake_repo.batches, [])
+        assert sorted(e.id for e in written) == sorted(e.id for e in events)
+
+    def test_flush_twice(
+        self,
+        writer_pool: WriterPool,
+        fake_repo: FakeRepository,
+        event_factory: Callable[..., types.Event],
+    ):
+        assert writer_pool.flush(timeout=5)
+
+        event = event_factory()
+        writer_pool.queue.put(event)
+
+        assert writer_pool.flush(timeout=5)
+        assert fake_repo.batches == [[event]]
+
+    def test_flush_full_queue(
+        self,
+        event_factory: Callable[..., types.Event],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        # writers aren't started, so the queue stays full
+        pool = WriterPool(queue.Queue(maxsize=1), size=2)
+        monkeypatch.setattr(EventWriteThread, "is_alive", lambda self: True)
+        pool.queue.put(event_factory())
+
+        started_at = time.monotonic()
+
+        assert not pool.flush(timeout=0.1)
+        assert time.monotonic() - started_at < 1
+
+    @pytest.mark.ckan_config(config.CONF_WRITER_WORKERS, 4)
+    def test_size(self, fake_repo: FakeRepository):
+        assert WriterPool.get_size(fake_repo) == 4  # type: ignore
+
+        fake_repo.concurrent_writes = False
+        assert WriterPool.get_size(fake_repo) == 1  # type: ignore
+
+    def test_only_first_writer_replays(self):
+        pool = WriterPool(queue.Queue(), size=2)
+
+        assert [w.replay for w in pool.workers] == [True, False]
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, TypedDict, Union
+from typing import Any, Dict, List, Literal, Optional, TypedDict, Union
 
 from pydantic import BaseModel, ConfigDict, Field, FieldValidationInfo, field_validator
 
@@ -20,6 +23,34 @@ class ThreadData(TypedDict):
 class Result:
     status: bool
     message: Optional[str] = None
+    # whether the failed operation may be repeated
+    retry: bool = True
+    # seconds to wait before the operation is repeated, if the service is
+    # unavailable. Such a failure isn't counted as a failed attempt
+    retry_after: Optional[float] = None
+    # events, that are not written, if the rest of them are. The retry
+    # writes only these ones
+    unwritten: Optional[List[Event]] = None
+
+
+@dataclass
+class EventsPage:
+    """A page of events and the cursor to fetch the next one.
+
+    The `next_cursor` is None if there are no more events.
+    """
+
+    events: List[Event] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
+@dataclass
+class EventsAggregate:
+    """Number of events in a group and, optionally, a time bucket."""
+
+    group: Dict[str, Any]
+    count: int
+    bucket: datetime | None = None
 
 
 @dataclass
@@ -170,7 +201,7 @@ class Filters(BaseModel):
     This model is used to filter events based on different criteria.
     """
 
-    id: str | None = Field(default=None, description="Event ID")
+    id: Optional[str] = Field(default=None, description="Event ID")
 
     category: Optional[str] = Field(
         default=None, description="Event category, e.g., 'api'"
@@ -201,6 +232,17 @@ class Filters(BaseModel):
         default=None, description="End time for filtering (defaults to now)"
     )
 
+    limit: Optional[int] = Field(
+        default=None, ge=1, description="Maximum number of events to return"
+    )
+    order: Literal["asc", "desc"] = Field(
+        default="asc", description="Sort direction by timestamp"
+    )
+    cursor: Optional[str] = Field(
+        default=None,
+        description="Opaque cursor from the previous page, see `Cursor`",
+    )
+
     @field_validator("actor")
     @classmethod
     def validate_actor(cls, v: str) -> str:
@@ -212,6 +254,15 @@ class Filters(BaseModel):
 
         return v
 
+    @field_validator("time_from", "time_to")
+    @classmethod
+    def validate_timezone(cls, v: Optional[datetime]) -> Optional[datetime]:
+        """Treat naive datetimes as UTC ones, to keep them comparable."""
+        if v and v.tzinfo is None:
+            return v.replace(tzinfo=timezone.utc)
+
+        return v
+
     @field_validator("time_to")
     @classmethod
     def validate_time_range(cls, time_to: datetime, info: FieldValidationInfo):
@@ -223,6 +274,18 @@ class Filters(BaseModel):
 
         return time_to
 
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, v: Optional[str]) -> Optional[str]:
+        if v:
+            Cursor.decode(v)
+
+        return v
+
+    def get_cursor(self) -> Cursor | None:
+        """Return the decoded cursor, if any."""
+        return Cursor.decode(self.cursor) if self.cursor else None
+
     @field_validator("*", mode="before")
     @classmethod
     def strip_strings(cls, v: Any) -> Any:
@@ -231,3 +294,56 @@ class Filters(BaseModel):
             return v.strip()
 
         return v
+
+
+PAGINATION_FIELDS = {"limit", "order", "cursor"}
+AGGREGATE_FIELDS = (
+    "category",
+    "action",
+    "actor",
+    "action_object",
+    "action_object_id",
+    "target_type",
+    "target_id",
+)
+AGGREGATE_BUCKETS = ("hour", "day")
+
+
+class Cursor(BaseModel):
+    """Position of an event in the `(timestamp, id)` ordering.
+
+    The cursor is passed around as an opaque string, use `encode` and
+    `decode` to convert it.
+    """
+
+    timestamp: datetime
+    id: str
+
+    @field_validator("timestamp")
+    @classmethod
+    def validate_timestamp(cls, v: datetime) -> datetime:
+        """Treat naive timestamps as UTC ones, to keep them comparable."""
+        if v.tzinfo is None:
+            return v.replace(tzinfo=timezone.utc)
+
+        return v
+
+    @classmethod
+    def from_event(cls, event: Event) -> Cursor:
+        return cls(timestamp=event.timestamp, id=str(event.id))
+
+    def encode(self) -> str:
+        data = json.dumps([self.timestamp.isoformat(), self.id])
+
+        return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+    @classmethod
+    def decode(cls, value: str) -> Cursor:
+        try:
+            timestamp, event_id = json.loads(base64.urlsafe_b64decode(value))
+            return cls(timestamp=timestamp, id=str(event_id))
+        except (binascii.Error, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+
+    def sort_key(self) -> tuple[datetime, str]:
+        return self.timestamp, self.id
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
 import ckan.plugins as p
 
-from ckanext.event_audit import config, exporters
+from ckanext.event_audit import blob_stores, config, exporters, metrics
 from ckanext.event_audit import repositories as repos
 from ckanext.event_audit import types
 from ckanext.event_audit.interfaces import IEventAudit
@@ -20,6 +23,7 @@ def get_available_repos() -> dict[str, type[repos.AbstractRepository]]:
     """
     plugin_repos: dict[str, type[repos.AbstractRepository]] = {
         repos.RedisRepository.get_name(): repos.RedisRepository,
+        repos.RedisStreamRepository.get_name(): repos.RedisStreamRepository,
         repos.PostgresRepository.get_name(): repos.PostgresRepository,
         repos.CloudWatchRepository.get_name(): repos.CloudWatchRepository,
     }
@@ -48,17 +52,20 @@ def get_active_repo(ignore_cache: bool = False) -> repos.AbstractRepository:
     Returns:
         The active repository.
     """
-    from ckan.plugins import get_plugin
-
-    plugin_instance = get_plugin("event_audit")
+    plugin_instance = p.get_plugin("event_audit")
 
     if hasattr(plugin_instance, "repo") and not ignore_cache:
         return plugin_instance.repo  # type: ignore
 
     repos = get_available_repos()
     active_repo_name = config.active_repo()
+    repo = repos[active_repo_name]()
+
+    # the cached repository is dropped in the child process after the fork
+    if not ignore_cache:
+        plugin_instance.repo = repo  # type: ignore
 
-    return repos[active_repo_name]()
+    return repo
 
 
 def get_repo(repo_name: str) -> repos.AbstractRepository:
@@ -81,6 +88,23 @@ def get_repo(repo_name: str) -> repos.AbstractRepository:
     return repos[repo_name]()
 
 
+def flush_events(timeout: float | None = None) -> bool:
+    """Write the events, queued in the threaded mode, right away.
+
+    Args:
+        timeout: The maximum time to wait, in seconds.
+
+    Returns:
+        whether the queued events were written in time
+    """
+    writer = p.get_plugin("event_audit").writer  # type: ignore
+
+    if writer is None or not writer.is_alive():
+        return True
+
+    return writer.flush(timeout)
+
+
 def test_active_connection() -> bool:
     """Test the connection to the active repository.
 
@@ -144,6 +168,164 @@ def get_exporter(exporter_name: str) -> type[exporters.AbstractExporter]:
     return exporters[exporter_name]
 
 
+def get_available_blob_stores() -> dict[str, type[blob_stores.AbstractBlobStore]]:
+    """Retrieve a dictionary of available blob stores.
+
+    Returns:
+        A dictionary mapping blob store names to their respective classes.
+    """
+    plugin_blob_stores: dict[str, type[blob_stores.AbstractBlobStore]] = {
+        blob_stores.FileSystemBlobStore.get_name(): blob_stores.FileSystemBlobStore,
+    }
+
+    for plugin in reversed(list(p.PluginImplementations(IEventAudit))):
+        plugin_blob_stores.update(plugin.register_blob_store())
+
+    return plugin_blob_stores
+
+
+def get_blob_store(blob_store_name: str | None = None) -> blob_stores.AbstractBlobStore:
+    """Get the blob store by name.
+
+    Args:
+        blob_store_name: The name of the blob store. If not provided, the
+            configured blob store is used.
+
+    Returns:
+        The blob store.
+    """
+    blob_store_name = blob_store_name or config.get_blob_store()
+    stores = get_available_blob_stores()
+
+    if blob_store_name not in stores:
+        raise ValueError(f"Blob store {blob_store_name} not found")
+
+    return stores[blob_store_name]()
+
+
+def get_available_metrics() -> dict[str, type[metrics.AbstractMetrics]]:
+    """Retrieve a dictionary of available metrics backends.
+
+    Returns:
+        A dictionary mapping metrics backend names to their respective classes.
+    """
+    plugin_metrics: dict[str, type[metrics.AbstractMetrics]] = {
+        metrics.InMemoryMetrics.get_name(): metrics.InMemoryMetrics,
+        metrics.NullMetrics.get_name(): metrics.NullMetrics,
+    }
+
+    for plugin in reversed(list(p.PluginImplementations(IEventAudit))):
+        plugin_metrics.update(plugin.register_metrics())
+
+    return plugin_metrics
+
+
+@dataclass
+class _MetricsHolder:
+    """The metrics backend of the current process."""
+
+    backend: metrics.AbstractMetrics | None = None
+
+
+_metrics = _MetricsHolder()
+
+
+def get_metrics() -> metrics.AbstractMetrics:
+    """Get the configured metrics backend.
+
+    The backend is created once per process, so it keeps the collected
+    metrics between the calls.
+
+    Returns:
+        The metrics backend.
+    """
+    name = config.get_metrics()
+    backend = _metrics.backend
+
+    if backend is None or backend.get_name() != name:
+        backends = get_available_metrics()
+
+        if name not in backends:
+            raise ValueError(f"Metrics backend {name} not found")
+
+        backend = _metrics.backend = backends[name]()
+
+    return backend
+
+
+def reset_metrics():
+    """Drop the collected metrics, e.g. in the child process after the fork."""
+    _metrics.backend = None
+
+
+def collect_metrics() -> metrics.AbstractMetrics:
+    """Update the gauges of the threaded mode, e.g. the size of the queue.
+
+    Counters and histograms are updated, when the events are queued and
+    written. The gauges describe the current state, so they are collected
+    on demand.
+
+    Returns:
+        The metrics backend.
+    """
+    plugin = p.get_plugin("event_audit")
+    backend = get_metrics()
+    stats = plugin.event_queue.stats()  # type: ignore
+
+    backend.set(metrics.base.QUEUE_SIZE, stats["size"])
+    backend.set(metrics.base.QUEUE_MAX_SIZE, stats["max_size"])
+    backend.set(metrics.base.SPILL_SIZE, stats["spill_size"])
+
+    writer = plugin.writer  # type: ignore
+    events = [plugin.event_queue.get_oldest_event()]  # type: ignore
+
+    if writer is not None:
+        events.extend(writer.get_oldest_events())
+
+    backend.set(metrics.base.WRITERS_ALIVE, writer.count_alive() if writer else 0)
+    backend.set(
+        metrics.base.OLDEST_EVENT_AGE,
+        max((_get_event_age(event) for event in events if event), default=0),
+    )
+
+    return backend
+
+
+def _get_event_age(event: types.Event) -> float:
+    timestamp = event.timestamp
+
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+    return max((datetime.now(timezone.utc) - timestamp).total_seconds(), 0)
+
+
+def is_event_skipped(event: types.Event) -> bool:
+    """Check if the event is skipped by the config or by `IEventAudit` plugins.
+
+    Skipped events are counted by the metrics.
+
+    Args:
+        event: The event to check.
+
+    Returns:
+        whether the event must not be written
+    """
+    skipped = skip_event(event) or any(
+        plugin.skip_event(event) for plugin in p.PluginImplementations(IEventAudit)
+    )
+
+    if skipped:
+        get_metrics().inc(
+            metrics.base.EVENTS_SKIPPED, labels={"category": event.category}
+        )
+
+    return skipped
+
+
 def skip_event(event: types.Event) -> bool:
     if event.action in config.get_ignored_actions():
         return True
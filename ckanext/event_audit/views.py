@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from flask import Blueprint
+from flask import Blueprint, Response
 from flask.views import MethodView
 
 import ckan.plugins as p
@@ -9,6 +9,7 @@ import ckan.plugins.toolkit as tk
 from ckanext.event_audit import config, utils
 
 event_audit = Blueprint("event_audit", __name__, url_prefix="/admin-panel/event_audit")
+event_audit_metrics = Blueprint("event_audit_metrics", __name__)
 
 if p.plugin_loaded("admin_panel") and config.is_admin_panel_enabled():
     from ckan.logic import parse_params
@@ -54,3 +55,21 @@ if p.plugin_loaded("admin_panel") and config.is_admin_panel_enabled():
     event_audit.add_url_rule(
         "/dashboard", view_func=EventAuditListView.as_view("dashboard")
     )
+
+
+if config.is_metrics_endpoint_enabled():
+
+    @event_audit_metrics.route("/event-audit/metrics")
+    def metrics() -> Response:
+        if not config.is_metrics_public():
+            try:
+                tk.check_access("sysadmin", {"user": tk.current_user.name})
+            except tk.NotAuthorized:
+                return tk.abort(403, tk._("Need to be system administrator"))
+
+        try:
+            body = utils.collect_metrics().render()
+        except NotImplementedError:
+            return tk.abort(404, tk._("Metrics backend can't render metrics"))
+
+        return Response(body, mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,454 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from datetime import timezone as tz
+from typing import TYPE_CHECKING, Any
+
+from ckanext.event_audit import config, metrics, resilience, types, utils
+from ckanext.event_audit.spool import EventSpool
+
+if TYPE_CHECKING:
+    from ckanext.event_audit.repositories import AbstractRepository
+
+log = logging.getLogger(__name__)
+
+# the maximum delay before the retry of a failed batch, in seconds
+RETRY_MAX_DELAY = 60
+
+
+class FlushRequest:
+    """Queue item, that asks the writers to write the buffered events.
+
+    The same request is queued once per writer. Every writer, that takes it,
+    waits for the rest, so each of them takes exactly one copy.
+    """
+
+    def __init__(self, parties: int = 1):
+        self.done = threading.Event()
+        self.barrier = threading.Barrier(parties)
+
+
+class EventWriteThread(threading.Thread):
+    """Write queued events to the active repository in batches.
+
+    Events are buffered and written when the batch is full, when the oldest
+    buffered event waits for `batch.timeout` seconds, or on `flush`. The
+    queue is read with a timeout, so the batch timeout is honoured even if
+    no more events arrive.
+
+    A failed batch is written again after the exponential backoff, while
+    new events wait in the queue. After `batch.max_retries` failed attempts,
+    or if the repository says the write can't succeed, the batch is dropped.
+    If the repository says when it's available again, the batch waits until
+    then, and the attempt is not counted.
+    If only a part of the batch is written, only the rest of it is retried.
+
+    Events, spilled by stopped processes, are taken on start as well.
+
+    If the queue has the spool, written and dropped events are acknowledged
+    in it. Batches, that are out of retries, are released to the spool
+    instead. Events, left by stopped processes, are replayed on start, and
+    the released ones every `spool.replay_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        queue: queue.Queue[Any],
+        name: str = "event-audit-writer",
+        replay: bool = True,
+    ):
+        threading.Thread.__init__(self, name=name)
+        self.queue = queue
+        self.replay = replay
+        self.data = types.ThreadData(last_push=datetime.now(tz.utc), events=[])
+
+        # monotonic time, when the buffered events must be written
+        self._deadline: float | None = None
+
+        # the failed batch, the number of its failed writes and the monotonic
+        # time of the next attempt
+        self._failed: list[types.Event] = []
+        self._failures = 0
+        self._retry_at: float | None = None
+
+        # monotonic time of the next replay of the spool
+        self._replay_at: float | None = None
+
+    def run(self):
+        if self.replay:
+            self._replay_spilled()
+            self._replay()
+
+        while True:
+            if self._retry_at is not None:
+                self._retry(self._retry_at)
+                continue
+
+            if self._replay_at is not None and time.monotonic() >= self._replay_at:
+                self._replay()
+                continue
+
+            if self._restore_spilled():
+                continue
+
+            try:
+                item = self.queue.get(timeout=self._get_wait_time())
+            except queue.Empty:
+                self._push()
+                continue
+
+            try:
+                self._process(item)
+            finally:
+                self.queue.task_done()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Write all the events, queued before the call.
+
+        The time, spent waiting for the free space in the full queue, is
+        counted against the timeout.
+
+        Args:
+            timeout (float | None, optional): maximum time to wait, in seconds.
+
+        Returns:
+            bool: whether the events were written in time.
+        """
+        deadline = _get_deadline(timeout)
+        request = FlushRequest()
+
+        try:
+            self.queue.put(request, timeout=_get_remaining_time(deadline))
+        except queue.Full:
+            return False
+
+        return request.done.wait(_get_remaining_time(deadline))
+
+    def _process(self, item: Any):
+        if isinstance(item, FlushRequest):
+            self._restore_spilled(force=True)
+            self._push()
+
+            try:
+                item.barrier.wait()
+            except threading.BrokenBarrierError:
+                return
+
+            item.done.set()
+            return
+
+        if isinstance(item, types.Event):
+            self._add(item)
+
+    def _restore_spilled(self, force: bool = False) -> bool:
+        """Take the spilled events back, once the queue is empty.
+
+        Args:
+            force (bool, optional): take them, even if the queue isn't empty.
+
+        Returns:
+            bool: whether there were spilled events.
+        """
+        spill = getattr(self.queue, "spill", None)
+
+        if spill is None or not len(spill) or not (force or self.queue.empty()):
+            return False
+
+        for event in spill.drain():
+            self._add(event)
+
+        return True
+
+    def _replay_spilled(self):
+        """Take the events, spilled by stopped processes."""
+        spill = getattr(self.queue, "spill", None)
+
+        if spill is None:
+            return
+
+        for event in spill.replay():
+            self._add(event)
+
+    def _add(self, event: types.Event):
+        if not self.data["events"]:
+            self._deadline = time.monotonic() + config.get_batch_timeout()
+
+        self.data["events"].append(event)
+
+        if (
+            len(self.data["events"]) >= config.get_batch_size()
+            or self._is_time_to_push()
+        ):
+            self._push()
+
+    def _push(self):
+        """Write the buffered events to the active repository."""
+        events = self.data["events"]
+
+        self.data["events"] = []
+        self.data["last_push"] = datetime.now(tz.utc)
+        self._deadline = None
+
+        if events:
+            self._write_batch(events)
+
+    def _retry(self, retry_at: float):
+        """Write the failed batch again, once its delay is over."""
+        time.sleep(max(retry_at - time.monotonic(), 0))
+
+        events = self._failed
+        self._failed = []
+        self._retry_at = None
+
+        self._write_batch(events)
+
+    def _write_batch(self, events: list[types.Event]):
+        """Write the batch, keeping it for the retry, if the write fails."""
+        result = self._write(events)
+
+        if not result.status and result.unwritten is not None:
+            events = self._settle_written(events, result.unwritten)
+
+        if not result.status and result.retry_after is not None:
+            log.warning(
+                "Repository is unavailable, retrying %s event(s) in %.2fs",
+                len(events),
+                result.retry_after,
+            )
+
+            self._failed = events
+            self._retry_at = time.monotonic() + result.retry_after
+            return
+
+        can_retry = result.retry and self._failures < config.get_batch_max_retries()
+
+        if not result.status and can_retry:
+            policy = resilience.RetryPolicy(
+                base_delay=config.get_batch_retry_delay(),
+                max_delay=RETRY_MAX_DELAY,
+            )
+            delay = policy.get_delay(self._failures)
+
+            log.warning("Retrying %s event(s) in %.2fs", len(events), delay)
+
+            self._failed = events
+            self._failures += 1
+            self._retry_at = time.monotonic() + delay
+            return
+
+        failures = self._failures + 1
+        self._failures = 0
+
+        if self.spool is None:
+            if not result.status:
+                log.error(
+                    "Dropping %s event(s) after %s failed write(s)",
+                    len(events),
+                    failures,
+                )
+            return
+
+        if not result.status and result.retry:
+            log.error(
+                "Keeping %s event(s) in the spool after %s failed write(s)",
+                len(events),
+                failures,
+            )
+            self.spool.release(events)
+            return
+
+        if not result.status:
+            log.error("Dropping %s rejected event(s)", len(events))
+
+        self.spool.ack(events)
+
+    def _settle_written(
+        self, events: list[types.Event], unwritten: list[types.Event]
+    ) -> list[types.Event]:
+        """Acknowledge the written part of the batch and get the rest of it."""
+        ids = {event.id for event in unwritten}
+
+        if self.spool is not None:
+            self.spool.ack(event for event in events if event.id not in ids)
+
+        return unwritten
+
+    def _write(self, events: list[types.Event]) -> types.Result:
+        """Write events to the active repository.
+
+        The size of the batch, the time of the write and its result are
+        recorded by the metrics.
+
+        Returns:
+            types.Result: result of the write.
+        """
+        repo = utils.get_active_repo()
+        backend = utils.get_metrics()
+        labels = {"repository": repo.get_name()}
+        started_at = time.monotonic()
+
+        try:
+            result = repo.write_events(events)
+        except Exception:
+            log.exception("Failed to write %s event(s)", len(events))
+            result = types.Result(status=False)
+        else:
+            if not result.status:
+                log.error(
+                    "Failed to write %s event(s): %s", len(events), result.message
+                )
+
+        backend.observe(
+            metrics.base.WRITE_DURATION, time.monotonic() - started_at, labels
+        )
+        backend.observe(metrics.base.BATCH_SIZE, len(events), labels)
+
+        if not result.status:
+            backend.inc(metrics.base.WRITE_FAILURES, labels=labels)
+            return result
+
+        backend.inc(metrics.base.EVENTS_WRITTEN, len(events), labels)
+        backend.set(metrics.base.LAST_WRITE, time.time(), labels)
+
+        return result
+
+    def _replay(self):
+        """Write events from the segments of stopped processes.
+
+        Released segments of the current process are replayed as well. The
+        segment, that failed to be written, stays for the next replay.
+        """
+        if self.spool is None:
+            return
+
+        for segment, events in self.spool.replay():
+            log.info("Replaying %s event(s) from %s", len(events), segment)
+
+            if not events or self._write(events).status:
+                self.spool.remove(segment)
+
+        interval = config.get_spool_replay_interval()
+        self._replay_at = time.monotonic() + interval if interval > 0 else None
+
+    @property
+    def spool(self) -> EventSpool | None:
+        return getattr(self.queue, "spool", None)
+
+    def get_oldest_event(self) -> types.Event | None:
+        """Get the oldest buffered event, that is not written yet."""
+        events = self._failed or self.data["events"]
+
+        return events[0] if events else None
+
+    def _get_wait_time(self) -> float | None:
+        """Get the time to wait for the next event, in seconds.
+
+        Without buffered events and the scheduled replay, there is nothing
+        to write, so the writer waits for the next event without the timeout.
+        """
+        deadlines = [
+            deadline
+            for deadline in (self._deadline, self._replay_at)
+            if deadline is not None
+        ]
+
+        if not deadlines:
+            return None
+
+        return max(min(deadlines) - time.monotonic(), 0)
+
+    def _is_time_to_push(self) -> bool:
+        """Decide if it's time to push the events to the repository.
+
+        Check if the oldest buffered event waits longer than the batch timeout.
+        """
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+
+class WriterPool:
+    """A pool of writers, that take events from the shared queue.
+
+    Every writer collects its own batches, so batches are written
+    concurrently. The pool has more than one writer only if the repository
+    supports concurrent writes.
+    """
+
+    def __init__(self, queue: queue.Queue[Any], size: int = 1):
+        self.queue = queue
+        self.workers = [
+            EventWriteThread(queue, name=f"event-audit-writer-{i}", replay=i == 0)
+            for i in range(max(size, 1))
+        ]
+
+    @staticmethod
+    def get_size(repo: AbstractRepository) -> int:
+        """Get the number of writers for the repository."""
+        if not repo.concurrent_writes:
+            return 1
+
+        return max(config.get_writer_workers(), 1)
+
+    def start(self):
+        for worker in self.workers:
+            worker.daemon = True
+            worker.start()
+
+    def is_alive(self) -> bool:
+        return any(worker.is_alive() for worker in self.workers)
+
+    def count_alive(self) -> int:
+        return sum(worker.is_alive() for worker in self.workers)
+
+    def get_oldest_events(self) -> list[types.Event]:
+        """Get the oldest buffered event of every writer."""
+        events = [worker.get_oldest_event() for worker in self.workers]
+
+        return [event for event in events if event is not None]
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Write all the events, queued before the call, by all the writers.
+
+        The time, spent waiting for the free space in the full queue, is
+        counted against the timeout.
+
+        Args:
+            timeout (float | None, optional): maximum time to wait, in seconds.
+
+        Returns:
+            bool: whether the events were written in time.
+        """
+        workers = [worker for worker in self.workers if worker.is_alive()]
+
+        if not workers:
+            return False
+
+        deadline = _get_deadline(timeout)
+        request = FlushRequest(len(workers))
+
+        try:
+            for _ in workers:
+                self.queue.put(request, timeout=_get_remaining_time(deadline))
+        except queue.Full:
+            pass
+        else:
+            if request.done.wait(_get_remaining_time(deadline)):
+                return True
+
+        # release the writers, that are waiting for the rest
+        request.barrier.abort()
+
+        return False
+
+
+def _get_deadline(timeout: float | None) -> float | None:
+    """Get the monotonic time, when the timeout is over."""
+    return None if timeout is None else time.monotonic() + timeout
+
+
+def _get_remaining_time(deadline: float | None) -> float | None:
+    """Get the time in seconds, that is left until the deadline."""
+    return None if deadline is None else max(deadline - time.monotonic(), 0)